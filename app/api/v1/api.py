@@ -1,13 +1,18 @@
 from fastapi import APIRouter
 
 from app import models, settings, version
-from app.api.v1.endpoints import article, login, users
+from app.api.v1.endpoints import article, jobs, llm_calls, login, users, worldanvil_sync
 
 api_router = APIRouter()
 
 api_router.include_router(login.router, tags=["login"])
 api_router.include_router(users.router, prefix="/user", tags=["Users"])
 api_router.include_router(article.router, prefix="/article", tags=["Articles"])
+api_router.include_router(llm_calls.router, prefix="/llm-calls", tags=["LLM Calls"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
+api_router.include_router(
+    worldanvil_sync.router, prefix="/worldanvil-sync", tags=["World Anvil Sync"]
+)
 
 
 @api_router.get("/", response_model=models.HealthCheck, tags=["status"])
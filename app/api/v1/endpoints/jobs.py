@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlmodel import Session
+
+from app import crud, models
+from app.api import deps
+
+router = APIRouter()
+
+
+@router.get("/", response_model=list[models.JobRead])
+async def get_recent(
+    *,
+    db: Session = Depends(deps.get_db),
+    limit: int = 100,
+    _: models.User = Depends(deps.get_current_active_user),
+) -> list[models.Job]:
+    """
+    Retrieve the most recent jobs.
+
+    Args:
+        db (Session): database session.
+        limit (int): number of jobs to retrieve.
+        _ (models.User): Current active user.
+
+    Returns:
+        list[models.Job]: The most recent jobs, newest first.
+    """
+    return await crud.job.get_recent(db=db, limit=limit)
+
+
+@router.get("/counts", response_model=models.JobStatusCounts)
+async def get_status_counts(
+    *,
+    db: Session = Depends(deps.get_db),
+    _: models.User = Depends(deps.get_current_active_user),
+) -> models.JobStatusCounts:
+    """
+    Retrieve the number of queued, running, done and failed jobs.
+
+    Args:
+        db (Session): database session.
+        _ (models.User): Current active user.
+
+    Returns:
+        models.JobStatusCounts: The number of jobs in each status.
+    """
+    return await crud.job.get_status_counts(db=db)
+
+
+@router.get("/{job_id}", response_model=models.JobRead)
+async def get(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_id: str,
+    _: models.User = Depends(deps.get_current_active_user),
+) -> models.Job:
+    """
+    Retrieve the status and progress of a job.
+
+    Args:
+        job_id (str): id of the job.
+        db (Session): database session.
+        _ (models.User): Current active user.
+
+    Returns:
+        models.Job: The job.
+
+    Raises:
+        HTTPException: if the job does not exist.
+    """
+    try:
+        return await crud.job.get(db=db, id=job_id)
+    except crud.RecordNotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found") from exc
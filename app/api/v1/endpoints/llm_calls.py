@@ -0,0 +1,31 @@
+from typing import Optional
+from datetime import datetime
+
+from fastapi import APIRouter, Depends
+from sqlmodel import Session
+
+from app import crud, models
+from app.api import deps
+
+router = APIRouter()
+
+
+@router.get("/stats", response_model=list[models.LLMCallTaskStats])
+async def get_task_stats(
+    *,
+    db: Session = Depends(deps.get_db),
+    since: Optional[datetime] = None,
+    _: models.User = Depends(deps.get_current_active_superuser),
+) -> list[models.LLMCallTaskStats]:
+    """
+    Retrieve the journaled LLM call stats of each task.
+
+    Args:
+        db (Session): database session.
+        since (Optional[datetime]): only aggregate calls made after this time.
+        _ (models.User): Current active superuser.
+
+    Returns:
+        list[models.LLMCallTaskStats]: Calls, tokens and p50/p95 latency per task.
+    """
+    return await crud.llm_call.get_task_stats(db=db, since=since)
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends
+from sqlmodel import Session
+
+from app import crud, models
+from app.api import deps
+
+router = APIRouter()
+
+
+@router.get("/", response_model=list[models.WorldAnvilSyncRead])
+async def get_all(
+    *,
+    db: Session = Depends(deps.get_db),
+    _: models.User = Depends(deps.get_current_active_user),
+) -> list[models.WorldAnvilSync]:
+    """
+    Retrieve the state and counters of the scheduled World Anvil sync.
+
+    Args:
+        db (Session): database session.
+        _ (models.User): Current active user.
+
+    Returns:
+        list[models.WorldAnvilSync]: The sync state of each export.
+    """
+    return await crud.worldanvil_sync.get_all(db=db)
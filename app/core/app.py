@@ -6,9 +6,11 @@ from sqlmodel import Session
 from app import logger, models, settings, version
 from app.api import deps
 from app.api.v1.api import api_router
-from app.core import notify
+from app.core import notify, process_pool
 from app.db.init_db import init_initial_data
+from app.db.session import SessionLocal
 from app.paths import STATIC_PATH
+from app.services import jobs, llm_cache, tokenizer, worldanvil_client
 from app.views.router import views_router
 
 # Initialize FastAPI App
@@ -41,8 +43,31 @@ async def on_startup(db: Session = next(deps.get_db())) -> None:
 
     await init_initial_data(db=db)
 
+    tokenizer.warm_up()
+    process_pool.start_process_pool(initializer=tokenizer.warm_up)
+    llm_cache.cache.evict()
+    await jobs.start_worker(db=db)
+    if settings.WORLDANVIL_SYNC_ENABLED:
+        await schedule_worldanvil_sync()
 
-# @app.on_event("startup")  # type: ignore
-# @repeat_every(seconds=120, wait_first=False)
-# async def repeating_task() -> None:
-#     logger.debug("This is a repeating task example that runs every 120 seconds.")
+
+@app.on_event("shutdown")  # type: ignore
+async def on_shutdown() -> None:
+    """
+    Event handler that gets called when the application shuts down.
+    Stops the job worker, the World Anvil client and the process pool used for CPU-bound work.
+    """
+    logger.debug("Shutting down FastAPI App...")
+    await jobs.stop_worker()
+    await worldanvil_client.close_client()
+    process_pool.shutdown_process_pool()
+
+
+@repeat_every(seconds=settings.WORLDANVIL_SYNC_SECONDS, wait_first=True)
+async def schedule_worldanvil_sync() -> None:
+    """Queue a World Anvil sync every `WORLDANVIL_SYNC_SECONDS`, unless one is already active"""
+    try:
+        with SessionLocal() as db:
+            await jobs.enqueue_job(db=db, kind=jobs.JOB_SYNC_WORLDANVIL)
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("Failed to queue the scheduled World Anvil sync")
@@ -1,8 +1,15 @@
+from typing import Optional
+
+import asyncio
+
 import typer
 from rich.console import Console
 
 from app import logger, settings, version
 from app.core.server import start_server
+from app.db.session import SessionLocal
+from app.services import articles, import_pipeline, token_counts
+from app.services.export_snapshots import snapshots
 
 # from app.core.app import app
 
@@ -34,8 +41,9 @@ def version_callback(print_version: bool) -> None:
 
 
 # Typer Commands
-@typer_app.command()
+@typer_app.callback(invoke_without_command=True)
 def main(
+    ctx: typer.Context,
     print_version: bool = typer.Option(  # pylint: disable=unused-argument
         None,
         "-v",
@@ -50,9 +58,103 @@ def main(
     This function starts the server and raises an error if not implemented.
 
     Args:
+        ctx: typer.Context : The typer context.
         print_version: bool : If true, print version of the package and exit.
     """
+    if ctx.invoked_subcommand is not None:
+        return
 
     # Start Uvicorn
     logger.info("Starting Server...")
     start_server()
+
+
+@typer_app.command()
+def backfill_token_counts(
+    batch_size: int = typer.Option(500, help="Number of rows to tokenize per commit."),
+) -> None:
+    """
+    Compute the stored token counts that are missing from articles and custom codex articles.
+
+    Args:
+        batch_size: int : Number of rows to tokenize per commit.
+    """
+    with SessionLocal() as db:
+        updated = asyncio.run(token_counts.backfill_token_counts(db=db, batch_size=batch_size))
+    console.print(f"Backfilled token counts for [bold blue]{updated}[/] rows.")
+
+
+@typer_app.command()
+def calibrate_token_estimator(
+    sample_size: int = typer.Option(1000, help="Number of texts to sample per text field."),
+) -> None:
+    """
+    Fit the approximate token estimator against the stored token counts.
+
+    Args:
+        sample_size: int : Number of texts to sample per text field.
+    """
+    with SessionLocal() as db:
+        estimator = asyncio.run(
+            token_counts.calibrate_token_estimator(db=db, sample_size=sample_size)
+        )
+    console.print(
+        f"Fitted [bold blue]{estimator.char_ratio:.4f}[/] tokens/char, "
+        f"[bold blue]{estimator.word_ratio:.4f}[/] tokens/word "
+        f"(±{estimator.relative_error:.1%})."
+    )
+
+
+@typer_app.command()
+def generate_ai_text(
+    batch: bool = typer.Option(
+        False, help="Submit all articles as one message batch instead of concurrent calls."
+    ),
+) -> None:
+    """
+    Generate the missing summary, brief and date range of all articles.
+
+    Args:
+        batch: bool : Submit all articles as one message batch instead of concurrent calls.
+    """
+    with SessionLocal() as db:
+        if batch:
+            asyncio.run(articles.generate_all_ai_text_batch(db=db))
+        else:
+            asyncio.run(articles.generate_all_ai_text(db=db))
+
+
+@typer_app.command()
+def import_articles(
+    from_snapshot: bool = typer.Option(
+        False, help="Re-import the newest export snapshot instead of downloading the export."
+    ),
+    snapshot: Optional[str] = typer.Option(
+        None, help="Content hash, or hash prefix, of the export snapshot to re-import."
+    ),
+) -> None:
+    """
+    Import the articles of the World Anvil export, or of a stored export snapshot.
+
+    Args:
+        from_snapshot: bool : Re-import the newest export snapshot instead of downloading it.
+        snapshot: Optional[str] : Content hash, or hash prefix, of the snapshot to re-import.
+    """
+    with SessionLocal() as db:
+        if from_snapshot or snapshot:
+            asyncio.run(import_pipeline.import_articles_from_snapshot(db=db, content_hash=snapshot))
+        else:
+            asyncio.run(import_pipeline.import_articles_from_worldanvil(db=db))
+
+
+@typer_app.command()
+def export_snapshots() -> None:
+    """
+    List the stored World Anvil export snapshots, newest first.
+    """
+    for export_snapshot in snapshots.get_all():
+        console.print(
+            f"[bold blue]{export_snapshot.content_hash[:12]}[/]  "
+            f"{export_snapshot.created_at:%Y-%m-%d %H:%M}  "
+            f"{export_snapshot.size / 1024 / 1024:.1f} MB"
+        )
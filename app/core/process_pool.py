@@ -0,0 +1,75 @@
+from typing import Any, TypeVar
+
+import asyncio
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from app import logger, settings
+
+T = TypeVar("T")
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def start_process_pool(
+    max_workers: int = settings.PROCESS_POOL_WORKERS,
+    initializer: Callable[[], Any] | None = None,
+) -> None:
+    """
+    Start the shared process pool that CPU-bound work is submitted to.
+
+    Args:
+        max_workers (int): Number of worker processes. 0 disables the pool.
+        initializer (Callable | None): Called once in every worker process on start.
+    """
+    global _executor  # pylint: disable=global-statement
+    if _executor is not None or max_workers < 1:
+        return
+
+    _executor = ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer,
+    )
+    logger.debug(f"Started process pool with {max_workers} workers")
+
+
+def shutdown_process_pool() -> None:
+    """
+    Shut down the shared process pool, cancelling work that has not started yet.
+    """
+    global _executor  # pylint: disable=global-statement
+    if _executor is None:
+        return
+
+    _executor.shutdown(wait=True, cancel_futures=True)
+    _executor = None
+    logger.debug("Shut down process pool")
+
+
+def is_process_pool_started() -> bool:
+    return _executor is not None
+
+
+async def run_in_process(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a CPU-bound function in the shared process pool and await its result.
+
+    The function and its arguments must be picklable. When the pool has not been started
+    (e.g. in the CLI or in tests), the function runs in the calling process instead.
+
+    Args:
+        func (Callable): Module-level function to run.
+        args: Positional arguments for `func`.
+        kwargs: Keyword arguments for `func`.
+
+    Returns:
+        The return value of `func`.
+    """
+    if _executor is None:
+        return func(*args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
@@ -4,3 +4,7 @@ from .user import *
 from .custom_codex import *
 from .custom_codex_article import *
 from .review import *
+from .llm_call import *
+from .job import *
+from .import_run import *
+from .worldanvil_sync import *
@@ -1,3 +1,9 @@
+from typing import Any, Optional
+
+from sqlalchemy import Integer, and_, or_
+from sqlalchemy import select as sa_select
+from sqlalchemy.engine import Row
+from sqlalchemy.sql.elements import ColumnElement
 from sqlmodel import Session
 
 from app import models
@@ -6,6 +12,12 @@ from .base import BaseCRUD
 
 
 class ArticleCRUD(BaseCRUD[models.Article, models.ArticleCreate, models.ArticleUpdate]):
+    token_count_fields = {
+        "text": "text_tokens",
+        "summary": "summary_tokens",
+        "brief": "brief_tokens",
+    }
+
     async def create_with_owner_id(
         self, db: Session, *, obj_in: models.ArticleCreate, owner_id: str
     ) -> models.Article:
@@ -40,5 +52,78 @@ class ArticleCRUD(BaseCRUD[models.Article, models.ArticleCreate, models.ArticleU
         """
         return await self.get_multi(db=db, owner_id=owner_id, skip=skip, limit=limit)
 
+    async def get_content_hashes(self, db: Session) -> dict[str, Optional[str]]:
+        """
+        Get the content hash of every article in one query, without loading the articles.
+
+        Args:
+            db (Session): The database session.
+
+        Returns:
+            dict[str, Optional[str]]: A dict mapping each article id to its content hash.
+        """
+        statement = sa_select(self.model.id, self.model.content_hash)
+        return dict(db.execute(statement).all())
+
+    def get_missing_ai_text_filter(self) -> ColumnElement[Any]:
+        """
+        Get the filter for articles with text that are missing any of their AI text.
+
+        Returns:
+            ColumnElement: A `WHERE` clause matching the articles.
+        """
+        return and_(
+            self.model.text != "",
+            or_(
+                self.is_missing(self.model.brief),
+                self.is_missing(self.model.summary),
+                self.is_missing(self.model.year_start),
+                self.is_missing(self.model.year_end),
+            ),
+        )
+
+    def is_missing(self, column: Any) -> ColumnElement[Any]:
+        """Match a missing AI text field: null, an empty string or a zero year"""
+        empty = 0 if isinstance(column.type, Integer) else ""
+        return or_(column.is_(None), column == empty)
+
+    async def get_missing_ai_text_page(
+        self, db: Session, *, after_id: Optional[str] = None, limit: int = 100
+    ) -> list[Row]:
+        """
+        Get a page of the articles missing AI text, loading only the columns needed to
+        generate it.
+
+        Pages are keyed by id rather than offset, so articles updated between pages do not
+        shift the next page.
+
+        Args:
+            db (Session): The database session.
+            after_id (Optional[str]): The id of the last article of the previous page.
+            limit (int): The maximum number of rows to return. Defaults to 100.
+
+        Returns:
+            list[Row]: Rows of `id`, `title`, `text` and whether the `brief`, `summary` and
+                `years` are missing, ordered by id.
+        """
+        statement = (
+            sa_select(
+                self.model.id,
+                self.model.title,
+                self.model.text,
+                self.is_missing(self.model.brief).label("missing_brief"),
+                self.is_missing(self.model.summary).label("missing_summary"),
+                or_(
+                    self.is_missing(self.model.year_start), self.is_missing(self.model.year_end)
+                ).label("missing_years"),
+            )
+            .where(self.get_missing_ai_text_filter())
+            .order_by(self.model.id)
+            .limit(limit)
+        )
+        if after_id is not None:
+            statement = statement.where(self.model.id > after_id)
+        return list(db.execute(statement).all())
+
 
 article = ArticleCRUD(models.Article)
@@ -1,12 +1,20 @@
-from typing import Any, Generic, TypeVar
+from typing import Any, Generic, Iterator, TypeVar
 
+from datetime import datetime
+
+from sqlalchemy import bindparam, case
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy import select as sa_select
+from sqlalchemy import update as sa_update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.sql.elements import BinaryExpression
 from sqlalchemy.sql.expression import func
 from sqlmodel import Session, SQLModel, select, asc
 
+from app import logger
+from app.core.process_pool import run_in_process
 from app.crud.exceptions import DeleteError, RecordAlreadyExistsError, RecordNotFoundError
+from app.services.tokenizer import count_tokens_many
 
 ModelType = TypeVar("ModelType", bound=SQLModel)
 ModelCreateType = TypeVar("ModelCreateType", bound=SQLModel)
@@ -14,6 +22,11 @@ ModelUpdateType = TypeVar("ModelUpdateType", bound=SQLModel)
 
 
 class BaseCRUD(Generic[ModelType, ModelCreateType, ModelUpdateType]):
+    # Maps a text field to the field storing its token count. Counts are kept current by
+    # `create()` and `update()` whenever the text field is written, and left empty for the
+    # `backfill-token-counts` command when the tokenizer cannot be loaded.
+    token_count_fields: dict[str, str] = {}
+
     def __init__(self, model: type[ModelType]) -> None:
         """
         Initialize the CRUD object.
@@ -120,7 +133,9 @@ class BaseCRUD(Generic[ModelType, ModelCreateType, ModelUpdateType]):
         Raises:
             RecordAlreadyExistsError: If the record already exists.
         """
-        out_obj = self.model(**{**obj_in.dict(), **kwargs})
+        obj_in_values = {**obj_in.dict(), **kwargs}
+        obj_in_values.update(await self.get_token_counts(obj_in_values))
+        out_obj = self.model(**obj_in_values)
 
         db.add(out_obj)
         try:
@@ -162,14 +177,201 @@ class BaseCRUD(Generic[ModelType, ModelCreateType, ModelUpdateType]):
 
         obj_in_values = obj_in.dict(exclude_unset=exclude_unset, exclude_none=exclude_none)
         db_obj_values = db_obj.dict()
-        for obj_in_key, obj_in_value in obj_in_values.items():
-            if obj_in_value != db_obj_values[obj_in_key]:
-                setattr(db_obj, obj_in_key, obj_in_value)
+        changed_values = {
+            obj_in_key: obj_in_value
+            for obj_in_key, obj_in_value in obj_in_values.items()
+            if obj_in_value != db_obj_values[obj_in_key]
+        }
+        changed_values.update(await self.get_token_counts(changed_values))
+        for obj_in_key, obj_in_value in changed_values.items():
+            setattr(db_obj, obj_in_key, obj_in_value)
 
         db.commit()
         db.refresh(db_obj)
         return db_obj
 
+    async def upsert_many(
+        self, db: Session, rows: list[dict[str, Any]], commit: bool = True
+    ) -> None:
+        """
+        Insert records, updating the given fields of records that already exist, in one
+        transaction with `INSERT ... ON CONFLICT DO UPDATE`.
+
+        Rows are grouped by the fields they set, and each group is written with a single
+        executemany. Token counts are computed for all rows in one batch.
+
+        Args:
+            db (Session): The database session.
+            rows (list[dict[str, Any]]): The field values of each record, including its
+                primary key.
+            commit (bool): Whether to commit, or leave the transaction open for more writes.
+        """
+        if not rows:
+            return
+
+        token_counts = await self.get_token_counts_many(rows)
+        groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+        for row, counts in zip(rows, token_counts):
+            row = {**row, **counts}
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+
+        table = self.model.__table__  # type: ignore
+        primary_keys = [column.name for column in table.primary_key]
+        for fields, group in groups.items():
+            statement = sqlite_insert(table)
+            update_values = {
+                field: statement.excluded[field]
+                for field in fields
+                if field not in primary_keys and field != "created_at"
+            }
+            if not update_values:
+                statement = statement.on_conflict_do_nothing(index_elements=primary_keys)
+            else:
+                if "updated_at" in table.columns:
+                    # ON CONFLICT DO UPDATE does not apply the onupdate of columns
+                    update_values["updated_at"] = datetime.utcnow()
+                statement = statement.on_conflict_do_update(
+                    index_elements=primary_keys, set_=update_values
+                )
+            db.execute(statement, group)
+        if commit:
+            db.commit()
+
+    async def update_many(
+        self, db: Session, rows: list[dict[str, Any]], commit: bool = True
+    ) -> None:
+        """
+        Update the given fields of existing records in one transaction, without loading them.
+
+        Rows are grouped by the fields they set, and each group is written with a single
+        executemany of `UPDATE ... WHERE id = ?`. Token counts are computed for all rows in
+        one batch.
+
+        Args:
+            db (Session): The database session.
+            rows (list[dict[str, Any]]): The primary key and the new field values of each
+                record.
+            commit (bool): Whether to commit, or leave the transaction open for more writes.
+        """
+        if not rows:
+            return
+
+        token_counts = await self.get_token_counts_many(rows)
+        groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+        for row, counts in zip(rows, token_counts):
+            row = {**row, **counts}
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+
+        table = self.model.__table__  # type: ignore
+        primary_keys = [column.name for column in table.primary_key]
+        for fields, group in groups.items():
+            # Bind parameters cannot share the names of the columns being set
+            values: dict[str, Any] = {
+                field: bindparam(f"new_{field}") for field in fields if field not in primary_keys
+            }
+            if "updated_at" in table.columns:
+                values["updated_at"] = datetime.utcnow()
+            statement = sa_update(table).values(values)
+            for key in primary_keys:
+                statement = statement.where(table.columns[key] == bindparam(f"key_{key}"))
+            db.execute(
+                statement,
+                [
+                    {
+                        f"key_{field}" if field in primary_keys else f"new_{field}": value
+                        for field, value in row.items()
+                    }
+                    for row in group
+                ],
+            )
+        if commit:
+            db.commit()
+
+    async def count_tokens(self, texts: list[Any]) -> list[int | None]:
+        """
+        Count the tokens of `texts` in the process pool.
+
+        A tokenizer that cannot be loaded must not block writes, so it is logged and only empty
+        texts are counted instead.
+        """
+        try:
+            return list(await run_in_process(count_tokens_many, texts))
+        except (OSError, ImportError) as e:
+            logger.warning(f"Could not count tokens, leaving the counts empty: {str(e)}")
+            return [None if text else 0 for text in texts]
+
+    async def get_token_counts(self, values: dict[str, Any]) -> dict[str, int | None]:
+        """
+        Count the tokens of the text fields present in `values` in the process pool.
+
+        Args:
+            values (dict[str, Any]): The field values being written.
+
+        Returns:
+            A dict mapping each token count field to its new value, or None if it could not be
+            counted.
+        """
+        text_fields = [field for field in self.token_count_fields if field in values]
+        if not any(values[field] for field in text_fields):
+            return {self.token_count_fields[field]: 0 for field in text_fields}
+        counts = await self.count_tokens([values[field] for field in text_fields])
+        return {self.token_count_fields[field]: count for field, count in zip(text_fields, counts)}
+
+    async def get_token_counts_many(
+        self, rows: list[dict[str, Any]]
+    ) -> list[dict[str, int | None]]:
+        """
+        Count the tokens of the text fields present in each row in a single process pool call.
+
+        Args:
+            rows (list[dict[str, Any]]): The field values of each record being written.
+
+        Returns:
+            A list with a dict mapping each token count field to its new value, or None if it
+            could not be counted, for each row.
+        """
+        row_fields = [[field for field in self.token_count_fields if field in row] for row in rows]
+        texts = [row[field] for row, fields in zip(rows, row_fields) for field in fields]
+        if any(texts):
+            counts: Iterator[int | None] = iter(await self.count_tokens(texts))
+        else:
+            counts = iter([0] * len(texts))
+        return [
+            {self.token_count_fields[field]: next(counts) for field in fields}
+            for fields in row_fields
+        ]
+
+    async def get_stored_token_counts(
+        self, db: Session, *args: BinaryExpression[Any], key: str = "id", **kwargs: Any
+    ) -> dict[str, dict[str, tuple[int | None, str | None]]]:
+        """
+        Get the stored token count of every text field, without loading texts that are counted.
+
+        Args:
+            db (Session): The database session.
+            args: Binary expressions to filter by.
+            key (str): The field to key the result by. Defaults to "id".
+            kwargs: Keyword arguments to filter by.
+
+        Returns:
+            A dict mapping each `key` to a dict of text field -> (stored count, text). The text
+            is only loaded when no count is stored for it.
+        """
+        columns = []
+        for text_field, count_field in self.token_count_fields.items():
+            count_column = getattr(self.model, count_field)
+            columns.append(count_column)
+            columns.append(case((count_column.is_(None), getattr(self.model, text_field))))
+
+        statement = sa_select(getattr(self.model, key), *columns).filter(*args).filter_by(**kwargs)
+        result = {}
+        for key_value, *values in db.execute(statement):
+            result[key_value] = {
+                text_field: (values[i * 2], values[i * 2 + 1])
+                for i, text_field in enumerate(self.token_count_fields)
+            }
+        return result
+
     async def remove(self, db: Session, *args: BinaryExpression[Any], **kwargs: Any) -> None:
         """
         Delete a record.
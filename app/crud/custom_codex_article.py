@@ -1,6 +1,10 @@
+from sqlalchemy import case
+from sqlalchemy import select as sa_select
+from sqlalchemy.sql.expression import func
 from sqlmodel import Session
 
 from app import models
+from app.services.tokenizer import estimate_tokens
 
 from .base import BaseCRUD
 
@@ -10,6 +14,8 @@ class CustomCodexArticleCRUD(
         models.CustomCodexArticle, models.CustomCodexArticleCreate, models.CustomCodexArticleUpdate
     ]
 ):
+    token_count_fields = {"custom_text": "custom_text_tokens"}
+
     async def get_multi_by_codex_id(
         self, db: Session, *, codex_id: str, skip: int = 0, limit: int = 100
     ) -> list[models.CustomCodexArticle]:
@@ -20,5 +26,52 @@ class CustomCodexArticleCRUD(
     ) -> list[models.CustomCodexArticle]:
         return await self.get_multi(db=db, article_id=article_id, skip=skip, limit=limit)
 
+    async def sum_context_tokens(self, db: Session, *, codex_id: str) -> int:
+        """
+        Sum the stored token counts of the text each article contributes to a codex.
+
+        Texts without a stored count, e.g. written before counts were stored or while the
+        tokenizer was missing, are estimated instead of counting as 0 tokens.
+
+        Args:
+            db (Session): The database session.
+            codex_id (str): The codex_id to filter by.
+
+        Returns:
+            int: The total number of tokens in the codex context.
+        """
+        cca = models.CustomCodexArticle
+        article = models.Article
+        article_tokens = case(
+            (cca.article_type == "Full", article.text_tokens),
+            (cca.article_type == "Summary", article.summary_tokens),
+            (cca.article_type == "Brief", article.brief_tokens),
+            (cca.article_type == "Custom", cca.custom_text_tokens),
+            else_=0,
+        )
+        article_text = case(
+            (cca.article_type == "Full", article.text),
+            (cca.article_type == "Summary", article.summary),
+            (cca.article_type == "Brief", article.brief),
+            (cca.article_type == "Custom", cca.custom_text),
+        )
+        statement = (
+            sa_select(func.coalesce(func.sum(article_tokens), 0))
+            .select_from(cca)
+            .join(article, article.id == cca.article_id)
+            .where(cca.codex_id == codex_id)
+        )
+        total = int(db.execute(statement).scalar() or 0)
+
+        uncounted_statement = (
+            sa_select(article_text)
+            .select_from(cca)
+            .join(article, article.id == cca.article_id)
+            .where(cca.codex_id == codex_id, article_tokens.is_(None))
+        )
+        for text in db.execute(uncounted_statement).scalars():
+            total += estimate_tokens(text).tokens
+        return total
+
 
 custom_codex_article = CustomCodexArticleCRUD(models.CustomCodexArticle)
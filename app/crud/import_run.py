@@ -0,0 +1,41 @@
+from typing import Optional
+
+from sqlalchemy import delete
+from sqlalchemy import select as sa_select
+from sqlmodel import Session, desc, select
+
+from app import models
+
+from .base import BaseCRUD
+
+
+class ImportRunCRUD(BaseCRUD[models.ImportRun, models.ImportRunCreate, models.ImportRunUpdate]):
+    async def get_resumable(self, db: Session, *, export_hash: str) -> Optional[models.ImportRun]:
+        """Get the latest unfinished run of an export"""
+        statement = (
+            select(self.model)
+            .where(self.model.export_hash == export_hash, self.model.status != models.JOB_DONE)
+            .order_by(desc(self.model.created_at))
+        )
+        return db.exec(statement).first()
+
+    async def get_checkpoints(self, db: Session, *, run_id: str) -> set[str]:
+        """Get the ids of the articles whose writes a run has committed"""
+        checkpoint = models.ImportCheckpoint
+        statement = sa_select(checkpoint.article_id).where(checkpoint.run_id == run_id)
+        return set(db.execute(statement).scalars())
+
+    async def remove_checkpoints(self, db: Session, *, run_id: str) -> None:
+        checkpoint = models.ImportCheckpoint
+        db.execute(delete(checkpoint).where(checkpoint.run_id == run_id))
+        db.commit()
+
+
+class ImportCheckpointCRUD(
+    BaseCRUD[models.ImportCheckpoint, models.ImportCheckpoint, models.ImportCheckpoint]
+):
+    pass
+
+
+import_run = ImportRunCRUD(models.ImportRun)
+import_checkpoint = ImportCheckpointCRUD(models.ImportCheckpoint)
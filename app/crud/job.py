@@ -0,0 +1,57 @@
+from typing import Optional
+
+from sqlalchemy import select as sa_select
+from sqlalchemy.sql.expression import func
+from sqlmodel import Session, asc, desc, select
+
+from app import models
+
+from .base import BaseCRUD
+
+
+class JobCRUD(BaseCRUD[models.Job, models.JobCreate, models.JobUpdate]):
+    async def get_next_queued(self, db: Session) -> Optional[models.Job]:
+        """Get the oldest queued job"""
+        statement = (
+            select(self.model)
+            .where(self.model.status == models.JOB_QUEUED)
+            .order_by(asc(self.model.created_at))
+        )
+        return db.exec(statement).first()
+
+    async def get_active(self, db: Session, *, kind: str) -> Optional[models.Job]:
+        """Get the queued or running job of a kind"""
+        statement = select(self.model).where(
+            self.model.kind == kind,
+            self.model.status.in_([models.JOB_QUEUED, models.JOB_RUNNING]),  # type: ignore
+        )
+        return db.exec(statement).first()
+
+    async def get_recent(self, db: Session, *, limit: int = 100) -> list[models.Job]:
+        statement = select(self.model).order_by(desc(self.model.created_at)).limit(limit)
+        return db.exec(statement).all()
+
+    async def get_status_counts(self, db: Session) -> models.JobStatusCounts:
+        """Count the jobs in each status"""
+        statement = sa_select(self.model.status, func.count()).group_by(self.model.status)
+        return models.JobStatusCounts(**dict(db.execute(statement).all()))
+
+    async def requeue_running(self, db: Session) -> int:
+        """
+        Queue the jobs left running by a previous process again.
+
+        Args:
+            db (Session): The database session.
+
+        Returns:
+            int: The number of jobs queued again.
+        """
+        jobs = db.exec(select(self.model).where(self.model.status == models.JOB_RUNNING)).all()
+        for job in jobs:
+            job.status = models.JOB_QUEUED
+            job.progress = 0
+        db.commit()
+        return len(jobs)
+
+
+job = JobCRUD(models.Job)
@@ -0,0 +1,89 @@
+from typing import Optional
+import math
+from datetime import datetime
+
+from sqlalchemy import select as sa_select
+from sqlalchemy.sql.expression import func
+from sqlmodel import Session, desc, select
+
+from app import models
+
+from .base import BaseCRUD
+
+
+def percentile(sorted_values: list[float], percent: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(len(sorted_values) * percent / 100) - 1)]
+
+
+class LLMCallCRUD(BaseCRUD[models.LLMCall, models.LLMCallCreate, models.LLMCallUpdate]):
+    async def get_recent(self, db: Session, *, limit: int = 100) -> list[models.LLMCall]:
+        statement = select(self.model).order_by(desc(self.model.created_at)).limit(limit)
+        return db.exec(statement).all()
+
+    async def get_task_stats(
+        self, db: Session, *, since: Optional[datetime] = None
+    ) -> list[models.LLMCallTaskStats]:
+        """
+        Aggregate the journaled calls per task.
+
+        Token counts are summed in SQL. Latency percentiles are computed from the calls that
+        reached the API, since cache hits and batch results have no comparable latency.
+
+        Args:
+            db (Session): The database session.
+            since (Optional[datetime]): Only aggregate calls made after this time.
+
+        Returns:
+            list[models.LLMCallTaskStats]: The stats of each task, ordered by task.
+        """
+        llm_call = models.LLMCall
+        filters = [llm_call.created_at >= since] if since else []
+
+        statement = (
+            sa_select(
+                llm_call.task,
+                func.count(),
+                func.count(llm_call.error),
+                func.sum(llm_call.cache_hit),
+                func.sum(llm_call.retries),
+                func.sum(llm_call.input_tokens),
+                func.sum(llm_call.output_tokens),
+                func.sum(llm_call.cache_read_input_tokens),
+            )
+            .where(*filters)
+            .group_by(llm_call.task)
+            .order_by(llm_call.task)
+        )
+        stats = {
+            row[0]: models.LLMCallTaskStats(
+                task=row[0],
+                calls=row[1],
+                errors=row[2],
+                cache_hits=row[3] or 0,
+                retries=row[4] or 0,
+                input_tokens=row[5] or 0,
+                output_tokens=row[6] or 0,
+                cache_read_input_tokens=row[7] or 0,
+            )
+            for row in db.execute(statement)
+        }
+
+        latencies: dict[str, list[float]] = {}
+        statement = (
+            sa_select(llm_call.task, llm_call.latency)
+            .where(*filters, llm_call.latency.is_not(None), llm_call.cache_hit.is_(False))
+            .order_by(llm_call.task, llm_call.latency)
+        )
+        for task, latency in db.execute(statement):
+            latencies.setdefault(task, []).append(latency)
+        for task, task_latencies in latencies.items():
+            stats[task].p50_latency = percentile(task_latencies, 50)
+            stats[task].p95_latency = percentile(task_latencies, 95)
+
+        return list(stats.values())
+
+
+llm_call = LLMCallCRUD(models.LLMCall)
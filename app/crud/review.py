@@ -1,3 +1,4 @@
+from sqlalchemy import select as sa_select
 from sqlmodel import Session
 
 from app import models
@@ -11,5 +12,21 @@ class ReviewCRUD(BaseCRUD[models.Review, models.ReviewCreate, models.ReviewUpdat
     ) -> list[models.Review]:
         return await self.get_multi(db=db, article_id=article_id, skip=skip, limit=limit)
 
+    async def get_pending_content_hashes(self, db: Session) -> set[tuple[str, str]]:
+        """
+        Get the imported content hash of every pending review in one query.
+
+        Args:
+            db (Session): The database session.
+
+        Returns:
+            set[tuple[str, str]]: The (article id, content hash) of each review created by an
+                import.
+        """
+        statement = sa_select(self.model.article_id, self.model.content_hash).where(
+            self.model.content_hash.is_not(None)  # type: ignore
+        )
+        return {(article_id, content_hash) for article_id, content_hash in db.execute(statement)}
+
 
 review = ReviewCRUD(models.Review)
@@ -0,0 +1,21 @@
+from sqlmodel import Session
+
+from app import models
+
+from .base import BaseCRUD
+
+
+class WorldAnvilSyncCRUD(
+    BaseCRUD[models.WorldAnvilSync, models.WorldAnvilSyncCreate, models.WorldAnvilSyncUpdate]
+):
+    async def get_or_create(self, db: Session, *, export_url: str) -> models.WorldAnvilSync:
+        """Get the sync state of an export, creating it on the first sync"""
+        sync_state = await self.get_or_none(db=db, export_url=export_url)
+        if sync_state is None:
+            sync_state = await self.create(
+                db=db, obj_in=models.WorldAnvilSyncCreate(export_url=export_url)
+            )
+        return sync_state
+
+
+worldanvil_sync = WorldAnvilSyncCRUD(models.WorldAnvilSync)
@@ -20,6 +20,10 @@ class ArticleBase(TimestampModel, SQLModel):
     brief: Optional[str] = Field(default=None)
     category: Optional[str] = Field(default=None)
     template: Optional[str] = Field(default=None)
+    text_tokens: Optional[int] = Field(default=None)
+    summary_tokens: Optional[int] = Field(default=None)
+    brief_tokens: Optional[int] = Field(default=None)
+    content_hash: Optional[str] = Field(default=None)
 
 
 class Article(ArticleBase, table=True):
@@ -47,7 +51,23 @@ class ArticleUpdate(SQLModel):
     year_end: Optional[int] = None
     category: Optional[str] = None
     template: Optional[str] = None
+    content_hash: Optional[str] = None
 
 
 class ArticleRead(ArticleBase):
     pass
+
+
+class ArticleAIText(SQLModel):
+    summary: str
+    brief: str
+    year_start: Optional[int] = None
+    year_end: Optional[int] = None
+
+    @root_validator(skip_on_failure=True)
+    @classmethod
+    def check_date_range(cls, values: dict[str, Any]) -> dict[str, Any]:
+        year_start, year_end = values.get("year_start"), values.get("year_end")
+        if year_start is not None and year_end is not None and year_start > year_end:
+            raise ValueError("year_start must be less than or equal to year_end")
+        return values
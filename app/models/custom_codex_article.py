@@ -16,6 +16,7 @@ class CustomCodexArticleBase(TimestampModel, SQLModel):
     article_id: str = Field(foreign_key="article.id", nullable=False)
     article_type: str = Field(default=None)  # None, Full, Brief, Custom
     custom_text: Optional[str] = Field(default=None)
+    custom_text_tokens: Optional[int] = Field(default=None)
 
 
 class CustomCodexArticle(CustomCodexArticleBase, table=True):
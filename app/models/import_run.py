@@ -0,0 +1,54 @@
+from typing import Any, Optional
+from datetime import datetime
+
+from pydantic import root_validator
+from sqlmodel import Field, SQLModel
+
+from app.core.uuid import generate_uuid_random
+
+from .common import TimestampModel
+from .job import JOB_RUNNING
+
+
+class ImportRunBase(TimestampModel, SQLModel):
+    id: str = Field(
+        primary_key=True,
+        index=True,
+        nullable=False,
+        default=None,
+    )
+    export_hash: str = Field(index=True, nullable=False)
+    status: str = Field(default=JOB_RUNNING, nullable=False)
+    total: int = Field(default=0)
+    resumed: int = Field(default=0)
+    finished_at: Optional[datetime] = Field(default=None)
+
+
+class ImportRun(ImportRunBase, table=True):
+    pass
+
+
+class ImportRunCreate(ImportRunBase):
+    @root_validator(pre=True)
+    @classmethod
+    def set_pre_validation_defaults(cls, values: dict[str, Any]) -> dict[str, Any]:
+        values["id"] = values.get("id", generate_uuid_random())
+        return values
+
+
+class ImportRunUpdate(SQLModel):
+    status: Optional[str] = None
+    total: Optional[int] = None
+    resumed: Optional[int] = None
+    finished_at: Optional[datetime] = None
+
+
+class ImportRunRead(ImportRunBase):
+    pass
+
+
+class ImportCheckpoint(SQLModel, table=True):
+    """An article whose import writes were committed by an import run"""
+
+    run_id: str = Field(foreign_key="importrun.id", primary_key=True, nullable=False)
+    article_id: str = Field(primary_key=True, nullable=False)
@@ -0,0 +1,63 @@
+from typing import Any, Optional
+from datetime import datetime
+
+from pydantic import root_validator
+from sqlmodel import Field, SQLModel
+
+from app.core.uuid import generate_uuid_random
+
+from .common import TimestampModel
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_STATUSES = (JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED)
+
+
+class JobBase(TimestampModel, SQLModel):
+    id: str = Field(
+        primary_key=True,
+        index=True,
+        nullable=False,
+        default=None,
+    )
+    kind: str = Field(index=True, nullable=False)
+    status: str = Field(default=JOB_QUEUED, index=True, nullable=False)
+    progress: int = Field(default=0)
+    total: Optional[int] = Field(default=None)
+    error: Optional[str] = Field(default=None)
+    started_at: Optional[datetime] = Field(default=None)
+    finished_at: Optional[datetime] = Field(default=None)
+
+
+class Job(JobBase, table=True):
+    pass
+
+
+class JobCreate(JobBase):
+    @root_validator(pre=True)
+    @classmethod
+    def set_pre_validation_defaults(cls, values: dict[str, Any]) -> dict[str, Any]:
+        values["id"] = values.get("id", generate_uuid_random())
+        return values
+
+
+class JobUpdate(SQLModel):
+    status: Optional[str] = None
+    progress: Optional[int] = None
+    total: Optional[int] = None
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class JobRead(JobBase):
+    pass
+
+
+class JobStatusCounts(SQLModel):
+    queued: int = 0
+    running: int = 0
+    done: int = 0
+    failed: int = 0
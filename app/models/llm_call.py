@@ -0,0 +1,61 @@
+from typing import Any, Optional
+
+from pydantic import root_validator
+from sqlmodel import Field, SQLModel
+
+from app.core.uuid import generate_uuid_random
+
+from .common import TimestampModel
+
+
+class LLMCallBase(TimestampModel, SQLModel):
+    id: str = Field(
+        primary_key=True,
+        index=True,
+        nullable=False,
+        default=None,
+    )
+    task: str = Field(index=True, nullable=False)
+    article_id: Optional[str] = Field(default=None, index=True)
+    model: str = Field(nullable=False)
+    input_tokens: int = Field(default=0)
+    output_tokens: int = Field(default=0)
+    cache_creation_input_tokens: int = Field(default=0)
+    cache_read_input_tokens: int = Field(default=0)
+    latency: Optional[float] = Field(default=None)
+    retries: int = Field(default=0)
+    cache_hit: bool = Field(default=False)
+    error: Optional[str] = Field(default=None)
+
+
+class LLMCall(LLMCallBase, table=True):
+    pass
+
+
+class LLMCallCreate(LLMCallBase):
+    @root_validator(pre=True)
+    @classmethod
+    def set_pre_validation_defaults(cls, values: dict[str, Any]) -> dict[str, Any]:
+        values["id"] = values.get("id", generate_uuid_random())
+        return values
+
+
+class LLMCallUpdate(LLMCallBase):
+    pass
+
+
+class LLMCallRead(LLMCallBase):
+    pass
+
+
+class LLMCallTaskStats(SQLModel):
+    task: str
+    calls: int = 0
+    errors: int = 0
+    cache_hits: int = 0
+    retries: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    p50_latency: Optional[float] = None
+    p95_latency: Optional[float] = None
@@ -17,6 +17,8 @@ class ReviewBase(TimestampModel, SQLModel):
         default=None,
     )
     article_id: str = Field(foreign_key="article.id", nullable=False)
+    # Content hash of the imported article the new AI text was generated for
+    content_hash: Optional[str] = Field(default=None)
     old_summary: Optional[str] = Field(default=None)
     new_summary: Optional[str] = Field(default=None)
     old_brief: Optional[str] = Field(default=None)
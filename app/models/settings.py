@@ -22,6 +22,12 @@ class Settings(BaseSettings):
     UVICORN_ENTRYPOINT: str = "app.core.app:app"
     UVICORN_WORKERS: int = 1
 
+    # Process Pool
+    PROCESS_POOL_WORKERS: int = 2
+
+    # Jobs
+    JOB_WORKER_POLL_SECONDS: int = 5
+
     # API
     API_V1_PREFIX: str = "/api/v1"
     JWT_ACCESS_SECRET_KEY: str = "jwt_access_secret_key"
@@ -65,6 +71,36 @@ class Settings(BaseSettings):
     # World Anvil
     WORLDANVIL_USERNAME: str = ""
     WORLDANVIL_PASSWORD: str = ""
+    WORLDANVIL_MAX_CONNECTIONS: int = 4
+    WORLDANVIL_TIMEOUT_SECONDS: int = 60
+    IMPORT_WRITE_CHUNK_SIZE: int = 500
+    IMPORT_WRITE_GENERATED_CHUNK_SIZE: int = 10
+    IMPORT_WRITE_FLUSH_SECONDS: int = 5
+    IMPORT_QUEUE_SIZE: int = 100
+    IMPORT_PARSE_BATCH_SIZE: int = 50
+    IMPORT_DIFF_CONCURRENCY: int = 1
+    IMPORT_GENERATE_CONCURRENCY: int = 8
+    IMPORT_METRICS_SECONDS: int = 10
+    WORLDANVIL_SYNC_ENABLED: bool = False
+    WORLDANVIL_SYNC_SECONDS: int = 3600
+    EXPORT_SNAPSHOT_MAX_COUNT: int = 10
+    EXPORT_SNAPSHOT_MAX_AGE_DAYS: int = 90
 
     # AI API Keys
     ANTHROPIC_API_KEY: str = ""
+    ANTHROPIC_API_URL: str = "https://api.anthropic.com"
+
+    # AI Generation
+    # The adaptive limiter starts at the initial concurrency and grows up to the max, which
+    # also caps the articles generated at once
+    AI_INITIAL_CONCURRENCY: int = 8
+    AI_MAX_CONCURRENCY: int = 32
+    AI_MAX_RETRIES: int = 6
+    AI_CIRCUIT_BREAKER_FAILURES: int = 5
+    AI_CIRCUIT_BREAKER_COOLDOWN_SECONDS: int = 60
+    AI_WORK_LIST_PAGE_SIZE: int = 200
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_SIZE_MB: int = 200
+    LLM_CACHE_MAX_AGE_DAYS: int = 90
+    AI_BATCH_POLL_SECONDS: int = 60
+    SUMMARY_CHUNK_TOKENS: int = 6000
@@ -0,0 +1,56 @@
+from typing import Any, Optional
+from datetime import datetime
+
+from pydantic import root_validator
+from sqlmodel import Field, SQLModel
+
+from app.core.uuid import generate_uuid_random
+
+from .common import TimestampModel
+
+
+class WorldAnvilSyncBase(TimestampModel, SQLModel):
+    id: str = Field(
+        primary_key=True,
+        index=True,
+        nullable=False,
+        default=None,
+    )
+    export_url: str = Field(index=True, unique=True, nullable=False)
+    etag: Optional[str] = Field(default=None)
+    last_modified: Optional[str] = Field(default=None)
+    content_hash: Optional[str] = Field(default=None)
+    checked_at: Optional[datetime] = Field(default=None)
+    changed_at: Optional[datetime] = Field(default=None)
+    checks: int = Field(default=0)
+    not_modified: int = Field(default=0)
+    unchanged: int = Field(default=0)
+    imports: int = Field(default=0)
+
+
+class WorldAnvilSync(WorldAnvilSyncBase, table=True):
+    pass
+
+
+class WorldAnvilSyncCreate(WorldAnvilSyncBase):
+    @root_validator(pre=True)
+    @classmethod
+    def set_pre_validation_defaults(cls, values: dict[str, Any]) -> dict[str, Any]:
+        values["id"] = values.get("id", generate_uuid_random())
+        return values
+
+
+class WorldAnvilSyncUpdate(SQLModel):
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    checked_at: Optional[datetime] = None
+    changed_at: Optional[datetime] = None
+    checks: Optional[int] = None
+    not_modified: Optional[int] = None
+    unchanged: Optional[int] = None
+    imports: Optional[int] = None
+
+
+class WorldAnvilSyncRead(WorldAnvilSyncBase):
+    pass
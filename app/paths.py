@@ -20,9 +20,15 @@ CACHE_PATH = DATA_PATH / "cache"
 
 # Cache Folders
 # ARTICLE_INFO_CACHE_PATH = CACHE_PATH / "article_info"
+LLM_CACHE_PATH = CACHE_PATH / "llm"
+WORLDANVIL_CACHE_PATH = CACHE_PATH / "worldanvil"
+WORLDANVIL_SNAPSHOTS_PATH = WORLDANVIL_CACHE_PATH / "snapshots"
 
 # Files
 ENV_FILE = DATA_PATH / ".env"
 DATABASE_FILE = DATA_PATH / "database.sqlite3"
 LOG_FILE = LOGS_PATH / "log.log"
 ERROR_LOG_FILE = LOGS_PATH / "error_log.log"
+TOKEN_ESTIMATOR_FILE = CACHE_PATH / "token_estimator.json"
+WORLDANVIL_COOKIES_FILE = WORLDANVIL_CACHE_PATH / "cookies.txt"
+WORLDANVIL_EXPORT_FILE = WORLDANVIL_CACHE_PATH / "export.html"
@@ -1,30 +1,70 @@
-from app.views.deps import get_db
-from app import crud, models, logger
+import asyncio
+import hashlib
+import json
+import anthropic
+from app import crud, models, logger, settings
+from sqlalchemy.engine import Row
 from sqlmodel import Session
-from typing import Dict, Optional, Any
-from app.services.worldanvil import get_articles_from_worldanvil
-from app.services.summarizer import generate_brief, generate_summary, generate_date_range
-
-
-async def import_articles_from_worldanvil():
-    """Orchestrate the import process"""
-    imported_articles = get_articles_from_worldanvil()
-    db = next(get_db())
-
-    for article in imported_articles:
-        await process_imported_article(db, article)
-
-    logger.success(f"World Anvil import complete")
-
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar, cast
+from app.services import llm_cache
+from app.services.llm_journal import journal_llm_calls
+from app.services.rate_limiter import limiter
+from app.services.single_flight import generations, get_flight_key
+from app.services.summarizer import (
+    generate_ai_text,
+    generate_ai_text_batch,
+    generate_brief,
+    generate_summary,
+    generate_date_range,
+    parse_date_range,
+    prompt_cache_stats,
+    stream_brief,
+    stream_date_range,
+    stream_summary,
+)
+
+T = TypeVar("T")
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+# The fields of the AI text generated in a single "ai_text" call, by the task generating each
+AI_TEXT_FIELDS: dict[str, Callable[[models.ArticleAIText], Any]] = {
+    "summary": lambda ai_text: ai_text.summary,
+    "brief": lambda ai_text: ai_text.brief,
+    "date_range": lambda ai_text: (ai_text.year_start, ai_text.year_end),
+}
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Collapse whitespace, so that formatting-only changes in the export are not changes"""
+    return " ".join((text or "").split())
+
+
+def get_content_hash(
+    text: Optional[str],
+    tags: Optional[list[str]],
+    category: Optional[str],
+    template: Optional[str],
+) -> str:
+    """Hash the normalized content that an import writes to an article"""
+    content = [normalize_text(text), sorted(tags or []), category or None, template or None]
+    return hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+
+def get_imported_content_hash(article: Dict[str, Any]) -> str:
+    """Hash the content of an article parsed from the World Anvil export"""
+    return get_content_hash(
+        text=article.get("content"),
+        tags=article.get("tags"),
+        category=article.get("category"),
+        template=article.get("template"),
+    )
 
-async def process_imported_article(db: Session, article: Dict[str, Any]) -> None:
-    """Process a single article"""
-    existing_article = await get_existing_article(db, article["id"])
 
-    if not existing_article:
-        await create_new_article(db, article)
-    else:
-        await update_existing_article(db, existing_article, article)
+def get_article_content_hash(article: models.Article) -> str:
+    """Hash the content of an article as stored"""
+    return get_content_hash(
+        text=article.text, tags=article.tags, category=article.category, template=article.template
+    )
 
 
 async def get_existing_article(db: Session, article_id: str) -> Optional[models.Article]:
@@ -35,11 +75,15 @@ async def get_existing_article(db: Session, article_id: str) -> Optional[models.
         return None
 
 
-async def create_new_article(db: Session, article: Dict[str, Any]) -> None:
-    """Create a new article in the database"""
-    summary = generate_summary(article["content"])
-    brief = generate_brief(article["content"])
-    year_start, year_end = generate_date_range(article["content"])
+async def create_new_article(db: Session, article: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate the AI text of a new article and get the values to create it with"""
+    ai_text = await generate_article_text(
+        db,
+        article["id"],
+        "ai_text",
+        article["content"],
+        lambda: generate_ai_text(article["content"]),
+    )
 
     new_article = models.ArticleCreate(
         id=article["id"],
@@ -48,59 +92,58 @@ async def create_new_article(db: Session, article: Dict[str, Any]) -> None:
         tags=article["tags"],
         template=article.get("template"),
         category=article.get("category"),
-        summary=summary,
-        brief=brief,
-        year_start=year_start,
-        year_end=year_end,
+        content_hash=get_imported_content_hash(article),
+        summary=ai_text.summary,
+        brief=ai_text.brief,
+        year_start=ai_text.year_start,
+        year_end=ai_text.year_end,
     )
-    await crud.article.create(db=db, obj_in=new_article)
     logger.success(f"Added new article: {article['title']}")
+    return new_article.dict()
 
 
-async def update_existing_article(
-    db: Session, existing_article: models.Article, new_article: Dict[str, Any]
-) -> models.Article:
-    """Update an existing article and create a review if necessary"""
-    if has_article_changed(existing_article, new_article):
-        if needs_review(existing_article, new_article):
-            await create_review(db, existing_article, new_article)
-            logger.info(f"Article sent for review: {existing_article.title}")
-            return existing_article
+def needs_generation(existing_article: models.Article, new_article: Dict[str, Any]) -> bool:
+    """Check if the article has changed in a way that needs new AI text and a review"""
+    return has_article_changed(existing_article, new_article) and needs_review(
+        existing_article, new_article
+    )
 
+
+def get_article_update(
+    existing_article: models.Article, new_article: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Get the values to update an existing article with, if the import changes it"""
+    content_hash = get_imported_content_hash(new_article)
+    if has_article_changed(existing_article, new_article):
         article_update = models.ArticleUpdate(
             text=new_article.get("content"),
             tags=new_article.get("tags", []),
-            year_start=new_article.get("year_start"),
-            year_end=new_article.get("year_end"),
             template=new_article.get("template"),
             category=new_article.get("category"),
+            content_hash=content_hash,
         )
-        updated_article = await crud.article.update(
-            db=db, db_obj=existing_article, obj_in=article_update
-        )
-        logger.success(f"Article sent for review: {existing_article.title}")
-        return updated_article
-    else:
-        logger.info(f"No changes for: {existing_article.title}")
-        return existing_article
+        logger.success(f"Updated existing article: {existing_article.title}")
+        return {
+            "id": existing_article.id,
+            **article_update.dict(exclude_unset=True, exclude_none=True),
+        }
+
+    logger.info(f"No changes for: {existing_article.title}")
+    if existing_article.content_hash != content_hash:
+        # Articles imported before content hashes were stored get theirs on the first import
+        return {"id": existing_article.id, "content_hash": content_hash}
+    return None
 
 
 def has_article_changed(existing_article: models.Article, new_article: Dict[str, Any]) -> bool:
-    """Check if the article has changed"""
-    return (
-        existing_article.text != new_article.get("content")
-        or existing_article.tags != new_article.get("tags", [])
-        or existing_article.year_start != new_article.get("year_start")
-        or existing_article.year_end != new_article.get("year_end")
-        or existing_article.template != new_article.get("template")
-        or existing_article.category != new_article.get("category")
-    )
+    """Check if the normalized content of the article has changed"""
+    return get_article_content_hash(existing_article) != get_imported_content_hash(new_article)
 
 
 def needs_review(existing_article: models.Article, new_article: Dict[str, Any]) -> bool:
     """Check if the article needs a review"""
     return (
-        existing_article.text != str(new_article["content"])
+        normalize_text(existing_article.text) != normalize_text(new_article["content"])
         or not existing_article.summary
         or not existing_article.brief
     )
@@ -108,25 +151,76 @@ def needs_review(existing_article: models.Article, new_article: Dict[str, Any])
 
 async def create_review(
     db: Session, existing_article: models.Article, new_article: Dict[str, Any]
-) -> None:
-    """Create a review for the article"""
-    new_summary = generate_summary(new_article["content"])
-    new_brief = generate_brief(new_article["content"])
-    new_year_start, new_year_end = generate_date_range(new_article["content"])
+) -> Dict[str, Any]:
+    """Generate new AI text for a changed article and get the values to create its review with"""
+    ai_text = await generate_article_text(
+        db,
+        new_article["id"],
+        "ai_text",
+        new_article["content"],
+        lambda: generate_ai_text(new_article["content"]),
+    )
 
     review = models.ReviewCreate(
         article_id=new_article["id"],
+        content_hash=get_imported_content_hash(new_article),
         old_summary=existing_article.summary,
-        new_summary=new_summary,
+        new_summary=ai_text.summary,
         old_brief=existing_article.brief,
-        new_brief=new_brief,
+        new_brief=ai_text.brief,
         old_year_start=existing_article.year_start,
-        new_year_start=new_year_start,
+        new_year_start=ai_text.year_start,
         old_year_end=existing_article.year_end,
-        new_year_end=new_year_end,
+        new_year_end=ai_text.year_end,
     )
-    await crud.review.create(db=db, obj_in=review)
-    logger.info(f"Added review for: {new_article['title']}")
+    logger.info(f"Article sent for review: {new_article['title']}")
+    return review.dict()
+
+
+async def generate_article_text(
+    db: Session,
+    article_id: str,
+    task: str,
+    text: Optional[str],
+    generate: Callable[[], Awaitable[T]],
+) -> T:
+    """
+    Generate AI text for an article, journaling its LLM calls.
+
+    Concurrent requests for the same article, task and text share a single generation instead
+    of each making their own LLM calls. A summary, brief or date range requested while the AI
+    text of the same article and text is being generated is taken from that generation.
+    """
+    if (joined := join_ai_text_generation(article_id, task, text)) is not None:
+        return cast(T, await joined)
+
+    async def generate_journaled() -> T:
+        with journal_llm_calls(db=db, article_id=article_id):
+            return await generate()
+
+    return await generations.run(get_flight_key(article_id, task, text), generate_journaled)
+
+
+def join_ai_text_generation(
+    article_id: str, task: str, text: Optional[str]
+) -> Optional[Awaitable[Any]]:
+    """
+    Join the in-flight "ai_text" generation of the article and text for one of its fields.
+
+    Bulk generation and imports generate the summary, brief and date range of an article in a
+    single call, so a regeneration of one of those fields takes it from that call instead of
+    making its own. Returns None when there is no such generation in flight.
+    """
+    if task not in AI_TEXT_FIELDS:
+        return None
+    call = generations.join(get_flight_key(article_id, "ai_text", text))
+    if call is None:
+        return None
+
+    async def get_field() -> Any:
+        return AI_TEXT_FIELDS[task](await call)
+
+    return get_field()
 
 
 async def update_article(
@@ -149,7 +243,14 @@ async def generate_new_article_summary(
     if not existing_article.text:
         return existing_article
 
-    new_summary = generate_summary(text=existing_article.text)
+    # Regenerating from the article page is explicit, so skip the LLM response cache
+    new_summary = await generate_article_text(
+        db,
+        existing_article.id,
+        "summary",
+        existing_article.text,
+        lambda: generate_summary(text=existing_article.text, use_cache=False),
+    )
 
     article_update = models.ArticleUpdate(
         summary=new_summary,
@@ -172,7 +273,14 @@ async def generate_new_article_brief(
     if not existing_article.text:
         return existing_article
 
-    new_brief = generate_brief(text=existing_article.text)
+    # Regenerating from the article page is explicit, so skip the LLM response cache
+    new_brief = await generate_article_text(
+        db,
+        existing_article.id,
+        "brief",
+        existing_article.text,
+        lambda: generate_brief(text=existing_article.text, use_cache=False),
+    )
 
     article_update = models.ArticleUpdate(
         brief=new_brief,
@@ -196,7 +304,14 @@ async def generate_new_article_date_range(
     if not existing_article.text:
         return existing_article
 
-    new_year_start, new_year_end = generate_date_range(text=existing_article.text)
+    # Regenerating from the article page is explicit, so skip the LLM response cache
+    new_year_start, new_year_end = await generate_article_text(
+        db,
+        existing_article.id,
+        "date_range",
+        existing_article.text,
+        lambda: generate_date_range(text=existing_article.text, use_cache=False),
+    )
 
     article_update = models.ArticleUpdate(year_start=new_year_start, year_end=new_year_end)
     updated_article = await crud.article.update(
@@ -207,27 +322,151 @@ async def generate_new_article_date_range(
     return updated_article
 
 
+async def stream_new_article_ai_text(
+    db: Session,
+    article_id: str,
+    task: str,
+) -> AsyncIterator[str]:
+    """
+    Stream the summary, brief or date range of the article as it is generated and update the
+    article once the response is complete
+    """
+
+    existing_article = await crud.article.get(db=db, id=article_id)
+
+    if not existing_article.text:
+        return
+
+    stream_funcs = {
+        "summary": stream_summary,
+        "brief": stream_brief,
+        "date_range": stream_date_range,
+    }
+    chunks = []
+    joined = join_ai_text_generation(existing_article.id, task, existing_article.text)
+    if joined is not None:
+        # Yield the field of the AI text in flight as a single chunk, like a cached response
+        field = await joined
+        chunks.append(repr(field) if task == "date_range" else field)
+        yield chunks[0]
+    else:
+        # Regenerating from the article page is explicit, so skip the LLM response cache
+        with journal_llm_calls(db=db, article_id=existing_article.id):
+            async for chunk in stream_funcs[task](text=existing_article.text, use_cache=False):
+                chunks.append(chunk)
+                yield chunk
+
+    result = "".join(chunks)
+    if task == "date_range":
+        new_year_start, new_year_end = parse_date_range(result)
+        article_update = models.ArticleUpdate(year_start=new_year_start, year_end=new_year_end)
+    else:
+        article_update = models.ArticleUpdate(**{task: result})
+
+    updated_article = await crud.article.update(
+        db=db, id=existing_article.id, obj_in=article_update
+    )
+    logger.success(f"Updated article {task.replace('_', ' ')}: {updated_article.title}")
+
+
 async def generate_all_ai_text(
     db: Session,
+    concurrency: int = settings.AI_MAX_CONCURRENCY,
+    on_progress: Optional[ProgressCallback] = None,
 ) -> None:
-    """Generate a summary for the article and update the article"""
+    """
+    Generate the missing AI text of all articles with up to `concurrency` articles at once.
+
+    Articles are fetched a page at a time from the work-list of articles missing AI text, and
+    each page is written back in one transaction. The number of concurrent LLM calls is
+    governed by the adaptive limiter. Progress is reported to `on_progress` as (done, total)
+    articles.
+    """
+
+    total = await crud.article.count(db, crud.article.get_missing_ai_text_filter())
+    semaphore = asyncio.Semaphore(concurrency)
+    done = 0
+
+    async for articles in iter_articles_missing_ai_text(db=db):
+        tasks = [
+            generate_missing_article_ai_text(db=db, article=article, semaphore=semaphore)
+            for article in articles
+        ]
+        updates = []
+        for task in asyncio.as_completed(tasks):
+            if article_update := await task:
+                updates.append(article_update)
+            done += 1
+            if on_progress:
+                await on_progress(done, total)
+        await crud.article.update_many(db=db, rows=updates)
+        logger.success(f"Updated AI text for {len(updates)} of {len(articles)} articles")
+
+    logger.info(f"LLM cache stats: {llm_cache.cache.stats}")
+    logger.info(f"Prompt cache stats: {prompt_cache_stats.stats}")
+    logger.info(f"Rate limiter stats: {limiter.stats}")
+
+
+async def generate_all_ai_text_batch(db: Session) -> None:
+    """Generate the missing AI text of all articles in a single message batch"""
+
+    articles = {
+        article.id: article
+        async for page in iter_articles_missing_ai_text(db=db)
+        for article in page
+    }
+    with journal_llm_calls(db=db):
+        ai_texts = await generate_ai_text_batch(
+            {article_id: article.text for article_id, article in articles.items()}
+        )
+    await crud.article.update_many(
+        db=db,
+        rows=[
+            get_missing_ai_text_update(articles[article_id], ai_text)
+            for article_id, ai_text in ai_texts.items()
+        ],
+    )
 
-    articles = await crud.article.get_all(db=db)
+    logger.success(f"Updated AI text for {len(ai_texts)} of {len(articles)} articles from batch")
+    logger.info(f"Prompt cache stats: {prompt_cache_stats.stats}")
+
+
+async def iter_articles_missing_ai_text(
+    db: Session, page_size: int = settings.AI_WORK_LIST_PAGE_SIZE
+) -> AsyncIterator[list[Row]]:
+    """Yield pages of the articles that are missing any of their AI text"""
+    after_id = None
+    while articles := await crud.article.get_missing_ai_text_page(
+        db=db, after_id=after_id, limit=page_size
+    ):
+        yield articles
+        after_id = articles[-1].id
 
-    for article in articles:
-        if article.brief and article.summary and article.year_start and article.year_end:
-            logger.info(
-                f"Article '{article.title}' already has AI text. Continuing to next article"
-            )
-            continue
 
-        if not article.brief:
-            await generate_new_article_brief(db=db, article_id=article.id)
+async def generate_missing_article_ai_text(
+    db: Session, article: Row, semaphore: asyncio.Semaphore
+) -> Optional[Dict[str, Any]]:
+    """Generate the missing AI text of a single article in one LLM call"""
+    try:
+        async with semaphore:
+            ai_text = await generate_article_text(
+                db, article.id, "ai_text", article.text, lambda: generate_ai_text(text=article.text)
+            )
+    except (anthropic.APIError, ValueError) as e:
+        logger.error(f"Failed to generate AI text for '{article.title}': {str(e)}")
+        return None
 
-        if not article.summary:
-            await generate_new_article_summary(db=db, article_id=article.id)
+    return get_missing_ai_text_update(article, ai_text)
 
-        if not article.year_start or not article.year_end:
-            await generate_new_article_date_range(db=db, article_id=article.id)
 
-        logger.success(f"Updated all AI text for '{article.title}' article.")
+def get_missing_ai_text_update(article: Row, ai_text: models.ArticleAIText) -> Dict[str, Any]:
+    """Get the update writing the generated AI text to the fields the article is missing"""
+    article_update: Dict[str, Any] = {"id": article.id}
+    if article.missing_brief:
+        article_update["brief"] = ai_text.brief
+    if article.missing_summary:
+        article_update["summary"] = ai_text.summary
+    if article.missing_years:
+        article_update["year_start"] = ai_text.year_start
+        article_update["year_end"] = ai_text.year_end
+    return article_update
@@ -0,0 +1,96 @@
+from typing import Callable, Optional
+import re
+
+from app.services.tokenizer import count_tokens_many
+
+SENTENCE_END_REGEX = re.compile(r"(?<=[.!?])\s+")
+HEADING_MAX_LENGTH = 80
+
+
+def is_heading(line: str) -> bool:
+    """
+    Guess whether a line of extracted article text is a heading.
+
+    Headings lose their markup when the article HTML is flattened to text, so markdown-style
+    headings and short lines without closing punctuation are both treated as headings.
+    """
+    line = line.strip()
+    if line.startswith("#"):
+        return True
+    return 0 < len(line) <= HEADING_MAX_LENGTH and not line.endswith((".", "!", "?", ":", ","))
+
+
+def split_sections(text: str) -> list[str]:
+    """Split text into sections, starting a new section at every heading"""
+    sections: list[list[str]] = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if not sections or (is_heading(line) and not is_heading(sections[-1][-1])):
+            sections.append([])
+        sections[-1].append(line)
+    return ["\n".join(section) for section in sections]
+
+
+def split_sentences(text: str) -> list[str]:
+    return SENTENCE_END_REGEX.split(text)
+
+
+def pack(units: list[tuple[str, int]], max_tokens: int) -> list[tuple[str, int]]:
+    """Join consecutive (text, tokens) units into chunks of at most `max_tokens` tokens"""
+    chunks: list[tuple[list[str], int]] = []
+    for text, tokens in units:
+        if chunks and chunks[-1][1] + tokens <= max_tokens:
+            chunks[-1] = (chunks[-1][0] + [text], chunks[-1][1] + tokens)
+        else:
+            chunks.append(([text], tokens))
+    return [("\n".join(texts), tokens) for texts, tokens in chunks]
+
+
+def split_units(
+    texts: list[str], max_tokens: int, split_funcs: list[Callable[[str], list[str]]]
+) -> list[tuple[str, int]]:
+    """Count the tokens of the texts, splitting the ones over `max_tokens` one level further"""
+    units = []
+    for text, tokens in zip(texts, count_tokens_many(texts)):
+        if tokens > max_tokens and split_funcs:
+            parts = split_funcs[0](text)
+            if len(parts) > 1:
+                units.extend(pack(split_units(parts, max_tokens, split_funcs[1:]), max_tokens))
+                continue
+        units.append((text, tokens))
+    return units
+
+
+def split_text(text: Optional[str], max_tokens: int, min_tokens: Optional[int] = None) -> list[str]:
+    """
+    Split text into chunks of at most `max_tokens` tokens.
+
+    Every section of at least `min_tokens` tokens (a quarter of `max_tokens` by default) ends a
+    chunk, and shorter sections are packed into the chunk of the section after them. Sections
+    that are too long are split between paragraphs, and paragraphs that are too long between
+    sentences, into chunks of their own. A single sentence over `max_tokens` becomes a chunk of
+    its own. Chunk boundaries only depend on the sections around them rather than on all the
+    text before them, so an edit changes the chunk that contains it but not the later ones.
+    """
+    if not text:
+        return []
+
+    min_tokens = max_tokens // 4 if min_tokens is None else min_tokens
+    sections = split_sections(text)
+    chunks: list[tuple[str, int]] = []
+    pending: list[tuple[str, int]] = []
+    for section, tokens in zip(sections, count_tokens_many(sections)):
+        if tokens > max_tokens:
+            chunks.extend(pack(pending, max_tokens))
+            pending = []
+            units = split_units([section], max_tokens, [str.splitlines, split_sentences])
+            chunks.extend(pack(units, max_tokens))
+            continue
+        pending.append((section, tokens))
+        if tokens >= min_tokens:
+            chunks.extend(pack(pending, max_tokens))
+            pending = []
+    chunks.extend(pack(pending, max_tokens))
+    return [chunk for chunk, _ in chunks]
@@ -1,7 +1,9 @@
 from typing import List, Optional
 from sqlmodel import Session
 from app import models, crud
-from app.services.tokenizer import count_tokens
+from app.services.tokenizer import TokenEstimate, estimate_tokens
+
+ARTICLE_TYPE_TEXT_FIELDS = {"Full": "text", "Summary": "summary", "Brief": "brief"}
 
 
 # async def get_all_articles(db: Session) -> List[models.Article]:
@@ -35,7 +37,7 @@ async def update_custom_codex_article(
     """
     Update or create a custom codex article.
     """
-    existing_article = await crud.custom_codex_article.get(
+    existing_article = await crud.custom_codex_article.get_or_none(
         db=db, codex_id=codex_id, article_id=article_id
     )
     if existing_article:
@@ -46,7 +48,7 @@ async def update_custom_codex_article(
             article_id=article_id,
         )
         return await crud.custom_codex_article.update(
-            db, db_obj=existing_article, obj_in=update_data
+            db, id=existing_article.id, obj_in=update_data
         )
     else:
         create_data = models.CustomCodexArticleCreate(
@@ -60,23 +62,43 @@ async def update_custom_codex_article(
 
 async def calculate_context_length(db: Session, codex_id: str) -> int:
     """
-    Calculate the total context length for a custom codex.
+    Calculate the total context length for a custom codex from the stored token counts.
     """
-    custom_codex_articles = await crud.custom_codex_article.get_multi_by_codex_id(
-        db, codex_id=codex_id
+    return await crud.custom_codex_article.sum_context_tokens(db, codex_id=codex_id)
+
+
+async def estimate_context_length(
+    db: Session, codex_id: str, article_types: dict[str, str]
+) -> TokenEstimate:
+    """
+    Estimate the context length of unsaved article type selections for a custom codex.
+
+    Stored token counts are used as-is. Texts without a stored count are estimated from their
+    character and word counts, and only those contribute to the reported error bound.
+    """
+    article_counts = await crud.article.get_stored_token_counts(db)
+    custom_counts = await crud.custom_codex_article.get_stored_token_counts(
+        db, key="article_id", codex_id=codex_id
     )
+
     total_tokens = 0
-    for cca in custom_codex_articles:
-        article = await crud.article.get(db=db, id=cca.article_id)
-        if cca.article_type == "Full":
-            total_tokens += count_tokens(article.text)
-        elif cca.article_type == "Summary":
-            total_tokens += count_tokens(article.summary)
-        elif cca.article_type == "Brief":
-            total_tokens += count_tokens(article.brief)
-        elif cca.article_type == "Custom":
-            total_tokens += count_tokens(cca.custom_text)
-    return total_tokens
+    total_error = 0
+    for article_id, article_type in article_types.items():
+        if article_type == "Custom":
+            count, text = custom_counts.get(article_id, {}).get("custom_text", (0, None))
+        elif article_type in ARTICLE_TYPE_TEXT_FIELDS:
+            field = ARTICLE_TYPE_TEXT_FIELDS[article_type]
+            count, text = article_counts.get(article_id, {}).get(field, (0, None))
+        else:
+            continue
+
+        if count is None:
+            estimate = estimate_tokens(text)
+            total_tokens += estimate.tokens
+            total_error += estimate.error
+        else:
+            total_tokens += count
+    return TokenEstimate(tokens=total_tokens, error=total_error)
 
 
 async def update_article_types_by_criteria(
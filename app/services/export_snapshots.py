@@ -0,0 +1,127 @@
+from typing import NamedTuple, Optional
+
+import gzip
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app import logger, settings
+from app.core.process_pool import run_in_process
+from app.paths import WORLDANVIL_SNAPSHOTS_PATH
+
+SNAPSHOT_SUFFIX = ".html.gz"
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class ExportSnapshot(NamedTuple):
+    """A compressed export, named after the sha256 of its uncompressed content"""
+
+    content_hash: str
+    path: Path
+    size: int
+    created_at: datetime
+
+
+def compress_export(export_path: Path, snapshot_path: Path) -> None:
+    """Gzip an export into `snapshot_path`, through a temporary file"""
+    partial_path = snapshot_path.with_name(f"{snapshot_path.name}.part")
+    try:
+        with export_path.open("rb") as source, gzip.open(partial_path, "wb") as target:
+            shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+    except BaseException:
+        partial_path.unlink(missing_ok=True)
+        raise
+    os.replace(partial_path, snapshot_path)
+
+
+class ExportSnapshotStore:
+    """
+    Local store of compressed, content-hashed World Anvil exports.
+
+    Saving an export that is already stored only marks it as the newest snapshot. Snapshots
+    beyond the newest `max_count` or older than `max_age_days` are removed, except for the
+    newest one, so an import can always be replayed without downloading the export.
+    """
+
+    def __init__(
+        self,
+        path: Path = WORLDANVIL_SNAPSHOTS_PATH,
+        max_count: int = settings.EXPORT_SNAPSHOT_MAX_COUNT,
+        max_age_days: int = settings.EXPORT_SNAPSHOT_MAX_AGE_DAYS,
+    ) -> None:
+        self.path = path
+        self.max_count = max(1, max_count)
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+
+    def get_file(self, content_hash: str) -> Path:
+        return self.path / f"{content_hash}{SNAPSHOT_SUFFIX}"
+
+    def get_all(self) -> list[ExportSnapshot]:
+        """Get the stored snapshots, newest first"""
+        snapshots = []
+        for file in self.path.glob(f"*{SNAPSHOT_SUFFIX}"):
+            stat = file.stat()
+            snapshots.append(
+                ExportSnapshot(
+                    content_hash=file.name.removesuffix(SNAPSHOT_SUFFIX),
+                    path=file,
+                    size=stat.st_size,
+                    created_at=datetime.fromtimestamp(stat.st_mtime),
+                )
+            )
+        return sorted(snapshots, key=lambda snapshot: snapshot.created_at, reverse=True)
+
+    def get(self, content_hash: Optional[str] = None) -> Optional[ExportSnapshot]:
+        """
+        Get the snapshot whose content hash starts with `content_hash`, or the newest snapshot.
+
+        Raises:
+            ValueError: If `content_hash` is the prefix of more than one snapshot.
+        """
+        snapshots = self.get_all()
+        if content_hash is not None:
+            snapshots = [
+                snapshot for snapshot in snapshots if snapshot.content_hash.startswith(content_hash)
+            ]
+            if len(snapshots) > 1:
+                raise ValueError(f"Export snapshot '{content_hash}' is ambiguous")
+        return snapshots[0] if snapshots else None
+
+    async def save(self, export_path: Path, content_hash: str) -> ExportSnapshot:
+        """Store a downloaded export as the newest snapshot, then apply the retention limits"""
+        file = self.get_file(content_hash)
+        if file.exists():
+            os.utime(file)
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+            await run_in_process(compress_export, export_path, file)
+            logger.info(
+                f"Saved export snapshot {content_hash[:12]} "
+                f"({file.stat().st_size / 1024 / 1024:.1f} MB compressed)"
+            )
+        self.prune()
+
+        snapshot = self.get(content_hash)
+        assert snapshot is not None
+        return snapshot
+
+    def prune(self) -> int:
+        """Remove the snapshots beyond the retention limits, always keeping the newest one"""
+        now = time.time()
+        removed = 0
+        for i, snapshot in enumerate(self.get_all()):
+            if i == 0:
+                continue
+            age = now - snapshot.created_at.timestamp()
+            if i >= self.max_count or age > self.max_age_seconds:
+                snapshot.path.unlink(missing_ok=True)
+                removed += 1
+
+        if removed:
+            logger.debug(f"Removed {removed} export snapshots")
+        return removed
+
+
+snapshots = ExportSnapshotStore()
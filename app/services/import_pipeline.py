@@ -0,0 +1,425 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Generic, Optional, TypeVar, Union
+
+import asyncio
+import hashlib
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import aclosing
+from datetime import datetime
+from pathlib import Path
+
+from sqlmodel import Session
+
+from app import crud, logger, models, settings
+from app.core.process_pool import is_process_pool_started, run_in_process
+from app.services.articles import (
+    ProgressCallback,
+    create_new_article,
+    create_review,
+    get_article_update,
+    get_existing_article,
+    get_imported_content_hash,
+    needs_generation,
+)
+from app.services.export_snapshots import snapshots
+from app.services.import_writer import ImportWriter
+from app.services.worldanvil import parse_articles, put_article_html_batches
+from app.services.worldanvil_client import download_export_from_worldanvil
+from app.views.deps import get_db
+
+T = TypeVar("T")
+
+PARSED_BATCHES_QUEUE_SIZE = 2
+PARSED_BATCH_TIMEOUT = 0.5
+
+
+def get_export_hash(export_html: str) -> str:
+    return hashlib.sha256(export_html.encode()).hexdigest()
+
+
+def get_export_file_hash(path: Path) -> str:
+    content_hash = hashlib.sha256()
+    with path.open("rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            content_hash.update(block)
+    return content_hash.hexdigest()
+
+
+async def iter_parsed_batches(
+    export_html: Optional[str] = None,
+    export_path: Optional[Path] = None,
+    workers: int = settings.PROCESS_POOL_WORKERS,
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """
+    Stream the articles of an export in batches, in the export's order.
+
+    A dedicated process splits the export in a single pass and hands back the HTML of each
+    batch through a bounded queue, and up to `workers` batches are parsed at once across the
+    process pool. Without a process pool, the export is split in a thread and parsed in the
+    calling process instead.
+    """
+    splitter: Union[multiprocessing.process.BaseProcess, threading.Thread]
+    if is_process_pool_started():
+        context = multiprocessing.get_context("spawn")
+        batches: Any = context.Queue(maxsize=PARSED_BATCHES_QUEUE_SIZE)
+        splitter = context.Process(
+            target=put_article_html_batches, args=(batches, export_html, export_path), daemon=True
+        )
+    else:
+        batches = queue.Queue(maxsize=PARSED_BATCHES_QUEUE_SIZE)
+        splitter = threading.Thread(
+            target=put_article_html_batches, args=(batches, export_html, export_path), daemon=True
+        )
+    splitter.start()
+
+    parsing: deque[asyncio.Task[list[dict[str, Any]]]] = deque()
+    stopped = False
+    try:
+        while True:
+            try:
+                item = await asyncio.to_thread(batches.get, timeout=PARSED_BATCH_TIMEOUT)
+            except queue.Empty:
+                # Batches put right before the splitter exited may still be in flight
+                if stopped:
+                    raise RuntimeError("The export splitter stopped unexpectedly") from None
+                stopped = not splitter.is_alive()
+                continue
+            if isinstance(item, BaseException):
+                raise item
+            if item is None:
+                break
+            parsing.append(asyncio.create_task(run_in_process(parse_articles, item)))
+            if len(parsing) >= max(1, workers):
+                yield await parsing.popleft()
+        while parsing:
+            yield await parsing.popleft()
+    finally:
+        for task in parsing:
+            task.cancel()
+        await asyncio.gather(*parsing, return_exceptions=True)
+        if isinstance(splitter, threading.Thread):
+            # Unblock a splitter still putting batches, e.g. when the import failed
+            while splitter.is_alive():
+                try:
+                    await asyncio.to_thread(batches.get, timeout=PARSED_BATCH_TIMEOUT)
+                except queue.Empty:
+                    pass
+        else:
+            if splitter.is_alive():
+                splitter.kill()
+            await asyncio.to_thread(splitter.join)
+
+
+class Stage(Generic[T]):
+    """
+    A pipeline stage: `concurrency` workers handling the items of a bounded queue.
+
+    A full queue blocks the stage feeding it, so a slow stage applies backpressure instead of
+    buffering the whole import. Items that fail are logged and counted, and do not stop the
+    stage.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handle: Callable[[T], Awaitable[None]],
+        concurrency: int = 1,
+        maxsize: int = settings.IMPORT_QUEUE_SIZE,
+    ) -> None:
+        self.name = name
+        self.handle = handle
+        self.concurrency = concurrency
+        self.queue: asyncio.Queue[T] = asyncio.Queue(maxsize=maxsize)
+        self.max_depth = 0
+        self.busy = 0
+        self.processed = 0
+        self.failed = 0
+
+    async def put(self, item: T) -> None:
+        await self.queue.put(item)
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    async def work(self) -> None:
+        while True:
+            item = await self.queue.get()
+            self.busy += 1
+            try:
+                await self.handle(item)
+                self.processed += 1
+            except Exception:  # pylint: disable=broad-except
+                self.failed += 1
+                logger.exception(f"Import stage '{self.name}' failed")
+            finally:
+                self.busy -= 1
+                self.queue.task_done()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "depth": self.queue.qsize(),
+            "max_depth": self.max_depth,
+            "busy": self.busy,
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+
+class Pipeline:
+    """Stages that run concurrently, each feeding the next through its bounded queue"""
+
+    def __init__(
+        self, stages: list[Stage[Any]], metrics_interval: float = settings.IMPORT_METRICS_SECONDS
+    ) -> None:
+        self.stages = stages
+        self.metrics_interval = metrics_interval
+
+    async def run(self, source: Callable[[], Awaitable[None]]) -> None:
+        """Run `source`, which feeds the first stage, and wait for every stage to drain"""
+        tasks = [
+            asyncio.create_task(stage.work())
+            for stage in self.stages
+            for _ in range(stage.concurrency)
+        ]
+        tasks.append(asyncio.create_task(self.report_metrics()))
+        try:
+            await source()
+            # A stage only feeds the next one while handling an item, so joining the queues in
+            # order waits for the whole pipeline to drain
+            for stage in self.stages:
+                await stage.queue.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info(f"Import pipeline stats: {self.stats}")
+
+    async def report_metrics(self) -> None:
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            logger.info(f"Import pipeline queue depths: {self.queue_depths}")
+
+    @property
+    def queue_depths(self) -> dict[str, int]:
+        return {stage.name: stage.queue.qsize() for stage in self.stages}
+
+    @property
+    def failed(self) -> int:
+        return sum(stage.failed for stage in self.stages)
+
+    @property
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {stage.name: stage.stats for stage in self.stages}
+
+
+class ArticleImport:
+    """
+    Imports the World Anvil export through a pipeline of stages:
+    parse -> diff against the database -> LLM generation -> batched writer.
+
+    The export is split in a single pass while its batches of articles are parsed across
+    every process pool worker, so parsing scales with the cores and slow LLM calls overlap
+    with parsing and writing.
+
+    Each import is recorded as a run of the export's hash. The writer commits a checkpoint
+    with the writes of every article, so an interrupted run of the same export resumes after
+    the last committed article instead of generating its AI text again.
+    """
+
+    def __init__(self, db: Session, on_progress: Optional[ProgressCallback] = None) -> None:
+        self.db = db
+        self.on_progress = on_progress
+        self.writer = ImportWriter(db=db)
+        self.content_hashes: dict[str, Optional[str]] = {}
+        self.pending_reviews: set[tuple[str, str]] = set()
+        self.run_id: Optional[str] = None
+        self.checkpoints: set[str] = set()
+        self.total = 0
+        self.done = 0
+        self.unchanged = 0
+        self.resumed = 0
+
+        self.diff_stage: Stage[dict[str, Any]] = Stage(
+            "diff", self.diff, concurrency=settings.IMPORT_DIFF_CONCURRENCY
+        )
+        self.generate_stage: Stage[tuple[dict[str, Any], Optional[models.Article]]] = Stage(
+            "generate", self.generate, concurrency=settings.IMPORT_GENERATE_CONCURRENCY
+        )
+        # A single writer batches the writes of all other stages
+        self.write_stage: Stage[tuple[str, dict[str, Any]]] = Stage("write", self.write)
+        self.pipeline = Pipeline([self.diff_stage, self.generate_stage, self.write_stage])
+
+    async def run(
+        self,
+        export_html: Optional[str] = None,
+        export_path: Optional[Path] = None,
+        export_hash: Optional[str] = None,
+    ) -> None:
+        """
+        Import the export from `export_html` or the file at `export_path`, downloading it when
+        neither is given. Export files are split and parsed outside the event loop's process,
+        which never loads the raw export. `total` grows as the parsed articles stream in.
+
+        Raises:
+            RuntimeError: If any articles failed to import. All other articles are written.
+        """
+        started = time.perf_counter()
+        if export_html is not None:
+            export_hash = get_export_hash(export_html)
+        elif export_path is None:
+            download = await download_export_from_worldanvil()
+            export_path, export_hash = download.path, download.content_hash
+        if export_path is not None and export_hash is None:
+            export_hash = await run_in_process(get_export_file_hash, export_path)
+        assert export_hash is not None
+        import_run = await self.start_run(export_hash)
+        self.content_hashes = await crud.article.get_content_hashes(db=self.db)
+        self.pending_reviews = await crud.review.get_pending_content_hashes(db=self.db)
+
+        async def source() -> None:
+            async with aclosing(iter_parsed_batches(export_html, export_path)) as batches:
+                async for batch in batches:
+                    self.total += len(batch)
+                    for article in batch:
+                        await self.diff_stage.put(article)
+
+        try:
+            async with self.writer:
+                await self.pipeline.run(source)
+        except BaseException:
+            await self.finish_run(import_run, models.JOB_FAILED)
+            raise
+        await self.finish_run(
+            import_run, models.JOB_FAILED if self.pipeline.failed else models.JOB_DONE
+        )
+
+        logger.success(
+            f"World Anvil import complete in {time.perf_counter() - started:.1f}s: "
+            f"{self.unchanged} of {self.total} articles unchanged, {self.resumed} resumed"
+        )
+        if self.pipeline.failed:
+            raise RuntimeError(f"{self.pipeline.failed} import steps failed, see the logs")
+
+    async def start_run(self, export_hash: str) -> models.ImportRun:
+        """Resume the unfinished run of the export, or start a new one"""
+        import_run = await crud.import_run.get_resumable(db=self.db, export_hash=export_hash)
+        if import_run is None:
+            import_run = await crud.import_run.create(
+                db=self.db, obj_in=models.ImportRunCreate(export_hash=export_hash)
+            )
+        else:
+            self.checkpoints = await crud.import_run.get_checkpoints(
+                db=self.db, run_id=import_run.id
+            )
+            logger.info(
+                f"Resuming import run {import_run.id} after {len(self.checkpoints)} articles"
+            )
+            import_run = await crud.import_run.update(
+                db=self.db,
+                id=import_run.id,
+                obj_in=models.ImportRunUpdate(status=models.JOB_RUNNING),
+            )
+        self.run_id = import_run.id
+        return import_run
+
+    async def finish_run(self, import_run: models.ImportRun, status: str) -> None:
+        """Record the outcome of the run, dropping its checkpoints once it is done"""
+        self.db.rollback()
+        await crud.import_run.update(
+            db=self.db,
+            id=import_run.id,
+            obj_in=models.ImportRunUpdate(
+                status=status,
+                total=self.total,
+                resumed=self.resumed,
+                finished_at=datetime.utcnow(),
+            ),
+        )
+        if status == models.JOB_DONE:
+            await crud.import_run.remove_checkpoints(db=self.db, run_id=import_run.id)
+
+    async def diff(self, article: dict[str, Any]) -> None:
+        if article["id"] in self.checkpoints:
+            self.resumed += 1
+            await self.report_done()
+            return
+
+        content_hash = get_imported_content_hash(article)
+        # A changed article keeps its old content until its review is resolved, so a pending
+        # review of the same content means it was already generated
+        if (
+            self.content_hashes.get(article["id"]) == content_hash
+            or (article["id"], content_hash) in self.pending_reviews
+        ):
+            self.unchanged += 1
+            await self.report_done()
+            return
+
+        existing_article = await get_existing_article(self.db, article["id"])
+        if existing_article is None or needs_generation(existing_article, article):
+            await self.generate_stage.put((article, existing_article))
+        elif article_update := get_article_update(existing_article, article):
+            await self.write_stage.put(("article", article_update))
+        else:
+            await self.report_done()
+
+    async def generate(self, item: tuple[dict[str, Any], Optional[models.Article]]) -> None:
+        article, existing_article = item
+        if existing_article is None:
+            new_article = await create_new_article(self.db, article)
+            await self.write_stage.put(("new_article", new_article))
+        else:
+            review = await create_review(self.db, existing_article, article)
+            await self.write_stage.put(("review", review))
+
+    async def write(self, item: tuple[str, dict[str, Any]]) -> None:
+        kind, values = item
+        if kind == "review":
+            article_id = values["article_id"]
+            await self.writer.add_checkpoint({"run_id": self.run_id, "article_id": article_id})
+            await self.writer.add_review(values)
+        else:
+            await self.writer.add_checkpoint({"run_id": self.run_id, "article_id": values["id"]})
+            await self.writer.add_article(values, generated=kind == "new_article")
+        await self.report_done()
+
+    async def report_done(self) -> None:
+        self.done += 1
+        if self.on_progress:
+            await self.on_progress(self.done, self.total)
+
+
+async def import_articles_from_worldanvil(
+    db: Optional[Session] = None, on_progress: Optional[ProgressCallback] = None
+) -> None:
+    """Orchestrate the import process, reporting (done, total) articles to `on_progress`"""
+    await ArticleImport(db=db or next(get_db()), on_progress=on_progress).run()
+
+
+async def import_articles_from_snapshot(
+    db: Optional[Session] = None,
+    content_hash: Optional[str] = None,
+    on_progress: Optional[ProgressCallback] = None,
+) -> None:
+    """
+    Import a stored export snapshot instead of downloading the export.
+
+    Args:
+        db (Optional[Session]): The database session.
+        content_hash (Optional[str]): Hash, or hash prefix, of the snapshot. Defaults to the
+            newest snapshot.
+        on_progress (Optional[ProgressCallback]): Reports (done, total) imported articles.
+
+    Raises:
+        ValueError: If there is no such snapshot.
+    """
+    snapshot = snapshots.get(content_hash)
+    if snapshot is None:
+        raise ValueError("No World Anvil export snapshot to import")
+
+    logger.info(f"Importing export snapshot {snapshot.content_hash[:12]}")
+    await ArticleImport(db=db or next(get_db()), on_progress=on_progress).run(
+        export_path=snapshot.path, export_hash=snapshot.content_hash
+    )
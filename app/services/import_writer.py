@@ -0,0 +1,103 @@
+from typing import Any, Optional
+import time
+from types import TracebackType
+
+from sqlmodel import Session
+
+from app import crud, logger, settings
+
+
+class ImportWriter:
+    """
+    Buffers the article, review and checkpoint writes of an import and applies them in chunks.
+
+    Each chunk is written with bulk upserts in a single transaction, instead of one commit and
+    refresh per row, so the checkpoints of an import run are committed together with the
+    writes they record. Use as an async context manager to write the last chunk on exit.
+
+    A chunk is also written once it holds `generated_chunk_size` writes with generated AI
+    text, or `flush_interval` seconds after the last chunk, so an interrupted import loses
+    little of its LLM work when generation is slow.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        chunk_size: int = settings.IMPORT_WRITE_CHUNK_SIZE,
+        generated_chunk_size: int = settings.IMPORT_WRITE_GENERATED_CHUNK_SIZE,
+        flush_interval: float = settings.IMPORT_WRITE_FLUSH_SECONDS,
+    ) -> None:
+        self.db = db
+        self.chunk_size = chunk_size
+        self.generated_chunk_size = generated_chunk_size
+        self.flush_interval = flush_interval
+        self.flushed_at = time.monotonic()
+        self.generated = 0
+        self.articles: dict[str, dict[str, Any]] = {}
+        self.reviews: list[dict[str, Any]] = []
+        self.checkpoints: list[dict[str, Any]] = []
+        self.written_articles = 0
+        self.written_reviews = 0
+
+    async def __aenter__(self) -> "ImportWriter":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None:
+            await self.flush()
+
+    async def add_article(self, values: dict[str, Any], generated: bool = False) -> None:
+        """
+        Queue the creation of an article, or an update of the fields in `values`. `generated`
+        marks the values as holding generated AI text.
+        """
+        self.articles.setdefault(values["id"], {}).update(values)
+        self.generated += generated
+        await self.flush_if_full()
+
+    async def add_review(self, values: dict[str, Any]) -> None:
+        """Queue the creation of a review, which always holds generated AI text"""
+        self.reviews.append(values)
+        self.generated += 1
+        await self.flush_if_full()
+
+    async def add_checkpoint(self, values: dict[str, Any]) -> None:
+        """Queue the checkpoint of an article, committed with the article's writes"""
+        self.checkpoints.append(values)
+
+    async def flush_if_full(self) -> None:
+        if (
+            len(self.articles) + len(self.reviews) >= self.chunk_size
+            or self.generated >= self.generated_chunk_size
+            or time.monotonic() - self.flushed_at >= self.flush_interval
+        ):
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write the queued articles, then the reviews that may reference them"""
+        if not self.articles and not self.reviews and not self.checkpoints:
+            return
+
+        started = time.perf_counter()
+        rows = list(self.articles.values())
+        await crud.article.upsert_many(db=self.db, rows=rows, commit=False)
+        await crud.review.upsert_many(db=self.db, rows=self.reviews, commit=False)
+        await crud.import_checkpoint.upsert_many(db=self.db, rows=self.checkpoints, commit=False)
+        self.db.commit()
+        logger.info(
+            f"Wrote {len(self.articles)} articles, {len(self.reviews)} reviews and "
+            f"{len(self.checkpoints)} checkpoints in {time.perf_counter() - started:.3f}s"
+        )
+
+        self.written_articles += len(self.articles)
+        self.written_reviews += len(self.reviews)
+        self.articles = {}
+        self.reviews = []
+        self.checkpoints = []
+        self.generated = 0
+        self.flushed_at = time.monotonic()
@@ -0,0 +1,169 @@
+from typing import Awaitable, Callable, Optional
+import asyncio
+import time
+from datetime import datetime
+
+from sqlmodel import Session
+
+from app import crud, logger, models, settings
+from app.db.session import SessionLocal
+from app.services import articles, import_pipeline, worldanvil_sync
+from app.services.articles import ProgressCallback
+
+JOB_IMPORT_ARTICLES = "import_articles"
+JOB_IMPORT_SNAPSHOT = "import_snapshot"
+JOB_GENERATE_AI_TEXT = "generate_ai_text"
+JOB_SYNC_WORLDANVIL = "sync_worldanvil"
+
+JobHandler = Callable[[Session, ProgressCallback], Awaitable[None]]
+
+JOB_HANDLERS: dict[str, JobHandler] = {
+    JOB_IMPORT_ARTICLES: lambda db, on_progress: import_pipeline.import_articles_from_worldanvil(
+        db=db, on_progress=on_progress
+    ),
+    JOB_IMPORT_SNAPSHOT: lambda db, on_progress: import_pipeline.import_articles_from_snapshot(
+        db=db, on_progress=on_progress
+    ),
+    JOB_GENERATE_AI_TEXT: lambda db, on_progress: articles.generate_all_ai_text(
+        db=db, on_progress=on_progress
+    ),
+    JOB_SYNC_WORLDANVIL: lambda db, on_progress: worldanvil_sync.sync_worldanvil(
+        db=db, on_progress=on_progress
+    ),
+}
+
+# Minimum seconds between progress writes, so fast jobs do not commit once per item
+PROGRESS_INTERVAL = 1.0
+
+_worker: Optional["asyncio.Task[None]"] = None
+_wake_up: Optional[asyncio.Event] = None
+
+
+async def enqueue_job(db: Session, kind: str) -> models.Job:
+    """
+    Queue a job for the worker, unless a job of the same kind is already queued or running.
+
+    Args:
+        db (Session): The database session.
+        kind (str): The kind of job, one of `JOB_HANDLERS`.
+
+    Returns:
+        models.Job: The queued job, or the active job of the same kind.
+
+    Raises:
+        ValueError: If there is no handler for the kind of job.
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind '{kind}'")
+
+    job = await crud.job.get_active(db=db, kind=kind)
+    if job:
+        logger.info(f"Job '{kind}' is already {job.status}")
+        return job
+
+    job = await crud.job.create(db=db, obj_in=models.JobCreate(kind=kind))
+    logger.info(f"Queued job '{kind}' ({job.id})")
+    if _wake_up:
+        _wake_up.set()
+    return job
+
+
+async def run_job(db: Session, job: models.Job) -> models.Job:
+    """Run a job, recording its status, progress and any error"""
+    job = await crud.job.update(
+        db=db,
+        id=job.id,
+        obj_in=models.JobUpdate(status=models.JOB_RUNNING, started_at=datetime.utcnow()),
+    )
+    logger.info(f"Running job '{job.kind}' ({job.id})")
+
+    last_update = 0.0
+
+    async def on_progress(progress: int, total: int) -> None:
+        nonlocal last_update
+        if progress < total and time.monotonic() - last_update < PROGRESS_INTERVAL:
+            return
+        last_update = time.monotonic()
+        await crud.job.update(
+            db=db, id=job.id, obj_in=models.JobUpdate(progress=progress, total=total)
+        )
+
+    status, error = models.JOB_DONE, None
+    try:
+        await JOB_HANDLERS[job.kind](db, on_progress)
+    except Exception as e:  # pylint: disable=broad-except
+        logger.exception(f"Job '{job.kind}' ({job.id}) failed")
+        db.rollback()
+        status, error = models.JOB_FAILED, str(e) or repr(e)
+
+    job = await crud.job.update(
+        db=db,
+        id=job.id,
+        obj_in=models.JobUpdate(status=status, error=error, finished_at=datetime.utcnow()),
+    )
+    logger.success(f"Job '{job.kind}' ({job.id}) {job.status}")
+    return job
+
+
+async def run_next_job(db: Session) -> Optional[models.Job]:
+    """Run the oldest queued job, if any"""
+    job = await crud.job.get_next_queued(db=db)
+    if job is None:
+        return None
+    return await run_job(db=db, job=job)
+
+
+async def run_worker(poll_interval: float = settings.JOB_WORKER_POLL_SECONDS) -> None:
+    """Run queued jobs one at a time, waiting to be woken up or polling when the queue is empty"""
+    assert _wake_up is not None
+    while True:
+        _wake_up.clear()
+        try:
+            with SessionLocal() as db:
+                job = await run_next_job(db=db)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Job worker failed to run the next job")
+            job = None
+
+        if job is None:
+            try:
+                await asyncio.wait_for(_wake_up.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def start_worker(db: Session) -> None:
+    """
+    Start the background job worker.
+
+    Jobs left running by a previous process are queued again first.
+
+    Args:
+        db (Session): The database session.
+    """
+    global _worker, _wake_up  # pylint: disable=global-statement
+    if _worker is not None:
+        return
+
+    if requeued := await crud.job.requeue_running(db=db):
+        logger.warning(f"Queued {requeued} interrupted jobs again")
+
+    _wake_up = asyncio.Event()
+    _worker = asyncio.create_task(run_worker())
+    logger.debug("Started job worker")
+
+
+async def stop_worker() -> None:
+    """Stop the background job worker, leaving a running job to be queued again on start"""
+    global _worker, _wake_up  # pylint: disable=global-statement
+    if _worker is None:
+        return
+
+    _worker.cancel()
+    try:
+        await _worker
+    except asyncio.CancelledError:
+        pass
+    _worker = None
+    _wake_up = None
+    logger.debug("Stopped job worker")
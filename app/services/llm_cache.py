@@ -0,0 +1,109 @@
+from typing import Any, Optional
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from app import logger, settings
+from app.paths import LLM_CACHE_PATH
+
+
+class LLMCache:
+    """
+    Persistent, content-addressed cache of LLM responses.
+
+    Each response is stored as a JSON file named after the hash of everything that determines
+    it. Entries older than `max_age_days` are treated as misses, and the least recently used
+    entries are evicted once the cache grows beyond `max_size_mb`.
+    """
+
+    def __init__(
+        self,
+        path: Path = LLM_CACHE_PATH,
+        max_size_mb: int = settings.LLM_CACHE_MAX_SIZE_MB,
+        max_age_days: int = settings.LLM_CACHE_MAX_AGE_DAYS,
+        evict_every: int = 100,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_size_mb * 1024 * 1024
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Hash the parts that determine a response into a cache key"""
+        return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+    def get_file(self, key: str) -> Path:
+        return self.path / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached response, or None on a miss"""
+        file = self.get_file(key)
+        try:
+            if time.time() - file.stat().st_mtime > self.max_age_seconds:
+                file.unlink(missing_ok=True)
+                raise FileNotFoundError(file)
+            response = str(json.loads(file.read_text())["response"])
+        except (FileNotFoundError, ValueError, KeyError):
+            self.misses += 1
+            return None
+
+        # Touch the entry so eviction drops the least recently used entries first
+        os.utime(file)
+        self.hits += 1
+        return response
+
+    def set(self, key: str, response: str) -> None:
+        """Store a response, evicting old entries every `evict_every` writes"""
+        file = self.get_file(key)
+        file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps({"response": response}))
+        os.replace(tmp_file, file)
+
+        self.writes += 1
+        if self.writes % self.evict_every == 0:
+            self.evict()
+
+    def evict(self) -> int:
+        """Remove expired entries, then the least recently used ones until under the size limit"""
+        now = time.time()
+        entries = []
+        removed = 0
+        for file in self.path.glob("*/*.json"):
+            stat = file.stat()
+            if now - stat.st_mtime > self.max_age_seconds:
+                file.unlink(missing_ok=True)
+                removed += 1
+            else:
+                entries.append((stat.st_mtime, stat.st_size, file))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, file in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            file.unlink(missing_ok=True)
+            total_bytes -= size
+            removed += 1
+
+        if removed:
+            logger.debug(f"Evicted {removed} LLM cache entries")
+        return removed
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+cache = LLMCache()
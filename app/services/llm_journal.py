@@ -0,0 +1,83 @@
+from typing import Any, Iterator, NamedTuple, Optional, Union
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+
+from app import crud, logger, models
+from app.db.session import SessionLocal
+
+
+class JournalContext(NamedTuple):
+    bind: Union[Engine, Connection]
+    article_id: Optional[str]
+
+
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
+journal_context: ContextVar[Optional[JournalContext]] = ContextVar("journal_context", default=None)
+
+
+def get_usage_tokens(usage: Any) -> dict[str, int]:
+    """Read the token counts of a message usage, given as a model or as a dict"""
+    if isinstance(usage, dict):
+        return {field: usage.get(field) or 0 for field in USAGE_FIELDS}
+    return {field: getattr(usage, field, None) or 0 for field in USAGE_FIELDS}
+
+
+@contextmanager
+def journal_llm_calls(db: Session, article_id: Optional[str] = None) -> Iterator[None]:
+    """Journal the LLM calls made inside the block to the database of `db`, by `article_id`"""
+    token = journal_context.set(JournalContext(bind=db.get_bind(), article_id=article_id))
+    try:
+        yield
+    finally:
+        journal_context.reset(token)
+
+
+async def record_llm_call(
+    task: str,
+    model: str,
+    usage: Any = None,
+    latency: Optional[float] = None,
+    retries: int = 0,
+    cache_hit: bool = False,
+    error: Optional[str] = None,
+    article_id: Optional[str] = None,
+) -> None:
+    """
+    Journal a single LLM call.
+
+    Calls made outside of `journal_llm_calls()` are not journaled. Each call is written on its
+    own short-lived session, so journaling never commits or rolls back the caller's pending
+    writes, such as a chunk buffered by the import writer. A failure to write the journal is
+    logged and never fails the call itself.
+    """
+    context = journal_context.get()
+    if context is None:
+        return
+
+    llm_call = models.LLMCallCreate(
+        task=task,
+        article_id=article_id or context.article_id,
+        model=model,
+        **get_usage_tokens(usage),
+        latency=latency,
+        retries=retries,
+        cache_hit=cache_hit,
+        error=error,
+    )
+    with SessionLocal(bind=context.bind) as db:
+        try:
+            await crud.llm_call.create(db=db, obj_in=llm_call)
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.warning(f"Failed to journal '{task}' LLM call: {str(e)}")
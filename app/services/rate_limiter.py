@@ -0,0 +1,191 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, TypeVar
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import anthropic
+import httpx
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from app import logger, settings
+
+T = TypeVar("T")
+
+RATE_LIMIT_HEADER_PREFIX = "anthropic-ratelimit-"
+
+
+def is_retryable(exception: BaseException) -> bool:
+    """Rate limits, overloads, server errors and connection errors are worth retrying"""
+    if isinstance(exception, (anthropic.APIConnectionError, anthropic.RateLimitError)):
+        return True
+    return isinstance(exception, anthropic.APIStatusError) and exception.status_code >= 500
+
+
+def parse_reset(value: str) -> Optional[float]:
+    """Seconds until an RFC 3339 rate limit reset time"""
+    try:
+        reset = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return max(0.0, reset.timestamp() - time.time())
+
+
+class AdaptiveLimiter:
+    """
+    Client-side limiter for concurrent LLM calls.
+
+    Concurrency grows additively by one slot per window of successful calls and is halved on
+    every rate limit or overload (AIMD). Calls are paused until the reset time when the
+    rate limit headers report an exhausted request or token budget, and for `cooldown` seconds
+    once `failure_threshold` consecutive calls have failed (circuit breaker).
+    """
+
+    def __init__(
+        self,
+        initial_concurrency: int = settings.AI_INITIAL_CONCURRENCY,
+        max_concurrency: int = settings.AI_MAX_CONCURRENCY,
+        min_concurrency: int = 1,
+        failure_threshold: int = settings.AI_CIRCUIT_BREAKER_FAILURES,
+        cooldown: float = settings.AI_CIRCUIT_BREAKER_COOLDOWN_SECONDS,
+        max_retries: int = settings.AI_MAX_RETRIES,
+        max_wait: float = 60,
+    ) -> None:
+        self.initial_concurrency = initial_concurrency
+        self.concurrency = float(initial_concurrency)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.consecutive_failures = 0
+        self.circuit_opened = 0
+        self.rate_limits: dict[str, str] = {}
+        self.condition: Optional[asyncio.Condition] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def reset(self) -> None:
+        """Close the circuit and forget all backoff, as in a new process"""
+        self.concurrency = float(self.initial_concurrency)
+        self.paused_until = 0.0
+        self.consecutive_failures = 0
+        self.circuit_opened = 0
+        self.rate_limits = {}
+
+    def get_condition(self) -> asyncio.Condition:
+        """Get the condition of the running event loop, since the CLI and tests run several"""
+        loop = asyncio.get_running_loop()
+        if self.condition is None or self.loop is not loop:
+            self.condition = asyncio.Condition()
+            self.loop = loop
+            self.in_flight = 0
+        return self.condition
+
+    def pause(self, seconds: float, reason: str) -> None:
+        paused_until = time.monotonic() + seconds
+        if paused_until > self.paused_until:
+            self.paused_until = paused_until
+            logger.warning(f"Pausing LLM calls for {seconds:.1f}s: {reason}")
+
+    async def acquire(self) -> None:
+        condition = self.get_condition()
+        async with condition:
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    try:
+                        await asyncio.wait_for(condition.wait(), timeout=pause)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self.in_flight < int(self.concurrency):
+                    self.in_flight += 1
+                    return
+                await condition.wait()
+
+    async def release(self) -> None:
+        condition = self.get_condition()
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Wait for a free slot outside of any pause"""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            await self.release()
+
+    def on_success(self) -> None:
+        self.consecutive_failures = 0
+        self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+
+    def on_failure(self, exception: BaseException) -> None:
+        """Back off after a failed call, opening the circuit after sustained failures"""
+        if not is_retryable(exception):
+            return
+        if isinstance(exception, anthropic.RateLimitError) or (
+            isinstance(exception, anthropic.APIStatusError) and exception.status_code == 529
+        ):
+            self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+            retry_after = exception.response.headers.get("retry-after")
+            if retry_after and retry_after.replace(".", "", 1).isdigit():
+                self.pause(float(retry_after), f"{exception.status_code} retry-after")
+
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.failure_threshold:
+            self.circuit_opened += 1
+            self.consecutive_failures = 0
+            self.pause(self.cooldown, f"{self.failure_threshold} consecutive failures")
+
+    async def on_response(self, response: httpx.Response) -> None:
+        """httpx response hook that tracks the rate limit headers of every API response"""
+        rate_limits = {
+            name[len(RATE_LIMIT_HEADER_PREFIX) :]: value
+            for name, value in response.headers.items()
+            if name.startswith(RATE_LIMIT_HEADER_PREFIX)
+        }
+        if not rate_limits:
+            return
+        self.rate_limits.update(rate_limits)
+
+        for budget in ("requests", "tokens", "input-tokens", "output-tokens"):
+            remaining = rate_limits.get(f"{budget}-remaining")
+            reset = rate_limits.get(f"{budget}-reset")
+            if remaining == "0" and reset and (seconds := parse_reset(reset)):
+                self.pause(seconds, f"{budget} per minute exhausted")
+
+    async def run(self, request: Callable[[], Awaitable[T]]) -> T:
+        """Run a request in a slot, retrying retryable errors with jittered exponential backoff"""
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(self.max_retries + 1),
+            wait=wait_random_exponential(multiplier=1, max=self.max_wait),
+            retry=retry_if_exception(is_retryable),
+            reraise=True,
+        ):
+            with attempt:
+                async with self.slot():
+                    try:
+                        result = await request()
+                    except anthropic.APIError as e:
+                        self.on_failure(e)
+                        raise e
+                self.on_success()
+        return result
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {
+            "concurrency": int(self.concurrency),
+            "in_flight": self.in_flight,
+            "circuit_opened": self.circuit_opened,
+            "rate_limits": self.rate_limits,
+        }
+
+
+limiter = AdaptiveLimiter()
@@ -0,0 +1,57 @@
+from typing import Any, Awaitable, Callable, Hashable, Optional, TypeVar
+import asyncio
+import hashlib
+
+from app import logger
+
+T = TypeVar("T")
+
+
+def get_flight_key(article_id: str, task: str, text: Optional[str]) -> tuple[str, str, str]:
+    """Key a generation by article, task and the hash of the text it is generated from"""
+    text_hash = hashlib.sha256((text or "").encode()).hexdigest()
+    return article_id, task, text_hash
+
+
+class SingleFlight:
+    """
+    In-process registry of in-flight calls.
+
+    Concurrent callers with the same key await the result of the first call instead of making
+    their own. The key is released as soon as the call completes, so later callers make a
+    fresh call.
+    """
+
+    def __init__(self) -> None:
+        self.calls: dict[Hashable, asyncio.Task[Any]] = {}
+        self.shared = 0
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Run `func` unless a call with the same key is in flight, then await that call"""
+        call = self.calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(func())
+            self.calls[key] = call
+            call.add_done_callback(lambda _: self.calls.pop(key, None))
+        else:
+            self.shared += 1
+            logger.info(f"Awaiting in-flight call for {key}")
+
+        # Shield the call so a cancelled caller does not cancel it for the others
+        return await asyncio.shield(call)
+
+    def join(self, key: Hashable) -> Optional[Awaitable[Any]]:
+        """Get the in-flight call with the key to await its result, or None if there is none"""
+        call = self.calls.get(key)
+        if call is None:
+            return None
+        self.shared += 1
+        logger.info(f"Joining in-flight call for {key}")
+        return asyncio.shield(call)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"in_flight": len(self.calls), "shared": self.shared}
+
+
+generations = SingleFlight()
@@ -1,51 +1,61 @@
+import ast
+import asyncio
+import json
 import os
+import re
 import time
-from typing import Tuple, Optional
+from typing import Any, AsyncIterator, Callable, Tuple, Optional
 import anthropic
-from anthropic import Anthropic, HUMAN_PROMPT, AI_PROMPT
-from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type
-
-# Initialize the Anthropic client
-client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
-
-
-# Define a retry decorator
-# @retry(
-#     stop=stop_after_attempt(2),
-#     wait=wait_fixed(2),
-#     retry=retry_if_exception_type(anthropic.APIError),
-# )
-def api_call(prompt: str, max_tokens: int) -> str:
-    try:
-        # response = client.completions.create(
-        #     model="claude-3-5-sonnet-20240620",
-        #     prompt=prompt,
-        #     max_tokens_to_sample=max_tokens,
-        # )
-
-        message = client.messages.create(
-            model="claude-3-5-sonnet-20240620",
-            max_tokens=max_tokens,
-            temperature=0,
-            messages=[{"role": "user", "content": [{"type": "text", "text": prompt}]}],
-        )
-    except anthropic.APIError as e:
-        raise e
-
-    text = message.content[0].text
-    return text
-
-
-def generate_summary(text: str) -> str:
-    """Generates a summary of the inputted text."""
-    # prompt = f"{HUMAN_PROMPT} Please provide a detailed summary of the following text, capturing all key points and main ideas:\n\n{text}\n\n{AI_PROMPT} Here's a detailed summary of the text:"
-
-    prompt = f"""
-    {HUMAN_PROMPT} You are tasked with summarizing and compressing an article while retaining all important information. Your goal is to create a condensed version that can be used as input for another language model prompt. Here is the article you need to summarize:
+import httpx
+import pydantic
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+
+from app import logger, models, settings
+from app.core.process_pool import run_in_process
+from app.services.chunker import split_text
+from app.services.llm_cache import cache
+from app.services.llm_journal import get_usage_tokens, record_llm_call
+from app.services.rate_limiter import limiter
+from app.services.tokenizer import estimate_tokens
+
+# Initialize the Anthropic client. Retries are left to the adaptive limiter, which also tracks
+# the rate limit headers of every response.
+client = AsyncAnthropic(
+    api_key=os.environ.get("ANTHROPIC_API_KEY"),
+    max_retries=0,
+    http_client=DefaultAsyncHttpxClient(event_hooks={"response": [limiter.on_response]}),
+)
+
+MODEL = "claude-3-5-sonnet-20240620"
+
+# Bump a version whenever its prompt template changes so cached responses are not reused
+PROMPT_VERSIONS = {
+    "summary": "3",
+    "brief": "3",
+    "date_range": "3",
+    "ai_text": "3",
+    "reduce_summary": "2",
+}
+
+SUMMARY_MAX_TOKENS = 1000
+BRIEF_MAX_TOKENS = 300
+DATE_RANGE_MAX_TOKENS = 100
+AI_TEXT_MAX_TOKENS = 1500
+
+ANCIENT_SOL_TIMELINE = """\
+    1. 10,901 PN: Atlasian Republic is formed.
+    2. 11,108 PN: Cyclopeans are the first humans to land on the moon.
+    3. 11,125 PN: Atlasians establish the first human city on Mars, Atlas City.
+    4. 11,302 PN: Cyclopeans begin terraforming Venus.
+    5. 11,311 PN: Mars declares independence from Earth.
+    6. 11,355 PN: Polygonals develop a new type of propulsion system.
+    7. 11,440 PN - 11,450 PN: World War on Earth involving multiple civilizations.
+    8. 11,497 PN: The Sun's recurring micronova strikes the Sol system.
+    9. 11,507 PN: Kalen completes the Phobos Monolith with a message to future civilizations.
+"""
 
-<article>
-\n\n{text}\n\n
-</article>
+SUMMARY_SYSTEM_PROMPT = """\
+You are tasked with summarizing and compressing an article while retaining all important information. Your goal is to create a condensed version that can be used as input for another language model prompt. The article you need to summarize is provided inside <article> tags.
 
 Follow these steps to summarize and compress the article:
 
@@ -78,131 +88,584 @@ Follow these steps to summarize and compress the article:
 7. Double-check your summary to make sure it accurately represents the original article's content and intent.
 
 The summary should be significantly shorter than the original article while retaining all important information. Just provide the summary, do not provide "Here's the summary of the article" or something similar, just the summary.
----
-{AI_PROMPT}
+"""
+
+BRIEF_SYSTEM_PROMPT = """\
+You are tasked with creating an extremely concise summary of an article in 1-3 sentences. Your goal is to capture the absolute essence of the article in a brief format that can be quickly understood. The article you need to summarize is provided inside <article> tags.
+
+Follow these steps to create the brief summary:
+
+1. Carefully read the entire article to grasp its core message and main points.
+
+2. Identify the single most important idea or theme of the article.
+
+3. Determine 1-2 key supporting points or details that are crucial to understanding the main idea.
+
+4. Craft 1-3 sentences that encapsulate the main idea and key supporting points. These sentences should:
+- Clearly state the central theme or argument of the article
+- Include only the most critical supporting information
+- Provide a complete but extremely condensed overview of the article's content
+
+5. Ensure your brief summary:
+- Is no longer than 3 sentences
+- Captures the essence of the article without any extraneous details
+- Is clear and easily understandable, even to someone unfamiliar with the topic
+- Accurately represents the original article's main point and intent
+
+6. Review your brief summary to confirm it provides a clear, concise, and accurate representation of the article's core message.
+
+Provide only the 1-3 sentence brief summary, without any introductory phrases like "Here's a brief summary" or similar statements.
+"""
+
+DATE_RANGE_SYSTEM_PROMPT = f"""\
+You are an expert historian of the Ancient Sol universe. Your task is to analyze an article and determine the time period it covers or refers to within this universe. You need to identify the earliest and latest years mentioned or implied in the content, and return them as a pair of years (year_start, year_end). The article you need to analyze is provided inside <article> tags.
+
+Here is a timeline of major events in the Ancient Sol universe to help you contextualize the article:
+
+{ANCIENT_SOL_TIMELINE}
+
+Follow these steps to determine the date range:
+
+1. Carefully read the entire article, paying special attention to any mentions of dates, years, or historical events.
+
+2. Identify all explicit mentions of years or dates in the article.
+
+3. Look for implicit references to time periods, such as:
+- Mentions of historical events with known dates
+- References to technological advancements or cultural phenomena associated with specific time periods
+- Descriptions of societal or political conditions characteristic of certain eras
+
+4. If exact years are mentioned:
+- Identify the earliest year mentioned (year_start)
+- Identify the latest year mentioned (year_end)
+
+5. If no exact years are mentioned, infer the most likely time period based on the context and content of the article.
+
+6. If the article seems to focus on a single year or a very short period:
+- Use that year for both year_start and year_end
+- Or use your judgment to expand slightly to cover the most likely period discussed
+
+7. If you cannot determine a specific date range:
+- Use your best judgment to estimate a plausible range based on the content
+- If even an estimate is impossible, use None for both values
+
+8. Format your response as a tuple: (year_start, year_end)
+
+Rules:
+- Both year_start and year_end should be years in the format YYYY (e.g., 2023)
+- year_start must be less than or equal to year_end
+- If you can't determine a start or end year, use None for that value
+- Do not include any explanation or additional text, just the tuple of two values
+
+Examples of valid responses:
+(1950, 1970)
+(2000, 2000)
+(1800, None)
+(None, 2022)
+(None, None)
+
+Analyze the article and provide the date range as a tuple of two values.
+"""
+
+AI_TEXT_SYSTEM_PROMPT = f"""\
+You are an expert historian of the Ancient Sol universe. You are tasked with producing three things for an article in one response: a compressed summary, an extremely concise brief, and the date range the article covers within this universe. The article is provided inside <article> tags.
+
+Here is a timeline of major events in the Ancient Sol universe to help you contextualize the article:
+
+{ANCIENT_SOL_TIMELINE}
+
+Follow these instructions for each field:
+
+1. "summary": Summarize and compress the article while retaining all important information, so it can be used as input for another language model prompt.
+- Keep the main topic, key arguments, important facts, crucial examples and significant conclusions
+- Remove redundant statements, excessive adjectives, tangents and repetitive examples
+- Combine related ideas into concise sentences and maintain the logical flow of the original article
+- The summary should be significantly shorter than the article
+
+2. "brief": Capture the absolute essence of the article in 1-3 sentences.
+- Clearly state the central theme of the article with only the most critical supporting information
+- It must be clear and easily understandable, even to someone unfamiliar with the topic
+
+3. "year_start" and "year_end": The earliest and latest years mentioned or implied in the article.
+- Use explicit mentions of years first, then implicit references to historical events, technology or eras from the timeline
+- If the article focuses on a single year, use that year for both values
+- Both values are integers in the format YYYY, and year_start must be less than or equal to year_end
+- If you cannot determine a start or end year, use null for that value
+
+Respond with only a JSON object with exactly these keys, without any introductory text:
+{{"summary": "...", "brief": "...", "year_start": 1950, "year_end": 1970}}
+"""
+
+REDUCE_SUMMARY_SYSTEM_PROMPT = """\
+You are tasked with combining the summaries of consecutive sections of one long article into a single summary of the whole article. The section summaries are provided in order inside <section> tags. Your goal is to create a condensed version of the article that can be used as input for another language model prompt.
+
+Follow these steps to combine the section summaries:
+
+1. Read all the section summaries to understand the main points and overall structure of the article.
+
+2. Merge information that is repeated across sections, and keep every important fact, argument, and conclusion.
+
+3. Maintain the order and logical flow of the original article.
+
+4. Compress the result by combining related ideas into concise sentences and using precise and efficient language.
+
+Just provide the summary, do not provide "Here's the summary of the article" or something similar, and do not mention the sections.
+"""
+
+TASK_PROMPTS = {
+    "summary": SUMMARY_SYSTEM_PROMPT,
+    "brief": BRIEF_SYSTEM_PROMPT,
+    "date_range": DATE_RANGE_SYSTEM_PROMPT,
+    "ai_text": AI_TEXT_SYSTEM_PROMPT,
+    "reduce_summary": REDUCE_SUMMARY_SYSTEM_PROMPT,
+}
+
+# The model only caches prefixes of at least this many tokens
+PROMPT_CACHE_MIN_TOKENS = 1024
+
+# Each task prompt alone is under the minimum, so the instructions of every task are sent as a
+# single system prompt prefix marked for provider-side prompt caching. All tasks share its cache
+# entry, and only the short task selection and the article that follow it vary.
+SHARED_SYSTEM_PROMPT = (
+    "You write the summaries, briefs and date ranges of the articles of the Ancient Sol "
+    "universe. Each request names one of the tasks below right after these instructions, and "
+    "provides its input in the user message. Follow only the instructions of the named task, "
+    "and respond exactly in the format that task asks for.\n\n"
+    + "\n".join(f'<task name="{task}">\n{prompt}</task>\n' for task, prompt in TASK_PROMPTS.items())
+)
+
+PROMPT_CACHING_BETA = "prompt-caching-2024-07-31"
+MESSAGE_BATCHES_BETA = "message-batches-2024-09-24"
+
+
+class PromptCacheStats:
+    """Counts provider-side prompt cache usage reported by the API."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.hits = 0
+        self.input_tokens = 0
+        self.cache_creation_input_tokens = 0
+        self.cache_read_input_tokens = 0
+
+    def record(
+        self, input_tokens: int, cache_creation_input_tokens: int, cache_read_input_tokens: int
+    ) -> None:
+        self.calls += 1
+        self.hits += cache_read_input_tokens > 0
+        self.input_tokens += input_tokens
+        self.cache_creation_input_tokens += cache_creation_input_tokens
+        self.cache_read_input_tokens += cache_read_input_tokens
+
+    def record_usage(self, usage: Any) -> None:
+        """Records the usage of a message, given as a model or as a dict"""
+        tokens = get_usage_tokens(usage)
+        self.record(
+            input_tokens=tokens["input_tokens"],
+            cache_creation_input_tokens=tokens["cache_creation_input_tokens"],
+            cache_read_input_tokens=tokens["cache_read_input_tokens"],
+        )
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        # Cache reads are billed at 10% of the base input token price
+        return {
+            "calls": self.calls,
+            "hit_rate": self.hits / self.calls if self.calls else 0.0,
+            "cache_read_input_tokens": self.cache_read_input_tokens,
+            "cache_creation_input_tokens": self.cache_creation_input_tokens,
+            "tokens_saved": round(self.cache_read_input_tokens * 0.9),
+        }
+
+
+prompt_cache_stats = PromptCacheStats()
+
+
+async def api_call(
+    prompt: str,
+    max_tokens: int,
+    task: str,
+    use_cache: bool = True,
+    validate: Optional[Callable[[str], Any]] = None,
+) -> str:
+    """
+    Sends the prompt to the model, reading through the LLM response cache.
+
+    Calls go through the adaptive limiter, which retries rate limits and overloads. `validate`
+    is called on fresh responses before they are cached, so responses that fail to parse are
+    never stored.
     """
+    use_cache = use_cache and settings.LLM_CACHE_ENABLED
+    key = get_cache_key(prompt, max_tokens, task)
+    if use_cache and (cached := cache.get(key)) is not None:
+        await record_llm_call(task, MODEL, cache_hit=True)
+        return cached
+
+    started = time.perf_counter()
+    attempts = 0
+    message = None
+    error = None
+
+    async def request() -> Any:
+        nonlocal attempts
+        attempts += 1
+        return await client.messages.create(
+            **build_message_params(prompt, max_tokens, task),
+            extra_headers={"anthropic-beta": PROMPT_CACHING_BETA},
+        )
 
     try:
-        return api_call(prompt, 1000)
-    except anthropic.APIError as e:
-        print(f"Error generating summary: {str(e)}")
+        message = await limiter.run(request)
+        text = message.content[0].text
+        if validate:
+            validate(text)
+    except Exception as e:
+        error = str(e) or type(e).__name__
         raise e
+    finally:
+        await record_llm_call(
+            task,
+            MODEL,
+            usage=getattr(message, "usage", None),
+            latency=time.perf_counter() - started,
+            retries=max(0, attempts - 1),
+            error=error,
+        )
 
+    prompt_cache_stats.record_usage(message.usage)
+    if use_cache:
+        cache.set(key, text)
+    return text
 
-def generate_brief(text: str) -> str:
-    """Generates a very brief summary of the inputted text."""
-    prompt = f"""
-    {HUMAN_PROMPT} You are tasked with creating an extremely concise summary of an article in 1-3 sentences. Your goal is to capture the absolute essence of the article in a brief format that can be quickly understood. Here is the article you need to summarize:
 
-    <article>
-    \n\n{text}\n\n
-    </article>
+async def stream_api_call(
+    prompt: str,
+    max_tokens: int,
+    task: str,
+    use_cache: bool = True,
+    validate: Optional[Callable[[str], Any]] = None,
+) -> AsyncIterator[str]:
+    """
+    Streams the response text of the model as it arrives, reading through the LLM response cache.
 
-    Follow these steps to create the brief summary:
+    A cached response is yielded as a single chunk. The complete response is validated and
+    cached once the stream has ended. Streams wait for a limiter slot but are not retried, since
+    their chunks have already been passed on.
+    """
+    use_cache = use_cache and settings.LLM_CACHE_ENABLED
+    key = get_cache_key(prompt, max_tokens, task)
+    if use_cache and (cached := cache.get(key)) is not None:
+        await record_llm_call(task, MODEL, cache_hit=True)
+        yield cached
+        return
+
+    started = time.perf_counter()
+    chunks = []
+    message = None
+    try:
+        async with limiter.slot():
+            try:
+                async with client.messages.stream(
+                    **build_message_params(prompt, max_tokens, task),
+                    extra_headers={"anthropic-beta": PROMPT_CACHING_BETA},
+                ) as stream:
+                    async for chunk in stream.text_stream:
+                        chunks.append(chunk)
+                        yield chunk
+                    message = await stream.get_final_message()
+            except anthropic.APIError as e:
+                limiter.on_failure(e)
+                raise e
+            limiter.on_success()
+        text = "".join(chunks)
+        if validate:
+            validate(text)
+    except Exception as e:
+        await record_llm_call(
+            task,
+            MODEL,
+            usage=getattr(message, "usage", None),
+            latency=time.perf_counter() - started,
+            error=str(e) or type(e).__name__,
+        )
+        raise e
 
-    1. Carefully read the entire article to grasp its core message and main points.
+    await record_llm_call(task, MODEL, usage=message.usage, latency=time.perf_counter() - started)
+    prompt_cache_stats.record_usage(message.usage)
+    if use_cache:
+        cache.set(key, text)
 
-    2. Identify the single most important idea or theme of the article.
 
-    3. Determine 1-2 key supporting points or details that are crucial to understanding the main idea.
+def build_message_params(prompt: str, max_tokens: int, task: str) -> dict[str, Any]:
+    """Builds the Messages API parameters shared by single and batched calls."""
+    return {
+        "model": MODEL,
+        "max_tokens": max_tokens,
+        "temperature": 0,
+        "system": [
+            {
+                "type": "text",
+                "text": SHARED_SYSTEM_PROMPT,
+                "cache_control": {"type": "ephemeral"},
+            },
+            {"type": "text", "text": get_task_system_prompt(task)},
+        ],
+        "messages": [{"role": "user", "content": [{"type": "text", "text": prompt}]}],
+    }
 
-    4. Craft 1-3 sentences that encapsulate the main idea and key supporting points. These sentences should:
-    - Clearly state the central theme or argument of the article
-    - Include only the most critical supporting information
-    - Provide a complete but extremely condensed overview of the article's content
 
-    5. Ensure your brief summary:
-    - Is no longer than 3 sentences
-    - Captures the essence of the article without any extraneous details
-    - Is clear and easily understandable, even to someone unfamiliar with the topic
-    - Accurately represents the original article's main point and intent
+def get_task_system_prompt(task: str) -> str:
+    """Selects the task of a request, after the cached instructions of all tasks."""
+    if task not in TASK_PROMPTS:
+        raise KeyError(f"Unknown LLM task '{task}'")
+    return f'Perform the "{task}" task on the user message.'
 
-    6. Review your brief summary to confirm it provides a clear, concise, and accurate representation of the article's core message.
 
-    Provide only the 1-3 sentence brief summary, without any introductory phrases like "Here's a brief summary" or similar statements.
+def get_cache_key(prompt: str, max_tokens: int, task: str) -> str:
+    """Builds the LLM response cache key of a prompt."""
+    return cache.make_key(MODEL, task, PROMPT_VERSIONS[task], max_tokens, prompt)
 
-    {AI_PROMPT}
-    """
 
+async def generate_summary(text: str, use_cache: bool = True) -> str:
+    """Generates a summary of the inputted text, map-reducing texts over the chunk budget."""
     try:
-        return api_call(prompt, 300)
+        prompt, task = await build_summary_prompt(text)
+        return await api_call(prompt, SUMMARY_MAX_TOKENS, task, use_cache=use_cache)
     except anthropic.APIError as e:
-        print(f"Error generating brief: {str(e)}")
+        logger.error(f"Error generating summary: {str(e)}")
         raise e
 
 
-def generate_date_range(text: str) -> Tuple[Optional[int], Optional[int]]:
-    """Generates start and end date range from the inputted text."""
-    prompt = f"""
-    {HUMAN_PROMPT} You are an expert historian of the Ancient Sol universe. Your task is to analyze an article and determine the time period it covers or refers to within this universe. You need to identify the earliest and latest years mentioned or implied in the content, and return them as a pair of years (year_start, year_end). 
+async def generate_brief(text: str, use_cache: bool = True) -> str:
+    """Generates a very brief summary of the inputted text."""
+    try:
+        return await api_call(
+            build_article_prompt(text), BRIEF_MAX_TOKENS, "brief", use_cache=use_cache
+        )
+    except anthropic.APIError as e:
+        logger.error(f"Error generating brief: {str(e)}")
+        raise e
 
-    Here is a timeline of major events in the Ancient Sol universe to help you contextualize the article:
 
-    1. 10,901 PN: Atlasian Republic is formed.
-    2. 11,108 PN: Cyclopeans are the first humans to land on the moon.
-    3. 11,125 PN: Atlasians establish the first human city on Mars, Atlas City.
-    4. 11,302 PN: Cyclopeans begin terraforming Venus.
-    5. 11,311 PN: Mars declares independence from Earth.
-    6. 11,355 PN: Polygonals develop a new type of propulsion system.
-    7. 11,440 PN - 11,450 PN: World War on Earth involving multiple civilizations.
-    8. 11,497 PN: The Sun's recurring micronova strikes the Sol system.
-    9. 11,507 PN: Kalen completes the Phobos Monolith with a message to future civilizations.
+async def generate_date_range(
+    text: str, use_cache: bool = True
+) -> Tuple[Optional[int], Optional[int]]:
+    """Generates start and end date range from the inputted text."""
+    try:
+        result = await api_call(
+            build_article_prompt(text),
+            DATE_RANGE_MAX_TOKENS,
+            "date_range",
+            use_cache=use_cache,
+            validate=parse_date_range,
+        )
+        return parse_date_range(result)
+    except (anthropic.APIError, ValueError, SyntaxError) as e:
+        logger.error(f"Error generating date range: {str(e)}")
+        raise e
+
 
-    Now, here is the article you need to analyze:
-    
-    <article>
-    \n\n{text}\n\n
-    </article>
+async def generate_ai_text(text: str, use_cache: bool = True) -> models.ArticleAIText:
+    """Generates the summary, brief and date range of the inputted text in a single call."""
+    try:
+        # Texts over the chunk budget are condensed to their chunk summaries first
+        if chunk_summaries := await summarize_chunks(text):
+            text = "\n\n".join(chunk_summaries)
+        result = await api_call(
+            build_article_prompt(text),
+            AI_TEXT_MAX_TOKENS,
+            "ai_text",
+            use_cache=use_cache,
+            validate=parse_ai_text,
+        )
+        return parse_ai_text(result)
+    except (anthropic.APIError, ValueError) as e:
+        logger.error(f"Error generating AI text: {str(e)}")
+        raise e
 
-    Follow these steps to determine the date range:
 
-    1. Carefully read the entire article, paying special attention to any mentions of dates, years, or historical events.
+async def stream_summary(text: str, use_cache: bool = True) -> AsyncIterator[str]:
+    """Streams a summary of the inputted text, map-reducing texts over the chunk budget."""
+    prompt, task = await build_summary_prompt(text)
+    async for chunk in stream_api_call(prompt, SUMMARY_MAX_TOKENS, task, use_cache=use_cache):
+        yield chunk
 
-    2. Identify all explicit mentions of years or dates in the article.
 
-    3. Look for implicit references to time periods, such as:
-    - Mentions of historical events with known dates
-    - References to technological advancements or cultural phenomena associated with specific time periods
-    - Descriptions of societal or political conditions characteristic of certain eras
+def stream_brief(text: str, use_cache: bool = True) -> AsyncIterator[str]:
+    """Streams a very brief summary of the inputted text."""
+    return stream_api_call(
+        build_article_prompt(text), BRIEF_MAX_TOKENS, "brief", use_cache=use_cache
+    )
 
-    4. If exact years are mentioned:
-    - Identify the earliest year mentioned (year_start)
-    - Identify the latest year mentioned (year_end)
 
-    5. If no exact years are mentioned, infer the most likely time period based on the context and content of the article.
+def stream_date_range(text: str, use_cache: bool = True) -> AsyncIterator[str]:
+    """Streams the raw (year_start, year_end) tuple of the inputted text."""
+    return stream_api_call(
+        build_article_prompt(text),
+        DATE_RANGE_MAX_TOKENS,
+        "date_range",
+        use_cache=use_cache,
+        validate=parse_date_range,
+    )
 
-    6. If the article seems to focus on a single year or a very short period:
-    - Use that year for both year_start and year_end
-    - Or use your judgment to expand slightly to cover the most likely period discussed
 
-    7. If you cannot determine a specific date range:
-    - Use your best judgment to estimate a plausible range based on the content
-    - If even an estimate is impossible, use None for both values
+def build_article_prompt(text: str) -> str:
+    """Builds the variable user message that follows the cached system prompt."""
+    return f"<article>\n{text}\n</article>"
 
-    8. Format your response as a tuple: (year_start, year_end)
 
-    Rules:
-    - Both year_start and year_end should be years in the format YYYY (e.g., 2023)
-    - year_start must be less than or equal to year_end
-    - If you can't determine a start or end year, use None for that value
-    - Do not include any explanation or additional text, just the tuple of two values
+async def build_summary_prompt(text: str) -> Tuple[str, str]:
+    """
+    Builds the (prompt, task) of a summary, reducing the chunk summaries of texts over the
+    chunk budget.
+    """
+    if chunk_summaries := await summarize_chunks(text):
+        sections = [f"<section>\n{summary}\n</section>" for summary in chunk_summaries]
+        return "\n".join(sections), "reduce_summary"
+    return build_article_prompt(text), "summary"
 
-    Examples of valid responses:
-    (1950, 1970)
-    (2000, 2000)
-    (1800, None)
-    (None, 2022)
-    (None, None)
 
-    Analyze the article and provide the date range as a tuple of two values.
+async def summarize_chunks(text: str) -> Optional[list[str]]:
+    """
+    Summarizes the chunks of a text over `SUMMARY_CHUNK_TOKENS` in parallel.
 
-    {AI_PROMPT}
+    Returns None for texts that fit in a single chunk. Chunk summaries always read through the
+    LLM response cache, so an edit to one section only re-summarizes its chunk.
     """
+    estimate = estimate_tokens(text)
+    if estimate.tokens + estimate.error <= settings.SUMMARY_CHUNK_TOKENS:
+        return None
+    chunks = await run_in_process(split_text, text, settings.SUMMARY_CHUNK_TOKENS)
+    if len(chunks) <= 1:
+        return None
+
+    semaphore = asyncio.Semaphore(settings.AI_MAX_CONCURRENCY)
+
+    async def summarize_chunk(chunk: str) -> str:
+        async with semaphore:
+            return await api_call(build_article_prompt(chunk), SUMMARY_MAX_TOKENS, "summary")
+
+    logger.debug(f"Summarizing {len(chunks)} chunks of a {estimate.tokens} token text")
+    return list(await asyncio.gather(*[summarize_chunk(chunk) for chunk in chunks]))
+
+
+def parse_date_range(result: str) -> Tuple[Optional[int], Optional[int]]:
+    """Parses the (year_start, year_end) tuple returned by `generate_date_range`."""
+    # Parse the result, handling potential "None" values
+    start_year, end_year = ast.literal_eval(result.strip())
+    return (start_year, end_year)
+
+
+def parse_ai_text(result: str) -> models.ArticleAIText:
+    """Parses and validates the JSON object returned by `generate_ai_text`."""
+    match = re.search(r"\{.*\}", result, re.DOTALL)
+    if not match:
+        raise ValueError(f"No JSON object in AI text response: {result!r}")
     try:
-        result = api_call(prompt, 100)
-        # Parse the result, handling potential "None" values
-        start_year, end_year = eval(result)
-        return (start_year, end_year)
-    except (anthropic.APIError, ValueError, SyntaxError) as e:
-        print(f"Error generating date range: {str(e)}")
-        raise e
+        return models.ArticleAIText.parse_raw(match.group(0))
+    except pydantic.ValidationError as e:
+        raise ValueError(f"Invalid AI text response: {str(e)}") from e
+
+
+def get_batch_client() -> httpx.AsyncClient:
+    """Creates an HTTP client for the Message Batches API."""
+    return httpx.AsyncClient(
+        base_url=settings.ANTHROPIC_API_URL,
+        headers={
+            "x-api-key": client.api_key or "",
+            "anthropic-version": "2023-06-01",
+            "anthropic-beta": f"{MESSAGE_BATCHES_BETA},{PROMPT_CACHING_BETA}",
+        },
+        timeout=60,
+    )
+
+
+async def create_batch(http: httpx.AsyncClient, requests: list[dict[str, Any]]) -> dict[str, Any]:
+    """Submits a message batch."""
+    response = await http.post("/v1/messages/batches", json={"requests": requests})
+    response.raise_for_status()
+    return dict(response.json())
+
+
+async def wait_for_batch(
+    http: httpx.AsyncClient, batch_id: str, poll_interval: float = settings.AI_BATCH_POLL_SECONDS
+) -> dict[str, Any]:
+    """Polls a message batch until it has ended."""
+    while True:
+        response = await http.get(f"/v1/messages/batches/{batch_id}")
+        response.raise_for_status()
+        batch = dict(response.json())
+        if batch["processing_status"] == "ended":
+            return batch
+        logger.debug(f"Waiting for message batch '{batch_id}': {batch['request_counts']}")
+        await asyncio.sleep(poll_interval)
+
+
+async def iter_batch_results(
+    http: httpx.AsyncClient, batch: dict[str, Any]
+) -> AsyncIterator[dict[str, Any]]:
+    """Streams the JSONL results of an ended message batch."""
+    async with http.stream("GET", batch["results_url"]) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.strip():
+                yield json.loads(line)
+
+
+async def generate_ai_text_batch(
+    texts: dict[str, str],
+    use_cache: bool = True,
+    poll_interval: float = settings.AI_BATCH_POLL_SECONDS,
+) -> dict[str, models.ArticleAIText]:
+    """
+    Generates the AI text of many texts in a single message batch.
+
+    `texts` maps a custom id to a text, and the AI text is returned under the same id. Cached
+    responses are not resubmitted, and failed or unparsable results are logged and left out.
+    """
+    use_cache = use_cache and settings.LLM_CACHE_ENABLED
+    ai_texts: dict[str, models.ArticleAIText] = {}
+    requests = []
+    cache_keys = {}
+    for custom_id, text in texts.items():
+        prompt = build_article_prompt(text)
+        cache_keys[custom_id] = get_cache_key(prompt, AI_TEXT_MAX_TOKENS, "ai_text")
+        if use_cache and (cached := cache.get(cache_keys[custom_id])) is not None:
+            await record_llm_call("ai_text", MODEL, cache_hit=True, article_id=custom_id)
+            ai_texts[custom_id] = parse_ai_text(cached)
+            continue
+        params = build_message_params(prompt, AI_TEXT_MAX_TOKENS, "ai_text")
+        requests.append({"custom_id": custom_id, "params": params})
+
+    if not requests:
+        return ai_texts
+
+    async with get_batch_client() as http:
+        batch = await create_batch(http, requests)
+        logger.info(f"Submitted message batch '{batch['id']}' with {len(requests)} requests")
+        batch = await wait_for_batch(http, batch["id"], poll_interval=poll_interval)
+
+        async for result in iter_batch_results(http, batch):
+            custom_id = result["custom_id"]
+            if result["result"]["type"] != "succeeded":
+                logger.error(f"Batch request '{custom_id}' failed: {result['result']}")
+                await record_llm_call(
+                    "ai_text", MODEL, error=result["result"]["type"], article_id=custom_id
+                )
+                continue
+            usage = result["result"]["message"]["usage"]
+            prompt_cache_stats.record_usage(usage)
+            response = result["result"]["message"]["content"][0]["text"]
+            try:
+                ai_texts[custom_id] = parse_ai_text(response)
+            except ValueError as e:
+                logger.error(f"Batch request '{custom_id}' returned invalid AI text: {str(e)}")
+                await record_llm_call(
+                    "ai_text", MODEL, usage=usage, error=str(e), article_id=custom_id
+                )
+                continue
+            await record_llm_call("ai_text", MODEL, usage=usage, article_id=custom_id)
+            if use_cache:
+                cache.set(cache_keys[custom_id], response)
+
+    return ai_texts
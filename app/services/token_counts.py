@@ -0,0 +1,64 @@
+from typing import Any
+
+from sqlalchemy import or_
+from sqlmodel import Session, select
+
+from app import crud, logger
+from app.core.process_pool import run_in_process
+from app.crud.base import BaseCRUD
+from app.services.tokenizer import TokenEstimator, count_tokens_many, set_estimator
+
+
+async def backfill_token_counts(db: Session, batch_size: int = 500) -> int:
+    """Compute the missing stored token counts of articles and custom codex articles"""
+    updated = 0
+    for model_crud in (crud.article, crud.custom_codex_article):
+        updated += await backfill_model_token_counts(db, model_crud, batch_size=batch_size)
+    logger.success(f"Backfilled token counts for {updated} rows")
+    return updated
+
+
+async def backfill_model_token_counts(
+    db: Session, model_crud: BaseCRUD[Any, Any, Any], batch_size: int = 500
+) -> int:
+    """Compute the missing token counts of one model, committing once per batch"""
+    model = model_crud.model
+    fields = model_crud.token_count_fields
+    statement = (
+        select(model)
+        .where(or_(*[getattr(model, count_field).is_(None) for count_field in fields.values()]))
+        .limit(batch_size)
+    )
+
+    updated = 0
+    while rows := db.exec(statement).all():
+        texts = [getattr(row, text_field) for row in rows for text_field in fields]
+        counts = iter(await run_in_process(count_tokens_many, texts))
+        for row in rows:
+            for count_field in fields.values():
+                setattr(row, count_field, next(counts))
+        db.commit()
+        updated += len(rows)
+        logger.info(f"Backfilled token counts for {updated} {model.__name__} rows")
+    return updated
+
+
+async def calibrate_token_estimator(db: Session, sample_size: int = 1000) -> TokenEstimator:
+    """Fit the token estimator against the stored GPT-2 counts of the corpus"""
+    samples: list[tuple[str, int]] = []
+    for model_crud in (crud.article, crud.custom_codex_article):
+        model = model_crud.model
+        for text_field, count_field in model_crud.token_count_fields.items():
+            text_column = getattr(model, text_field)
+            count_column = getattr(model, count_field)
+            statement = (
+                select(text_column, count_column)
+                .where(text_column.is_not(None), count_column > 0)
+                .limit(sample_size)
+            )
+            samples.extend(db.exec(statement).all())
+
+    estimator = TokenEstimator.fit(samples)
+    set_estimator(estimator)
+    logger.success(f"Calibrated token estimator on {len(samples)} texts: {vars(estimator)}")
+    return estimator
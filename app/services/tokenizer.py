@@ -1,12 +1,147 @@
-from transformers import GPT2Tokenizer
+from typing import Any, Iterable, NamedTuple, Optional, Sequence
+import json
+import math
+from functools import lru_cache
+from pathlib import Path
 
+from app import logger
+from app.paths import TOKEN_ESTIMATOR_FILE
 
-def count_tokens(text, model_name="gpt2"):
-    # Load the tokenizer for the specified model
-    tokenizer = GPT2Tokenizer.from_pretrained(model_name)
+DEFAULT_MODEL_NAME = "gpt2"
 
-    # Tokenize the text
-    tokens = tokenizer.encode(text)
 
-    # Return the number of tokens
-    return len(tokens)
+@lru_cache(maxsize=None)
+def get_tokenizer(model_name: str = DEFAULT_MODEL_NAME) -> Any:
+    """
+    Load the tokenizer for the specified model once per process.
+
+    The Rust-backed fast tokenizer is used when the `tokenizers` package is available,
+    otherwise the pure-python tokenizer is loaded.
+    """
+    from transformers import GPT2Tokenizer, GPT2TokenizerFast
+    from transformers.utils import is_tokenizers_available
+
+    tokenizer_class = GPT2TokenizerFast if is_tokenizers_available() else GPT2Tokenizer
+    tokenizer = tokenizer_class.from_pretrained(model_name)
+    logger.debug(f"Loaded '{model_name}' tokenizer ({tokenizer_class.__name__})")
+    return tokenizer
+
+
+def warm_up(model_name: str = DEFAULT_MODEL_NAME) -> None:
+    """Load the tokenizer ahead of the first request"""
+    try:
+        get_tokenizer(model_name)
+    except OSError as e:
+        logger.warning(f"Could not load '{model_name}' tokenizer: {str(e)}")
+
+
+def count_tokens(text: Optional[str], model_name: str = DEFAULT_MODEL_NAME) -> int:
+    """Count the tokens in a single text"""
+    return count_tokens_many([text], model_name=model_name)[0]
+
+
+def count_tokens_many(
+    texts: Sequence[Optional[str]], model_name: str = DEFAULT_MODEL_NAME
+) -> list[int]:
+    """
+    Count the tokens of every text in a single batched tokenizer call.
+
+    Empty or missing texts count as 0 tokens and are not sent to the tokenizer.
+    """
+    counts = [0] * len(texts)
+    indexes = [i for i, text in enumerate(texts) if text]
+    if not indexes:
+        return counts
+
+    tokenizer = get_tokenizer(model_name)
+    encoded = tokenizer(
+        [texts[i] for i in indexes],
+        add_special_tokens=False,
+        return_attention_mask=False,
+        verbose=False,
+    )
+    for i, input_ids in zip(indexes, encoded["input_ids"]):
+        counts[i] = len(input_ids)
+    return counts
+
+
+class TokenEstimate(NamedTuple):
+    tokens: int
+    error: int
+
+
+class TokenEstimator:
+    """
+    Approximates GPT-2 token counts from the character and word counts of a text.
+
+    The ratios are fitted against exact token counts with `fit()`. The 95th percentile of the
+    relative error seen while fitting is reported as the error bound of every estimate.
+    """
+
+    def __init__(
+        self, char_ratio: float = 0.25, word_ratio: float = 0.0, relative_error: float = 0.25
+    ) -> None:
+        self.char_ratio = char_ratio
+        self.word_ratio = word_ratio
+        self.relative_error = relative_error
+
+    def estimate(self, text: Optional[str]) -> TokenEstimate:
+        """Estimate the tokens of a single text"""
+        if not text:
+            return TokenEstimate(tokens=0, error=0)
+        tokens = self.char_ratio * len(text) + self.word_ratio * len(text.split())
+        return TokenEstimate(tokens=round(tokens), error=math.ceil(tokens * self.relative_error))
+
+    @classmethod
+    def fit(cls, samples: Iterable[tuple[str, int]]) -> "TokenEstimator":
+        """
+        Fit the ratios to (text, exact token count) samples with least squares.
+        """
+        rows = [(len(text), len(text.split()), tokens) for text, tokens in samples if tokens]
+        if not rows:
+            raise ValueError("Cannot fit a token estimator without samples")
+
+        cc = sum(c * c for c, _, _ in rows)
+        cw = sum(c * w for c, w, _ in rows)
+        ww = sum(w * w for _, w, _ in rows)
+        ct = sum(c * t for c, _, t in rows)
+        wt = sum(w * t for _, w, t in rows)
+        det = cc * ww - cw * cw
+        if det:
+            char_ratio = (ct * ww - wt * cw) / det
+            word_ratio = (wt * cc - ct * cw) / det
+        else:
+            char_ratio, word_ratio = ct / cc, 0.0
+
+        errors = sorted(abs(char_ratio * c + word_ratio * w - t) / t for c, w, t in rows)
+        relative_error = errors[min(len(errors) - 1, math.ceil(len(errors) * 0.95) - 1)]
+        return cls(char_ratio=char_ratio, word_ratio=word_ratio, relative_error=relative_error)
+
+    def save(self, path: Path = TOKEN_ESTIMATOR_FILE) -> None:
+        """Persist the fitted ratios"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(vars(self)))
+
+    @classmethod
+    def load(cls, path: Path = TOKEN_ESTIMATOR_FILE) -> "TokenEstimator":
+        """Load the fitted ratios, falling back to uncalibrated defaults"""
+        if not path.exists():
+            return cls()
+        return cls(**json.loads(path.read_text()))
+
+
+@lru_cache(maxsize=None)
+def get_estimator() -> TokenEstimator:
+    """Load the token estimator once per process"""
+    return TokenEstimator.load()
+
+
+def set_estimator(estimator: TokenEstimator) -> None:
+    """Persist a newly fitted token estimator and use it for this process"""
+    estimator.save()
+    get_estimator.cache_clear()
+
+
+def estimate_tokens(text: Optional[str]) -> TokenEstimate:
+    """Estimate the tokens of a single text without running the tokenizer"""
+    return get_estimator().estimate(text)
@@ -1,38 +1,22 @@
-import requests
-from bs4 import BeautifulSoup
-from typing import Dict, List, Optional, Any
-import re
-from app import settings, logger
-
+from typing import Any, AnyStr, Iterable, Iterator, Optional, TypeVar, Union
 
-def login_to_worldanvil(
-    session: requests.Session, username: str, password: str
-) -> requests.Session | None:
-    login_url = "https://www.worldanvil.com/login_check"
-    login_page = session.get("https://www.worldanvil.com/login")
-    soup = BeautifulSoup(login_page.content, "lxml")
+import gzip
+import re
+from pathlib import Path
 
-    csrf_token_input = soup.find("input", {"type": "hidden", "name": "_csrf_token"})
-    csrf_token = csrf_token_input.get("value")
+from bs4 import BeautifulSoup, Tag
+from lxml import etree
 
-    login_data = {
-        "_csrf_token": csrf_token,
-        "_username": username,
-        "_password": password,
-        "_remember_me": "on",
-        "_submit": "Log in",
-    }
+from app import settings
 
-    response = session.post(login_url, data=login_data)
-    return session if response.ok else None
+EXPORT_URL = "https://www.worldanvil.com/world/ancient-sol-tv76/export"
+ARTICLE_CONTAINER_CLASS = "article-print-container"
+STREAM_CHUNK_SIZE = 64 * 1024
 
+T = TypeVar("T")
 
-def get_export_content(session: requests.Session, export_url: str) -> Optional[str]:
-    response = session.get(export_url)
-    if response.ok:
-        return str(response.text)
-    else:
-        return None
+# BeautifulSoup leaves the strings inside these tags out of `get_text()`
+NON_TEXT_TAGS = {"script", "style", "template", "rt", "rp"}
 
 
 def extract_article_id(soup: BeautifulSoup) -> str:
@@ -61,12 +45,15 @@ def extract_content(soup: BeautifulSoup) -> str:
     return str(content_div.get_text(separator="\n", strip=True)) if content_div else ""
 
 
-def extract_tags(soup: BeautifulSoup) -> list[str]:
-    """Extract tags from the article HTML."""
-    tags: list[str] = []
-
-    # Look for the metadata div
+def extract_metadata(soup: BeautifulSoup) -> Optional[Tag]:
+    """Find the metadata block of the article, which holds its tags, category and template."""
     metadata_div = soup.find("div", id="metadata")
+    return metadata_div if isinstance(metadata_div, Tag) else None
+
+
+def extract_tags(metadata_div: Optional[Tag]) -> list[str]:
+    """Extract tags from the metadata block of the article."""
+    tags: list[str] = []
     if not metadata_div:
         return tags
 
@@ -84,14 +71,13 @@ def extract_tags(soup: BeautifulSoup) -> list[str]:
     return tags
 
 
-def extract_template(soup: BeautifulSoup) -> Optional[str]:
-    """Extract the article template from the article HTML."""
-    metadata_div = soup.find("div", id="metadata")
+def extract_template(metadata_div: Optional[Tag]) -> Optional[str]:
+    """Extract the article template from the metadata block of the article."""
     if metadata_div:
         template_row = metadata_div.find(
-            "div",
-            lambda tag: tag.name == "div" and tag.find("div", string="Article template"),
-            class_="row",
+            lambda tag: tag.name == "div"
+            and "row" in tag.get("class", [])
+            and tag.find("div", string="Article template")
         )
         if template_row:
             template_value = template_row.find("div", class_="metadata-value")
@@ -100,9 +86,8 @@ def extract_template(soup: BeautifulSoup) -> Optional[str]:
     return None
 
 
-def extract_category(soup: BeautifulSoup) -> Optional[str]:
-    """Extract the category from the article HTML."""
-    metadata_div = soup.find("div", id="metadata")
+def extract_category(metadata_div: Optional[Tag]) -> Optional[str]:
+    """Extract the category from the metadata block of the article."""
     if not metadata_div:
         return None
 
@@ -120,21 +105,15 @@ def extract_category(soup: BeautifulSoup) -> Optional[str]:
 def parse_single_article(article_html: str) -> dict[str, Any]:
     """Parse a single article from its HTML content."""
     soup = BeautifulSoup(article_html, "lxml")
-
-    id_ = extract_article_id(soup)
-    title = extract_title(soup)
-    content = extract_content(soup)
-    tags = extract_tags(soup)
-    category = extract_category(soup)
-    template = extract_template(soup)
+    metadata_div = extract_metadata(soup)
 
     return {
-        "id": id_,
-        "title": title,
-        "content": content,
-        "tags": tags,
-        "category": category,
-        "template": template,
+        "id": extract_article_id(soup),
+        "title": extract_title(soup),
+        "content": extract_content(soup),
+        "tags": extract_tags(metadata_div),
+        "category": extract_category(metadata_div),
+        "template": extract_template(metadata_div),
     }
 
 
@@ -146,29 +125,260 @@ def split_articles(full_html: str) -> list[Any]:
 
 def get_articles_from_html(html_content: str) -> list[Any]:
     """Import all articles from the full HTML content."""
-    article_divs = split_articles(html_content)
-    return [parse_single_article(str(article_div)) for article_div in article_divs]
+    return list(iter_articles(iter_html_chunks(html_content)))
+
+
+def split_article_html(full_html: str) -> list[str]:
+    """Split the full HTML into the HTML of each article."""
+    return list(iter_article_html(iter_html_chunks(full_html)))
+
+
+def iter_export_file_chunks(path: Path) -> Iterator[bytes]:
+    """Read an export file, or a gzipped export snapshot, in chunks for the streaming parser"""
+    with gzip.open(path, "rb") if path.suffix == ".gz" else path.open("rb") as file:
+        yield from iter_article_chunks(iter(lambda: file.read(STREAM_CHUNK_SIZE), b""))
+
+
+def iter_html_chunks(html: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """Split the HTML of an export into chunks of about `chunk_size` for the streaming parser"""
+    return iter_article_chunks(html[i : i + chunk_size] for i in range(0, len(html), chunk_size))
+
+
+def iter_article_chunks(blocks: Iterable[AnyStr]) -> Iterator[AnyStr]:
+    """
+    Regroup blocks of an export into chunks that end right before an article container.
+
+    libxml2's push parser mishandles chunks that end inside a doctype or the end tag of a
+    script or style, so chunks are only cut where the next article starts.
+    """
+    buffer = None
+    for block in blocks:
+        buffer = block if buffer is None else buffer + block
+        is_bytes = isinstance(buffer, bytes)
+        marker = ARTICLE_CONTAINER_CLASS.encode() if is_bytes else ARTICLE_CONTAINER_CLASS
+        marker_start = buffer.rfind(marker)  # type: ignore
+        if marker_start == -1:
+            continue
+        tag_start = buffer.rfind(b"<" if is_bytes else "<", 0, marker_start)  # type: ignore
+        if tag_start > 0:
+            yield buffer[:tag_start]
+            buffer = buffer[tag_start:]
+    if buffer:
+        yield buffer
+
+
+def iter_article_elements(chunks: Iterable[Union[str, bytes]]) -> Iterator[Any]:
+    """
+    Stream the article containers of an export as it is read, without building its full tree.
+    The chunks must be cut by `iter_article_chunks`.
+
+    Each container is freed, along with everything before it, once the consumer moves on to
+    the next one, so memory is bounded by the largest article rather than the export.
+    """
+    parser = etree.HTMLPullParser(events=("end",), tag="div")
+
+    def read_events() -> Iterator[Any]:
+        for _, element in parser.read_events():
+            if not has_class(element, ARTICLE_CONTAINER_CLASS):
+                continue
+            yield element
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from read_events()
+    parser.close()
+    yield from read_events()
+
+
+def iter_articles(chunks: Iterable[Union[str, bytes]]) -> Iterator[dict[str, Any]]:
+    """Stream the articles of an export in a single pass, one dict per article"""
+    for element in iter_article_elements(chunks):
+        yield parse_article_element(element)
+
+
+def iter_batches(items: Iterable[T], batch_size: int) -> Iterator[list[T]]:
+    """Group `items` into lists of up to `batch_size` items"""
+    batch: list[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def put_article_html_batches(
+    batches: Any,
+    export_html: Optional[str] = None,
+    export_path: Optional[Path] = None,
+    batch_size: int = settings.IMPORT_PARSE_BATCH_SIZE,
+) -> None:
+    """
+    Split an export in a single pass, putting the HTML of each batch of articles on the
+    `batches` queue as soon as it is split. Ends with `None`, or with the exception that
+    stopped the split.
+
+    A bounded queue pauses the split until the consumer catches up, so neither side holds
+    the whole export.
+    """
+    try:
+        if export_html is not None:
+            chunks: Iterable[Union[str, bytes]] = iter_html_chunks(export_html)
+        elif export_path is not None:
+            chunks = iter_export_file_chunks(export_path)
+        else:
+            raise ValueError("Either export_html or export_path is required")
+        for batch in iter_batches(iter_article_html(chunks), batch_size):
+            batches.put(batch)
+    except Exception as e:  # pylint: disable=broad-except
+        batches.put(e)
+    else:
+        batches.put(None)
+
+
+def iter_article_html(chunks: Iterable[Union[str, bytes]]) -> Iterator[str]:
+    """Stream the HTML of each article of an export"""
+    for element in iter_article_elements(chunks):
+        yield etree.tostring(element, encoding="unicode", method="html", with_tail=False)
 
 
-def import_articles(username: str, password: str, export_url: str) -> List[Dict[str, Any]]:
-    with requests.Session() as session:
-        logged_in_session = login_to_worldanvil(session, username, password)
-        if not logged_in_session:
-            raise Exception("Failed to log in to WorldAnvil")
+def has_class(element: Any, class_name: str) -> bool:
+    classes = element.get("class")
+    return classes is not None and (class_name in classes.split() or classes == class_name)
 
-        html_content = get_export_content(logged_in_session, export_url)
-        if not html_content:
-            raise Exception("Failed to retrieve export content from WorldAnvil")
 
-        articles = get_articles_from_html(html_content)
+def get_text(element: Any, separator: str = "", strip: bool = False) -> str:
+    """Get the text of an element like BeautifulSoup's `get_text()`"""
+    strings = iter_strings(element)
+    if strip:
+        strings = (string.strip() for string in strings if string.strip())
+    return separator.join(strings)
+
+
+def iter_strings(element: Any) -> Iterator[str]:
+    # Comments and processing instructions do not have a string tag
+    if not isinstance(element.tag, str) or element.tag in NON_TEXT_TAGS:
+        return
+    if element.text:
+        yield element.text
+    for child in element:
+        yield from iter_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def get_string(element: Any) -> Optional[str]:
+    """Get the only string of an element like BeautifulSoup's `.string`"""
+    children = list(element)
+    if element.text:
+        return element.text if not children else None
+    if len(children) != 1 or children[0].tail:
+        return None
+    if not isinstance(children[0].tag, str):
+        return str(children[0].text)
+    return get_string(children[0])
+
+
+def find_element(
+    root: Any,
+    tag: str,
+    class_name: Optional[str] = None,
+    id_: Optional[str] = None,
+    string: Optional[str] = None,
+) -> Optional[Any]:
+    """Find the first descendant matching the filters, like BeautifulSoup's `find()`"""
+    for element in root.iterdescendants(tag):
+        if class_name is not None and not has_class(element, class_name):
+            continue
+        if id_ is not None and element.get("id") != id_:
+            continue
+        if string is not None and get_string(element) != string:
+            continue
+        return element
+    return None
+
+
+def find_next_element(root: Any, start: Any, tag: str, class_name: str) -> Optional[Any]:
+    """Find the first element after `start` in document order, like `find_next()`"""
+    elements = root.iter()
+    for element in elements:
+        if element is start:
+            break
+    for element in elements:
+        if element.tag == tag and has_class(element, class_name):
+            return element
+    return None
+
+
+def parse_article_element(container: Any) -> dict[str, Any]:
+    """Parse an article from its container element, matching `parse_single_article`."""
+    if container.get("id") is None:
+        raise ValueError("Article container has no id")
+
+    title_elem = find_element(container, "h1", "m-b-0")
+    content_div = find_element(container, "div", "article-content-left")
+
+    tags: list[str] = []
+    category = None
+    template = None
+    metadata_div = find_element(container, "div", id_="metadata")
+    if metadata_div is not None:
+        tags_div = find_element(metadata_div, "div", "col-md-3")
+        tags_row = find_element(tags_div, "div", "row") if tags_div is not None else None
+        tags_value_div = (
+            find_element(tags_row, "div", "metadata-value") if tags_row is not None else None
+        )
+        if tags_value_div is not None:
+            tags = [
+                get_text(tag).strip()
+                for tag in tags_value_div.iterdescendants("a")
+                if has_class(tag, "explorer-tag")
+            ]
+
+        category_label = find_element(metadata_div, "div", "metadata-label", string="Category")
+        if category_label is not None:
+            category_value = find_next_element(container, category_label, "div", "metadata-value")
+            category_link = (
+                find_element(category_value, "a") if category_value is not None else None
+            )
+            if category_link is not None:
+                category = get_text(category_link).strip()
+
+        for template_row in metadata_div.iterdescendants("div"):
+            if (
+                has_class(template_row, "row")
+                and find_element(template_row, "div", string="Article template") is not None
+            ):
+                template_value = find_element(template_row, "div", "metadata-value")
+                if template_value is not None:
+                    template = get_text(template_value).strip()
+                break
+
+    title = clean_title(get_text(title_elem).strip()) if title_elem is not None else "Untitled"
+    content = get_text(content_div, separator="\n", strip=True) if content_div is not None else ""
+    return {
+        "id": str(container.get("id")).replace("article-", ""),
+        "title": title,
+        "content": content,
+        "tags": tags,
+        "category": category,
+        "template": template,
+    }
 
-        return articles
 
+def parse_article_html(article_html: str) -> dict[str, Any]:
+    """Parse a single article from its HTML content with lxml, matching `parse_single_article`."""
+    root = etree.fromstring(article_html, etree.HTMLParser())
+    container = find_element(root, "div", ARTICLE_CONTAINER_CLASS) if root is not None else None
+    if container is None:
+        raise ValueError("Article HTML has no article container")
+    return parse_article_element(container)
 
-def get_articles_from_worldanvil() -> List[Dict[str, Any]]:
-    """Login to WorldAnvil and retrieve all articles"""
-    export_url = "https://www.worldanvil.com/world/ancient-sol-tv76/export"
-    username = settings.WORLDANVIL_USERNAME
-    password = settings.WORLDANVIL_PASSWORD
 
-    return import_articles(username=username, password=password, export_url=export_url)
+def parse_articles(articles_html: list[str]) -> list[dict[str, Any]]:
+    """Parse a batch of articles from their HTML content."""
+    return [parse_article_html(article_html) for article_html in articles_html]
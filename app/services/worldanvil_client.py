@@ -0,0 +1,222 @@
+from typing import NamedTuple, Optional
+import asyncio
+import hashlib
+import os
+from http.cookiejar import LoadError, LWPCookieJar
+from pathlib import Path
+
+import httpx
+from bs4 import BeautifulSoup
+
+from app import logger, settings
+from app.paths import WORLDANVIL_COOKIES_FILE, WORLDANVIL_EXPORT_FILE
+from app.services.export_snapshots import snapshots
+from app.services.worldanvil import EXPORT_URL
+
+BASE_URL = "https://www.worldanvil.com"
+LOGIN_PATH = "/login"
+LOGIN_CHECK_PATH = "/login_check"
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class WorldAnvilError(Exception):
+    pass
+
+
+class ExportDownload(NamedTuple):
+    """A downloaded export, or only its validators when it was not modified"""
+
+    path: Optional[Path]
+    content_hash: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+def is_login_page(response: httpx.Response) -> bool:
+    """Whether World Anvil answered with its login page, i.e. the session has expired"""
+    return response.status_code in (401, 403) or response.url.path.rstrip("/") == LOGIN_PATH
+
+
+class WorldAnvilClient:
+    """
+    Async World Anvil client on a pooled `httpx.AsyncClient`.
+
+    The cookie jar of the login session is persisted, so the client only logs in again when
+    World Anvil sends a request to its login page.
+    """
+
+    def __init__(
+        self,
+        username: str = settings.WORLDANVIL_USERNAME,
+        password: str = settings.WORLDANVIL_PASSWORD,
+        cookies_file: Path = WORLDANVIL_COOKIES_FILE,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.username = username
+        self.password = password
+        self.cookies_file = cookies_file
+        self.cookie_jar = LWPCookieJar(str(cookies_file))
+        if cookies_file.exists():
+            try:
+                self.cookie_jar.load(ignore_discard=True)
+            except (LoadError, OSError):
+                logger.warning(f"Ignoring unreadable World Anvil cookies in '{cookies_file}'")
+
+        self.client = httpx.AsyncClient(
+            base_url=BASE_URL,
+            cookies=self.cookie_jar,
+            follow_redirects=True,
+            timeout=settings.WORLDANVIL_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=settings.WORLDANVIL_MAX_CONNECTIONS),
+            transport=transport,
+        )
+        self.login_lock = asyncio.Lock()
+        self.logins = 0
+
+    async def login(self) -> None:
+        """
+        Log in with the CSRF token of the login form, and persist the session cookies.
+
+        Raises:
+            WorldAnvilError: If the login form is missing or the credentials are rejected.
+        """
+        login_page = await self.client.get(LOGIN_PATH)
+        soup = BeautifulSoup(login_page.content, "lxml")
+        csrf_token_input = soup.find("input", {"type": "hidden", "name": "_csrf_token"})
+        if csrf_token_input is None:
+            raise WorldAnvilError("Failed to find the login form of WorldAnvil")
+
+        login_data = {
+            "_csrf_token": csrf_token_input.get("value"),
+            "_username": self.username,
+            "_password": self.password,
+            "_remember_me": "on",
+            "_submit": "Log in",
+        }
+        response = await self.client.post(LOGIN_CHECK_PATH, data=login_data)
+        if not response.is_success or is_login_page(response):
+            raise WorldAnvilError("Failed to log in to WorldAnvil")
+
+        self.logins += 1
+        await asyncio.to_thread(self.save_cookies)
+        logger.info("Logged in to WorldAnvil")
+
+    async def relogin(self, logins: int) -> None:
+        """Log in again, unless a concurrent request already did since `logins` was read"""
+        async with self.login_lock:
+            if self.logins == logins:
+                await self.login()
+
+    def save_cookies(self) -> None:
+        self.cookies_file.parent.mkdir(parents=True, exist_ok=True)
+        self.cookie_jar.save(ignore_discard=True)
+        os.chmod(self.cookies_file, 0o600)
+
+    async def download_export(
+        self,
+        export_url: str,
+        path: Path,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> ExportDownload:
+        """
+        Stream the export to `path` with a conditional request, logging in if needed.
+
+        The body is written to a temporary file that replaces `path` once it is complete, and
+        is hashed as it is written.
+
+        Raises:
+            WorldAnvilError: If the export cannot be downloaded.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        for attempt in range(2):
+            logins = self.logins
+            async with self.client.stream("GET", export_url, headers=headers) as response:
+                if not is_login_page(response):
+                    if response.status_code == 304:
+                        return ExportDownload(None, None, etag, last_modified)
+                    if not response.is_success:
+                        raise WorldAnvilError(
+                            f"Failed to retrieve export content from WorldAnvil: "
+                            f"{response.status_code}"
+                        )
+                    content_hash = await self.write_body(response, path)
+                    return ExportDownload(
+                        path,
+                        content_hash,
+                        response.headers.get("ETag"),
+                        response.headers.get("Last-Modified"),
+                    )
+
+            if attempt:
+                break
+            logger.info("WorldAnvil session expired, logging in again")
+            await self.relogin(logins)
+
+        raise WorldAnvilError("Failed to retrieve export content from WorldAnvil: logged out")
+
+    async def write_body(self, response: httpx.Response, path: Path) -> str:
+        """Write the body of a streamed response to `path`, returning its sha256"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial_path = path.with_name(f"{path.name}.part")
+        content_hash = hashlib.sha256()
+        size = 0
+        try:
+            with partial_path.open("wb") as file:
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    content_hash.update(chunk)
+                    size += len(chunk)
+                    await asyncio.to_thread(file.write, chunk)
+        except BaseException:
+            partial_path.unlink(missing_ok=True)
+            raise
+        os.replace(partial_path, path)
+        logger.info(f"Downloaded WorldAnvil export ({size / 1024 / 1024:.1f} MB)")
+        return content_hash.hexdigest()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+_client: Optional[WorldAnvilClient] = None
+
+
+def get_client() -> WorldAnvilClient:
+    """Get the shared client, so imports reuse its connections and login session"""
+    global _client  # pylint: disable=global-statement
+    if _client is None:
+        _client = WorldAnvilClient()
+    return _client
+
+
+async def close_client() -> None:
+    global _client  # pylint: disable=global-statement
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def download_export_from_worldanvil(
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    path: Path = WORLDANVIL_EXPORT_FILE,
+) -> ExportDownload:
+    """
+    Download the export to `path`, unless it is unchanged since `etag` or `last_modified`.
+
+    Each downloaded export is kept as a snapshot, so it can be imported again offline.
+    """
+    download = await get_client().download_export(
+        EXPORT_URL, path, etag=etag, last_modified=last_modified
+    )
+    if download.path is not None and download.content_hash is not None:
+        try:
+            await snapshots.save(download.path, download.content_hash)
+        except OSError:
+            logger.exception("Failed to save the export snapshot")
+    return download
@@ -0,0 +1,60 @@
+from typing import Optional
+import time
+from datetime import datetime
+
+from sqlmodel import Session
+
+from app import crud, logger, models
+from app.services.articles import ProgressCallback
+from app.services.import_pipeline import ArticleImport
+from app.services.worldanvil import EXPORT_URL
+from app.services.worldanvil_client import download_export_from_worldanvil
+
+
+async def sync_worldanvil(db: Session, on_progress: Optional[ProgressCallback] = None) -> None:
+    """
+    Import the World Anvil export if it changed since the last sync.
+
+    The export is fetched with the ETag and Last-Modified of the last sync, and is only parsed
+    when the server sends a new export whose content hash differs from the last one imported.
+    The validators and hash are saved once the import succeeds, so a failed import is retried
+    by the next sync.
+
+    Args:
+        db (Session): The database session.
+        on_progress (Optional[ProgressCallback]): Reports (done, total) imported articles.
+    """
+    started = time.perf_counter()
+    sync_state = await crud.worldanvil_sync.get_or_create(db=db, export_url=EXPORT_URL)
+    sync_update = models.WorldAnvilSyncUpdate(
+        checks=sync_state.checks + 1, checked_at=datetime.utcnow()
+    )
+
+    download = await download_export_from_worldanvil(
+        etag=sync_state.etag, last_modified=sync_state.last_modified
+    )
+    # Store a missing validator as empty, since updates skip None values
+    etag, last_modified = download.etag or "", download.last_modified or ""
+    if download.path is None:
+        sync_update.not_modified = sync_state.not_modified + 1
+        outcome = "not modified"
+    elif download.content_hash == sync_state.content_hash:
+        sync_update.unchanged = sync_state.unchanged + 1
+        sync_update.etag, sync_update.last_modified = etag, last_modified
+        outcome = "unchanged"
+    else:
+        await ArticleImport(db=db, on_progress=on_progress).run(
+            export_path=download.path, export_hash=download.content_hash
+        )
+        sync_update.imports = sync_state.imports + 1
+        sync_update.etag, sync_update.last_modified = etag, last_modified
+        sync_update.content_hash = download.content_hash
+        sync_update.changed_at = datetime.utcnow()
+        outcome = "imported"
+
+    sync_state = await crud.worldanvil_sync.update(db=db, id=sync_state.id, obj_in=sync_update)
+    logger.success(
+        f"World Anvil sync {outcome} in {time.perf_counter() - started:.1f}s "
+        f"({sync_state.checks} checks: {sync_state.not_modified} not modified, "
+        f"{sync_state.unchanged} unchanged, {sync_state.imports} imported)"
+    )
@@ -1,16 +1,25 @@
-from typing import Optional
-from fastapi import APIRouter, Depends, Form, Request, status
-from fastapi.responses import HTMLResponse, RedirectResponse, Response
+import json
+from typing import AsyncIterator, Optional
+
+import anthropic
+from fastapi import APIRouter, Depends, Form, HTTPException, Request, status
+from fastapi.responses import HTMLResponse, RedirectResponse, Response, StreamingResponse
 from sqlmodel import Session
 
-from app import crud, models
+from app import crud, logger, models
 from app.views import deps, templates
 from app.services.articles import (
-    generate_all_ai_text,
     generate_new_article_brief,
     generate_new_article_date_range,
     generate_new_article_summary,
-    import_articles_from_worldanvil,
+    stream_new_article_ai_text,
+)
+from app.services.export_snapshots import snapshots
+from app.services.jobs import (
+    JOB_GENERATE_AI_TEXT,
+    JOB_IMPORT_ARTICLES,
+    JOB_IMPORT_SNAPSHOT,
+    enqueue_job,
 )
 
 router = APIRouter()
@@ -85,7 +94,7 @@ async def generate_ai_text_for_all_articles(
     ),
 ) -> Response:
     """
-    Returns HTML response with list of all articles from all users.
+    Queues a job generating the missing AI text of all articles.
 
     Args:
         request(Request): The request object
@@ -93,14 +102,14 @@ async def generate_ai_text_for_all_articles(
         current_user(User): The authenticated superuser.
 
     Returns:
-        Response: HTML page with the articles
+        Response: Redirect to the articles page
 
     """
     alerts = models.Alerts()
 
-    await generate_all_ai_text(db=db)
+    await enqueue_job(db=db, kind=JOB_GENERATE_AI_TEXT)
 
-    alerts.success.append("Generating ai text for all articles.")
+    alerts.success.append("Generating ai text for all articles. Follow its progress under Jobs.")
 
     response = RedirectResponse(url="/articles", status_code=status.HTTP_303_SEE_OTHER)
     response.set_cookie(key="alerts", value=alerts.json(), max_age=5, httponly=True)
@@ -361,13 +370,39 @@ async def import_articles(
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Response:
     """
-    Imports articles from World Anvil
+    Queues a job importing articles from World Anvil
     """
     alerts = models.Alerts()
 
-    await import_articles_from_worldanvil()
+    await enqueue_job(db=db, kind=JOB_IMPORT_ARTICLES)
+
+    alerts.success.append("Importing articles from World Anvil. Follow its progress under Jobs.")
+
+    response = RedirectResponse(url="/articles", status_code=status.HTTP_303_SEE_OTHER)
+    response.set_cookie(key="alerts", value=alerts.json(), max_age=5, httponly=True)
+    return response
+
 
-    alerts.success.append("Article's Imported from World Anvil.")
+@router.post("/import-snapshot", response_class=HTMLResponse)
+async def import_snapshot(
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Response:
+    """
+    Queues a job importing the newest World Anvil export snapshot, without downloading it
+    """
+    alerts = models.Alerts()
+
+    snapshot = snapshots.get()
+    if snapshot is None:
+        alerts.danger.append("No export snapshot yet. Import articles from World Anvil first.")
+    else:
+        await enqueue_job(db=db, kind=JOB_IMPORT_SNAPSHOT)
+        alerts.success.append(
+            f"Importing export snapshot {snapshot.content_hash[:12]} from "
+            f"{snapshot.created_at:%Y-%m-%d %H:%M}. Follow its progress under Jobs."
+        )
 
     response = RedirectResponse(url="/articles", status_code=status.HTTP_303_SEE_OTHER)
     response.set_cookie(key="alerts", value=alerts.json(), max_age=5, httponly=True)
@@ -401,7 +436,7 @@ async def generate_article_summary(
 
     alerts.success.append("Article's summary was generated")
 
-    response = RedirectResponse(url="/article/{article_id}", status_code=status.HTTP_303_SEE_OTHER)
+    response = RedirectResponse(url=f"/article/{article_id}", status_code=status.HTTP_303_SEE_OTHER)
     response.set_cookie(key="alerts", value=alerts.json(), max_age=5, httponly=True)
     return response
 
@@ -433,7 +468,7 @@ async def generate_article_brief(
 
     alerts.success.append("Article's brief was generated")
 
-    response = RedirectResponse(url="/article/{article_id}", status_code=status.HTTP_303_SEE_OTHER)
+    response = RedirectResponse(url=f"/article/{article_id}", status_code=status.HTTP_303_SEE_OTHER)
     response.set_cookie(key="alerts", value=alerts.json(), max_age=5, httponly=True)
     return response
 
@@ -465,6 +500,120 @@ async def generate_article_brief(
 
     alerts.success.append("Article's date range was generated")
 
-    response = RedirectResponse(url="/article/{article_id}", status_code=status.HTTP_303_SEE_OTHER)
+    response = RedirectResponse(url=f"/article/{article_id}", status_code=status.HTTP_303_SEE_OTHER)
     response.set_cookie(key="alerts", value=alerts.json(), max_age=5, httponly=True)
     return response
+
+
+def format_sse(event: str, data: object) -> str:
+    """Format a Server-Sent Event with JSON encoded data"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def get_ai_text_event_stream(db: Session, article_id: str, task: str) -> AsyncIterator[str]:
+    """
+    Stream the generated text of the article as `token` events, followed by a `done` event with
+    the updated article fields or an `error` event.
+    """
+    try:
+        async for chunk in stream_new_article_ai_text(db=db, article_id=article_id, task=task):
+            yield format_sse("token", chunk)
+    except (anthropic.APIError, ValueError, SyntaxError) as e:
+        logger.error(f"Failed to stream article {task.replace('_', ' ')}: {str(e)}")
+        yield format_sse("error", str(e))
+        return
+
+    article = await crud.article.get(db=db, id=article_id)
+    yield format_sse(
+        "done",
+        {
+            "summary": article.summary,
+            "brief": article.brief,
+            "year_start": article.year_start,
+            "year_end": article.year_end,
+        },
+    )
+
+
+async def get_ai_text_streaming_response(
+    db: Session, article_id: str, task: str
+) -> StreamingResponse:
+    """Return the Server-Sent Events response of the generated text of the article"""
+    try:
+        await crud.article.get(db=db, id=article_id)
+    except crud.RecordNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Article not found"
+        ) from e
+
+    return StreamingResponse(
+        get_ai_text_event_stream(db=db, article_id=article_id, task=task),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/article/{article_id}/generate-summary/stream")
+async def stream_article_summary(
+    article_id: str,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(  # pylint: disable=unused-argument
+        deps.get_current_active_user
+    ),
+) -> StreamingResponse:
+    """
+    Stream the generated Article Summary over Server-Sent Events
+
+    Args:
+        article_id(str): The article id
+        db(Session): The database session.
+        current_user(User): The authenticated user.
+
+    Returns:
+        StreamingResponse: Event stream of the summary
+    """
+    return await get_ai_text_streaming_response(db=db, article_id=article_id, task="summary")
+
+
+@router.get("/article/{article_id}/generate-brief/stream")
+async def stream_article_brief(
+    article_id: str,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(  # pylint: disable=unused-argument
+        deps.get_current_active_user
+    ),
+) -> StreamingResponse:
+    """
+    Stream the generated Article brief over Server-Sent Events
+
+    Args:
+        article_id(str): The article id
+        db(Session): The database session.
+        current_user(User): The authenticated user.
+
+    Returns:
+        StreamingResponse: Event stream of the brief
+    """
+    return await get_ai_text_streaming_response(db=db, article_id=article_id, task="brief")
+
+
+@router.get("/article/{article_id}/generate-date-range/stream")
+async def stream_article_date_range(
+    article_id: str,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(  # pylint: disable=unused-argument
+        deps.get_current_active_user
+    ),
+) -> StreamingResponse:
+    """
+    Stream the generated Article date range over Server-Sent Events
+
+    Args:
+        article_id(str): The article id
+        db(Session): The database session.
+        current_user(User): The authenticated user.
+
+    Returns:
+        StreamingResponse: Event stream of the date range
+    """
+    return await get_ai_text_streaming_response(db=db, article_id=article_id, task="date_range")
@@ -208,7 +208,7 @@ async def edit_custom_codex(
         custom_codex_articles = await crud.custom_codex_article.get_multi_by_codex_id(
             db, codex_id=codex_id
         )
-        context_length = await calculate_context_length(db=db, codex_id=codex_id)
+        context_length = await custom_codices.calculate_context_length(db=db, codex_id=codex_id)
 
         # Create a dictionary for easier access in the template
         article_types_dict = {cca.article_id: cca.article_type for cca in custom_codex_articles}
@@ -311,7 +311,7 @@ async def handle_edit_custom_codex(
 @router.post("/custom_codex/{codex_id}/calculate_context_length")
 async def calculate_context_length(
     codex_id: str,
-    article_types: dict = Body(...),
+    article_types: dict = Body(..., embed=True),
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> dict:
@@ -325,3 +325,14 @@ async def calculate_context_length(
     except Exception as e:
         # raise HTTPException(status_code=400, detail=str(e))
         return {"context_length": 0}
+
+
+@router.post("/custom_codex/{codex_id}/estimate_context_length")
+async def estimate_context_length(
+    codex_id: str,
+    article_types: dict = Body(..., embed=True),
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> dict:
+    estimate = await custom_codices.estimate_context_length(db, codex_id, article_types)
+    return {"context_length": estimate.tokens, "error": estimate.error}
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import HTMLResponse, Response
+from sqlmodel import Session
+
+from app import crud, models
+from app.views import deps, templates
+
+router = APIRouter()
+
+
+@router.get("/jobs", response_class=HTMLResponse)
+async def list_jobs(
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Response:
+    """
+    Returns HTML response with the job counts per status and the most recent jobs.
+
+    Args:
+        request(Request): The request object
+        db(Session): The database session.
+        current_user(User): The authenticated user.
+
+    Returns:
+        Response: HTML page with the jobs
+    """
+    alerts = models.Alerts().from_cookies(request.cookies)
+    status_counts = await crud.job.get_status_counts(db=db)
+    jobs = await crud.job.get_recent(db=db, limit=50)
+    return templates.TemplateResponse(
+        "job/list.html",
+        {
+            "request": request,
+            "status_counts": status_counts,
+            "jobs": jobs,
+            "current_user": current_user,
+            "alerts": alerts,
+        },
+    )
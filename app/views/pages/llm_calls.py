@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import HTMLResponse, Response
+from sqlmodel import Session
+
+from app import crud, models
+from app.views import deps, templates
+
+router = APIRouter()
+
+
+@router.get("/llm-calls", response_class=HTMLResponse)
+async def list_llm_calls(
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Response:
+    """
+    Returns HTML response with the LLM call stats per task and the most recent calls.
+
+    Args:
+        request(Request): The request object
+        db(Session): The database session.
+        current_user(User): The authenticated superuser.
+
+    Returns:
+        Response: HTML page with the LLM call journal
+    """
+    alerts = models.Alerts().from_cookies(request.cookies)
+    task_stats = await crud.llm_call.get_task_stats(db=db)
+    llm_calls = await crud.llm_call.get_recent(db=db, limit=100)
+    return templates.TemplateResponse(
+        "llm_call/list.html",
+        {
+            "request": request,
+            "task_stats": task_stats,
+            "llm_calls": llm_calls,
+            "current_user": current_user,
+            "alerts": alerts,
+        },
+    )
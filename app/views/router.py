@@ -9,6 +9,8 @@ from app.views.pages import (
     reviews,
     custom_codex_articles,
     custom_codices,
+    llm_calls,
+    jobs,
 )
 
 views_router = APIRouter(include_in_schema=False)
@@ -20,3 +22,5 @@ views_router.include_router(user.router, prefix="/user", tags=["Users"])
 views_router.include_router(custom_codices.router, tags=["Custom Codex"])
 views_router.include_router(custom_codex_articles.router, tags=["Custom Codex Articles"])
 views_router.include_router(reviews.router, tags=["Reviews"])
+views_router.include_router(llm_calls.router, tags=["LLM Calls"])
+views_router.include_router(jobs.router, tags=["Jobs"])
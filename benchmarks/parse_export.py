@@ -0,0 +1,181 @@
+"""
+Benchmark parsing a synthetic World Anvil export: time and peak RSS of the BeautifulSoup path
+against the streaming parser, and of the import's path, which splits the export in its own
+process and parses batches of its articles across 1, 2, 4... process pool workers.
+
+Each parser runs in a fresh process, so the peak RSS of one does not hide the other's. The
+peak RSS of the pool parsers excludes the splitter and the workers, and they read the export
+file themselves.
+
+Pass --snapshot to benchmark a stored export snapshot, by hash prefix or "latest", instead.
+
+Usage:
+    python -m benchmarks.parse_export --size-mb 50 --workers 1 2 4
+    python -m benchmarks.parse_export --snapshot latest
+"""
+from typing import Any, Callable
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import multiprocessing
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from app.core import process_pool
+from app.services import worldanvil
+from app.services.export_snapshots import snapshots
+from app.services.import_pipeline import iter_parsed_batches
+
+ARTICLE_TEMPLATE = """
+<div class="article-print-container page-break" id="article-{id}">
+  <h1 class="m-b-0 text-center">__Article_{id} (Location)</h1>
+  <div class="article-content-left col-md-9">
+    {paragraphs}
+    <!-- editor note -->
+    <script>window.track("{id}");</script>
+    <ul><li>First</li><li>Second &amp; third</li></ul>
+  </div>
+  <div id="metadata">
+    <div class="col-md-3"><div class="row">
+      <div class="metadata-label">Tags</div>
+      <div class="metadata-value">
+        <a class="explorer-tag">tag-{tag}</a><a class="explorer-tag">common</a>
+      </div>
+    </div></div>
+    <div class="row">
+      <div class="metadata-label">Category</div>
+      <div class="metadata-value"><a href="#">Category {tag}</a></div>
+    </div>
+    <div class="row">
+      <div class="col"><div class="metadata-label">Article template</div></div>
+      <div class="metadata-value">Location</div>
+    </div>
+  </div>
+</div>
+"""
+
+PARAGRAPH = (
+    "<p>In the year <b>{year}</b> the settlers of article {id} crossed the <i>Sea of Glass</i>"
+    " and founded a city whose towers were said to reach the clouds. {filler}</p>"
+)
+
+
+def build_export(size_mb: int) -> str:
+    """Build a synthetic export of about `size_mb` megabytes"""
+    articles = []
+    size = 0
+    i = 0
+    filler = "The chronicles of the period are incomplete. " * 4
+    while size < size_mb * 1024 * 1024:
+        paragraphs = "\n    ".join(
+            PARAGRAPH.format(year=11000 + j, id=i, filler=filler) for j in range(i % 20 + 5)
+        )
+        article = ARTICLE_TEMPLATE.format(id=i, tag=i % 50, paragraphs=paragraphs)
+        articles.append(article)
+        size += len(article)
+        i += 1
+    return (
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Export</title>'
+        "<style>.article-print-container { margin: 0; }</style></head>\n<body>"
+        + "".join(articles)
+        + "</body></html>"
+    )
+
+
+def parse_with_soup(html: str) -> list[Any]:
+    return [
+        worldanvil.parse_single_article(str(article_div))
+        for article_div in worldanvil.split_articles(html)
+    ]
+
+
+def split_with_soup(html: str) -> list[Any]:
+    return [str(article_div) for article_div in worldanvil.split_articles(html)]
+
+
+def parse_in_pool(export_path: Path, workers: int) -> list[Any]:
+    """Parse the batches of the export file across the process pool, as imports do"""
+
+    async def collect() -> list[Any]:
+        batches = iter_parsed_batches(export_path=export_path, workers=workers)
+        return [article async for batch in batches for article in batch]
+
+    return asyncio.run(collect())
+
+
+PARSERS: dict[str, Callable[[str], list[Any]]] = {
+    "soup parse": parse_with_soup,
+    "stream parse": worldanvil.get_articles_from_html,
+    "soup split": split_with_soup,
+    "stream split": worldanvil.split_article_html,
+}
+
+
+def measure(name: str, export_path: str, workers: int, results: Any) -> None:
+    if workers:
+        # Start the workers before measuring, as the app does on startup
+        process_pool.start_process_pool(max_workers=workers)
+        asyncio.run(process_pool.run_in_process(sum, range(workers)))
+        html = None
+    else:
+        html = Path(export_path).read_text(encoding="utf-8")
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    output = parse_in_pool(Path(export_path), workers) if html is None else PARSERS[name](html)
+    elapsed = time.perf_counter() - started
+    process_pool.shutdown_process_pool()
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    digest = hashlib.sha256(json.dumps(output, sort_keys=True).encode()).hexdigest()
+    results.put((elapsed, baseline_kb, peak_kb, len(output), digest))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4])
+    parser.add_argument("--snapshot", help='Hash prefix of an export snapshot, or "latest"')
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        export_path = str(Path(tmp) / "export.html")
+        if args.snapshot:
+            snapshot = snapshots.get(None if args.snapshot == "latest" else args.snapshot)
+            if snapshot is None:
+                parser.error(f"No export snapshot '{args.snapshot}'")
+            with gzip.open(snapshot.path, "rt", encoding="utf-8") as file:
+                html = file.read()
+            source = f"Export snapshot {snapshot.content_hash[:12]}"
+        else:
+            html = build_export(args.size_mb)
+            source = "Synthetic export"
+        Path(export_path).write_text(html, encoding="utf-8")
+        print(f"{source}: {len(html) / 1024 / 1024:.1f} MB")
+        del html
+
+        print(f"{'parser':<20}{'time (s)':>10}{'peak RSS (MB)':>16}{'+ over input (MB)':>20}")
+        parse_digests = set()
+        runs = [(name, 0) for name in PARSERS]
+        runs += [(f"pool parse x{workers}", workers) for workers in args.workers]
+        for name, workers in runs:
+            results = context.Queue()
+            process = context.Process(target=measure, args=(name, export_path, workers, results))
+            process.start()
+            elapsed, baseline_kb, peak_kb, count, digest = results.get()
+            process.join()
+            if "parse" in name:
+                parse_digests.add(digest)
+            print(
+                f"{name:<20}{elapsed:>10.2f}{peak_kb / 1024:>16.0f}"
+                f"{(peak_kb - baseline_kb) / 1024:>20.0f}  ({count} articles)"
+            )
+
+    print(f"Parsed articles identical: {len(parse_digests) == 1}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud, models, settings
+
+
+async def test_get_job(
+    db_with_user: Session, client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    """
+    Test that the status and progress of a job can be retrieved.
+    """
+    await crud.job.create(
+        db=db_with_user,
+        obj_in=models.JobCreate(id="j1", kind="import_articles", status="running", progress=3),
+    )
+    r = client.get(f"{settings.API_V1_PREFIX}/jobs/j1", headers=normal_user_token_headers)
+    assert r.status_code == 200
+    assert r.json()["status"] == "running"
+    assert r.json()["progress"] == 3
+
+    r = client.get(f"{settings.API_V1_PREFIX}/jobs/missing", headers=normal_user_token_headers)
+    assert r.status_code == 404
+
+
+async def test_get_job_status_counts(
+    db_with_user: Session, client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    await crud.job.create(db=db_with_user, obj_in=models.JobCreate(id="j1", kind="import_articles"))
+    await crud.job.create(
+        db=db_with_user, obj_in=models.JobCreate(id="j2", kind="generate_ai_text", status="done")
+    )
+    r = client.get(f"{settings.API_V1_PREFIX}/jobs/counts", headers=normal_user_token_headers)
+    assert r.status_code == 200
+    assert r.json() == {"queued": 1, "running": 0, "done": 1, "failed": 0}
+
+    r = client.get(f"{settings.API_V1_PREFIX}/jobs/", headers=normal_user_token_headers)
+    assert r.status_code == 200
+    assert {job["id"] for job in r.json()} == {"j1", "j2"}
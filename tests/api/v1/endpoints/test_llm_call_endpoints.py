@@ -0,0 +1,41 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud, models, settings
+
+
+async def test_get_llm_call_stats(
+    db: Session, client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    """
+    Test that a superuser can retrieve the LLM call stats per task.
+    """
+    await crud.llm_call.create(
+        db=db, obj_in=models.LLMCallCreate(task="summary", model="model", latency=2.0)
+    )
+    r = client.get(f"{settings.API_V1_PREFIX}/llm-calls/stats", headers=superuser_token_headers)
+    assert r.status_code == 200
+    assert r.json() == [
+        {
+            "task": "summary",
+            "calls": 1,
+            "errors": 0,
+            "cache_hits": 0,
+            "retries": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cache_read_input_tokens": 0,
+            "p50_latency": 2.0,
+            "p95_latency": 2.0,
+        }
+    ]
+
+
+def test_get_llm_call_stats_normal_user(
+    db_with_user: Session, client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    """
+    Test that a normal user cannot retrieve the LLM call stats.
+    """
+    r = client.get(f"{settings.API_V1_PREFIX}/llm-calls/stats", headers=normal_user_token_headers)
+    assert r.status_code == 403
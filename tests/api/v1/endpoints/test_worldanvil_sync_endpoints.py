@@ -0,0 +1,19 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud, models, settings
+
+
+async def test_get_worldanvil_sync(
+    db_with_user: Session, client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    """
+    Test that the sync state and counters can be retrieved.
+    """
+    await crud.worldanvil_sync.create(
+        db=db_with_user,
+        obj_in=models.WorldAnvilSyncCreate(export_url="https://export", checks=3, imports=1),
+    )
+    r = client.get(f"{settings.API_V1_PREFIX}/worldanvil-sync/", headers=normal_user_token_headers)
+    assert r.status_code == 200
+    assert [(state["checks"], state["imports"]) for state in r.json()] == [(3, 1)]
@@ -14,10 +14,12 @@ from sqlmodel import Session, SQLModel, create_engine
 
 from app import crud, models, settings
 from app.api import deps as api_deps
-from app.core import security
+from app.core import process_pool, security
 from app.core.app import app
 from app.db.init_db import init_initial_data
+from app.services.rate_limiter import limiter
 from app.views import deps as views_deps
+from tests.mock_objects import mocked_count_tokens_many
 
 # Set up the database
 db_url = "sqlite:///:memory:"
@@ -50,6 +52,37 @@ def do_begin(conn: Any) -> None:
     conn.exec_driver_sql("BEGIN")
 
 
+@pytest.fixture(autouse=True)
+def fixture_mocked_tokenizer() -> Generator[None, None, None]:
+    """
+    Count words instead of loading the GPT-2 tokenizer, which every create and update of a
+    record with text fields would otherwise do.
+    """
+    with patch("app.crud.base.count_tokens_many", side_effect=mocked_count_tokens_many), patch(
+        "app.services.chunker.count_tokens_many", side_effect=mocked_count_tokens_many
+    ):
+        yield
+
+
+@pytest.fixture(name="started_process_pool")
+def fixture_started_process_pool() -> Generator[None, None, None]:
+    process_pool.start_process_pool(max_workers=2)
+    yield
+    process_pool.shutdown_process_pool()
+
+
+@pytest.fixture(autouse=True)
+def fixture_reset_limiter() -> Generator[None, None, None]:
+    """
+    Retry LLM calls without backoff or cooldown, and reset the shared limiter after each test,
+    so a failing call can neither stall the suite nor pause the calls of later tests.
+    """
+    limiter.reset()
+    with patch.object(limiter, "max_wait", 0), patch.object(limiter, "cooldown", 0):
+        yield
+    limiter.reset()
+
+
 @pytest.fixture(name="init")
 def fixture_init(mocker: MagicMock, tmp_path: Path) -> None:  # pylint: disable=unused-argument
     # mocker.patch("app.paths.FEEDS_PATH", return_value=tmp_path)
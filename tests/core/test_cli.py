@@ -25,3 +25,19 @@ def test_cli_main() -> None:
         result = runner.invoke(typer_app)
         assert result.exit_code == 0
         mock_start_server.assert_called_once()
+
+
+def test_cli_import_articles_from_snapshot() -> None:
+    """
+    Test that the CLI re-imports a snapshot instead of downloading the export.
+    """
+    with patch(
+        "app.services.import_pipeline.import_articles_from_snapshot"
+    ) as mock_import_snapshot, patch(
+        "app.services.import_pipeline.import_articles_from_worldanvil"
+    ) as mock_import:
+        runner = CliRunner()
+        result = runner.invoke(typer_app, ["import-articles", "--snapshot", "abc"])
+        assert result.exit_code == 0
+        assert mock_import_snapshot.call_args.kwargs["content_hash"] == "abc"
+        mock_import.assert_not_called()
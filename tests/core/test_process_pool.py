@@ -0,0 +1,24 @@
+from app.core import process_pool
+
+
+async def test_run_in_process_without_pool() -> None:
+    """
+    Test that functions run in the calling process when the pool is not started.
+    """
+    assert await process_pool.run_in_process(sum, [1, 2, 3]) == 6
+
+
+async def test_run_in_process(started_process_pool: None) -> None:
+    """
+    Test that functions are submitted to and awaited from the process pool.
+    """
+    assert process_pool._executor is not None
+    assert await process_pool.run_in_process(sum, [1, 2, 3], start=4) == 10
+
+
+def test_start_process_pool_disabled() -> None:
+    """
+    Test that the pool is not started when it is configured with 0 workers.
+    """
+    process_pool.start_process_pool(max_workers=0)
+    assert process_pool._executor is None
@@ -0,0 +1,97 @@
+from unittest.mock import patch
+
+from sqlmodel import Session
+
+from app import crud, models
+from tests.mock_objects import mocked_count_tokens_many
+
+
+async def test_create_article_stores_token_counts(db: Session) -> None:
+    """
+    Test that creating an article stores the token count of each text field.
+    """
+    article = await crud.article.create(
+        db=db,
+        obj_in=models.ArticleCreate(id="a1", title="A1", text="one two three", summary="one two"),
+    )
+    assert article.text_tokens == 3
+    assert article.summary_tokens == 2
+    assert article.brief_tokens == 0
+
+
+async def test_update_article_updates_token_counts(db: Session) -> None:
+    """
+    Test that only the token counts of changed text fields are recomputed.
+    """
+    await crud.article.create(
+        db=db, obj_in=models.ArticleCreate(id="a1", title="A1", text="one", summary="one two")
+    )
+    with patch("app.crud.base.count_tokens_many", side_effect=mocked_count_tokens_many) as mock:
+        article = await crud.article.update(
+            db=db,
+            id="a1",
+            obj_in=models.ArticleUpdate(text="one two three four", summary="one two"),
+        )
+    mock.assert_called_once_with(["one two three four"])
+    assert article.text_tokens == 4
+    assert article.summary_tokens == 2
+
+
+async def test_write_article_without_tokenizer(db: Session) -> None:
+    """
+    Test that articles are still written, without token counts, when the tokenizer is missing.
+    """
+    await crud.article.create(
+        db=db, obj_in=models.ArticleCreate(id="a1", title="A1", text="one", summary="one two")
+    )
+    with patch("app.crud.base.count_tokens_many", side_effect=OSError("offline")):
+        created = await crud.article.create(
+            db=db, obj_in=models.ArticleCreate(id="a2", title="A2", text="one two")
+        )
+        updated = await crud.article.update(
+            db=db, id="a1", obj_in=models.ArticleUpdate(text="one two three")
+        )
+        await crud.article.upsert_many(db=db, rows=[{"id": "a3", "title": "A3", "text": "one"}])
+
+    assert (created.text_tokens, created.brief_tokens) == (None, 0)
+    assert (updated.text, updated.text_tokens, updated.summary_tokens) == ("one two three", None, 2)
+    assert (await crud.article.get(db=db, id="a3")).text_tokens is None
+
+
+async def test_sum_context_tokens(db: Session) -> None:
+    """
+    Test summing the token counts of the text selected for each codex article.
+    """
+    codex = await crud.custom_codex.create(db=db, obj_in=models.CustomCodexCreate(name="Codex"))
+    article_types = {"Full": "a1", "Summary": "a2", "Brief": "a3", "Custom": "a4", "None": "a5"}
+    for article_type, article_id in article_types.items():
+        await crud.article.create(
+            db=db,
+            obj_in=models.ArticleCreate(
+                id=article_id,
+                title=article_id,
+                text="one two three four five",
+                summary="one two three",
+                brief="one",
+            ),
+        )
+        await crud.custom_codex_article.create(
+            db=db,
+            obj_in=models.CustomCodexArticleCreate(
+                codex_id=codex.id,
+                article_id=article_id,
+                article_type=article_type,
+                custom_text="one two" if article_type == "Custom" else None,
+            ),
+        )
+
+    total = await crud.custom_codex_article.sum_context_tokens(db=db, codex_id=codex.id)
+    assert total == 5 + 3 + 1 + 2
+
+    # Texts without a stored count are estimated
+    await crud.article.update_many(db=db, rows=[{"id": "a1", "text_tokens": None}])
+    with patch("app.crud.custom_codex_article.estimate_tokens") as mock_estimate:
+        mock_estimate.return_value.tokens = 6
+        total = await crud.custom_codex_article.sum_context_tokens(db=db, codex_id=codex.id)
+    mock_estimate.assert_called_once_with("one two three four five")
+    assert total == 6 + 3 + 1 + 2
@@ -0,0 +1,46 @@
+from sqlmodel import Session
+
+from app import crud, models
+
+
+async def test_get_next_queued(db: Session) -> None:
+    """
+    Test that the oldest queued job is run next.
+    """
+    await crud.job.create(db=db, obj_in=models.JobCreate(id="j1", kind="a", status="done"))
+    await crud.job.create(db=db, obj_in=models.JobCreate(id="j2", kind="b"))
+    await crud.job.create(db=db, obj_in=models.JobCreate(id="j3", kind="c"))
+
+    job = await crud.job.get_next_queued(db=db)
+    assert job is not None
+    assert job.id == "j2"
+
+
+async def test_get_active(db: Session) -> None:
+    await crud.job.create(db=db, obj_in=models.JobCreate(id="j1", kind="a", status="done"))
+    assert await crud.job.get_active(db=db, kind="a") is None
+
+    await crud.job.create(db=db, obj_in=models.JobCreate(id="j2", kind="a", status="running"))
+    job = await crud.job.get_active(db=db, kind="a")
+    assert job is not None
+    assert job.id == "j2"
+
+
+async def test_get_status_counts(db: Session) -> None:
+    for i, status in enumerate(["queued", "queued", "running", "failed"]):
+        await crud.job.create(db=db, obj_in=models.JobCreate(id=f"j{i}", kind="a", status=status))
+
+    counts = await crud.job.get_status_counts(db=db)
+    assert counts == models.JobStatusCounts(queued=2, running=1, done=0, failed=1)
+
+
+async def test_requeue_running(db: Session) -> None:
+    await crud.job.create(
+        db=db, obj_in=models.JobCreate(id="j1", kind="a", status="running", progress=5)
+    )
+    await crud.job.create(db=db, obj_in=models.JobCreate(id="j2", kind="b", status="done"))
+
+    assert await crud.job.requeue_running(db=db) == 1
+    job = await crud.job.get(db=db, id="j1")
+    assert (job.status, job.progress) == ("queued", 0)
+    assert (await crud.job.get(db=db, id="j2")).status == "done"
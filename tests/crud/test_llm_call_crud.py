@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+from sqlmodel import Session
+
+from app import crud, models
+
+
+async def create_llm_call(db: Session, **kwargs: object) -> models.LLMCall:
+    return await crud.llm_call.create(
+        db=db, obj_in=models.LLMCallCreate(model="model", **kwargs)  # type: ignore
+    )
+
+
+async def test_get_task_stats(db: Session) -> None:
+    """
+    Test that calls are aggregated per task with p50/p95 latency of the API calls only.
+    """
+    for latency in range(1, 21):
+        await create_llm_call(
+            db, task="summary", input_tokens=100, output_tokens=10, latency=float(latency)
+        )
+    await create_llm_call(db, task="summary", cache_hit=True)
+    await create_llm_call(db, task="summary", latency=30.0, retries=2, error="Overloaded")
+    await create_llm_call(db, task="brief", input_tokens=50, output_tokens=5, latency=1.5)
+
+    brief, summary = await crud.llm_call.get_task_stats(db=db)
+
+    assert brief == models.LLMCallTaskStats(
+        task="brief", calls=1, input_tokens=50, output_tokens=5, p50_latency=1.5, p95_latency=1.5
+    )
+    assert summary.calls == 22
+    assert summary.errors == 1
+    assert summary.cache_hits == 1
+    assert summary.retries == 2
+    assert summary.input_tokens == 2000
+    assert summary.output_tokens == 200
+    assert summary.p50_latency == 11.0
+    assert summary.p95_latency == 20.0
+
+
+async def test_get_task_stats_since(db: Session) -> None:
+    """
+    Test that only the calls made after `since` are aggregated.
+    """
+    await create_llm_call(db, task="summary", latency=1.0)
+    old_call = await create_llm_call(db, task="brief", latency=1.0)
+    old_call.created_at = datetime.utcnow() - timedelta(days=2)
+    db.commit()
+
+    stats = await crud.llm_call.get_task_stats(db=db, since=datetime.utcnow() - timedelta(days=1))
+    assert [task_stats.task for task_stats in stats] == ["summary"]
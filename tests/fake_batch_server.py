@@ -0,0 +1,116 @@
+"""
+Local stand-in for the Anthropic Message Batches API.
+
+Used by the tests through `httpx.ASGITransport`, and can be run for offline development with
+`python -m tests.fake_batch_server` and `ANTHROPIC_API_URL=http://127.0.0.1:8765`.
+"""
+import json
+from collections.abc import Callable
+from typing import Any, Optional
+
+import shortuuid
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+DEFAULT_RESPONSE = json.dumps(
+    {"summary": "A summary.", "brief": "A brief.", "year_start": 11000, "year_end": 11100}
+)
+
+
+def create_fake_batch_server(
+    respond: Callable[[dict[str, Any]], str] = lambda params: DEFAULT_RESPONSE,
+    polls_until_ended: int = 1,
+) -> FastAPI:
+    """
+    Creates a fake batch server.
+
+    `respond` returns the response text for the params of each request. Requests for which it
+    raises come back as errored results. Each batch reports `in_progress` for the first
+    `polls_until_ended` polls.
+    """
+    app = FastAPI()
+    app.state.batches = {}
+
+    def check_api_key(x_api_key: Optional[str]) -> None:
+        if not x_api_key:
+            raise HTTPException(status_code=401, detail="Missing x-api-key header")
+
+    def get_batch_object(batch: dict[str, Any], request: Request) -> dict[str, Any]:
+        ended = batch["polls"] > polls_until_ended
+        return {
+            "id": batch["id"],
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else len(batch["requests"]),
+                "succeeded": sum(r["result"]["type"] == "succeeded" for r in batch["results"]),
+                "errored": sum(r["result"]["type"] == "errored" for r in batch["results"]),
+                "canceled": 0,
+                "expired": 0,
+            },
+            "results_url": (
+                f"{request.base_url}v1/messages/batches/{batch['id']}/results" if ended else None
+            ),
+        }
+
+    def get_result(custom_id: str, params: dict[str, Any]) -> dict[str, Any]:
+        try:
+            text = respond(params)
+        except Exception as e:  # pylint: disable=broad-except
+            error = {"type": "error", "error": {"type": "api_error", "message": str(e)}}
+            return {"custom_id": custom_id, "result": {"type": "errored", "error": error}}
+        message = {
+            "id": f"msg_{shortuuid.uuid()}",
+            "type": "message",
+            "role": "assistant",
+            "model": params["model"],
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "usage": {"input_tokens": 0, "output_tokens": 0},
+        }
+        return {"custom_id": custom_id, "result": {"type": "succeeded", "message": message}}
+
+    @app.post("/v1/messages/batches")
+    async def create_batch(
+        request: Request, x_api_key: Optional[str] = Header(None)
+    ) -> dict[str, Any]:
+        check_api_key(x_api_key)
+        body = await request.json()
+        batch_id = f"msgbatch_{shortuuid.uuid()}"
+        batch = {"id": batch_id, "requests": body["requests"], "results": [], "polls": 0}
+        app.state.batches[batch_id] = batch
+        return get_batch_object(batch, request)
+
+    @app.get("/v1/messages/batches/{batch_id}")
+    async def get_batch(
+        batch_id: str, request: Request, x_api_key: Optional[str] = Header(None)
+    ) -> dict[str, Any]:
+        check_api_key(x_api_key)
+        if batch_id not in app.state.batches:
+            raise HTTPException(status_code=404, detail="Batch not found")
+        batch = app.state.batches[batch_id]
+        batch["polls"] += 1
+        if batch["polls"] > polls_until_ended and not batch["results"]:
+            batch["results"] = [get_result(r["custom_id"], r["params"]) for r in batch["requests"]]
+        return get_batch_object(batch, request)
+
+    @app.get("/v1/messages/batches/{batch_id}/results")
+    async def get_batch_results(
+        batch_id: str, x_api_key: Optional[str] = Header(None)
+    ) -> PlainTextResponse:
+        check_api_key(x_api_key)
+        batch = app.state.batches.get(batch_id)
+        if not batch or not batch["results"]:
+            raise HTTPException(status_code=404, detail="Batch results not found")
+        return PlainTextResponse(
+            "\n".join(json.dumps(result) for result in batch["results"]) + "\n",
+            media_type="application/binary",
+        )
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(create_fake_batch_server(), host="127.0.0.1", port=8765)
@@ -20,3 +20,85 @@ MOCKED_ARTICLE_3 = {
 }
 
 MOCKED_ARTICLES = [MOCKED_ARTICLE_1, MOCKED_ARTICLE_2, MOCKED_ARTICLE_3]
+
+
+def mocked_count_tokens_many(texts: list[str | None]) -> list[int]:
+    """
+    Count whitespace separated words instead of loading the tokenizer.
+    """
+    return [len(text.split()) if text else 0 for text in texts]
+
+
+def build_export_html(articles: list[dict]) -> str:  # type: ignore
+    """
+    Build a World Anvil export with the id, title, content, tags and category of each article.
+    """
+    article_divs = []
+    for article in articles:
+        tags = "".join(f'<a class="explorer-tag">{tag}</a>' for tag in article.get("tags", []))
+        category = article.get("category")
+        category_row = (
+            '<div class="row"><div class="metadata-label">Category</div>'
+            f'<div class="metadata-value"><a>{category}</a></div></div>'
+            if category
+            else ""
+        )
+        article_divs.append(
+            f'<div class="article-print-container" id="article-{article["id"]}">'
+            f'<h1 class="m-b-0">{article["title"]}</h1>'
+            f'<div class="article-content-left">{article["content"]}</div>'
+            '<div id="metadata"><div class="col-md-3"><div class="row">'
+            f'<div class="metadata-value">{tags}</div></div></div>{category_row}</div>'
+            "</div>"
+        )
+    return f"<html><body>{''.join(article_divs)}</body></html>"
+
+
+MOCKED_EXPORT_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Ancient Sol</title>
+<style>.article-print-container { margin: 0; }</style></head>
+<body>
+<div class="world-header"><h1 class="m-b-0">Ancient Sol</h1></div>
+<div class="article-print-container page-break" id="article-a1">
+  <h1 class="m-b-0 text-center">__The  First_City (Settlement)</h1>
+  <div class="article-content-left col-md-9">
+    <p>The city was founded in <b>11302</b> &amp; grew <i>quickly</i>.</p>
+    <!-- editor note -->
+    <script>window.track("a1");</script>
+    <ul><li>Walls</li><li>  Harbour  </li></ul>
+    <p>Caf&eacute; culture<br>thrives.</p>
+  </div>
+  <div id="metadata">
+    <div class="col-md-3">
+      <div class="row">
+        <div class="metadata-label">Tags</div>
+        <div class="metadata-value">
+          <a class="explorer-tag" href="#"> city </a><a class="explorer-tag">coast</a>
+          <a href="#">not a tag</a>
+        </div>
+      </div>
+    </div>
+    <div class="row">
+      <div class="metadata-label">Category</div>
+      <div class="metadata-value"><a href="#">Settlements</a></div>
+    </div>
+    <div class="row">
+      <div class="col"><div class="metadata-label">Article template</div></div>
+      <div class="metadata-value"> Settlement </div>
+    </div>
+  </div>
+</div>
+<div class="article-print-container" id="article-a2">
+  <h1 class="m-b-0">Untagged_Person</h1>
+  <div class="article-content-left"><p>Born in 11000.</p><p>Died in 11070.</p></div>
+  <div id="metadata">
+    <div class="row"><div class="metadata-label">Category<!-- x --></div>
+    <div class="metadata-value"><a>People</a></div></div>
+    <div class="row"><div class="metadata-label">Article template</div></div>
+  </div>
+</div>
+<div class="article-print-container" id="article-a3">
+  <div class="article-content-left"></div>
+</div>
+</body></html>
+"""
@@ -0,0 +1,212 @@
+import asyncio
+from collections.abc import AsyncIterator
+from unittest.mock import patch
+
+from sqlmodel import Session
+
+from app import crud, models
+from app.services import articles
+
+
+async def test_generate_all_ai_text(db: Session) -> None:
+    """
+    Test that missing AI text is generated concurrently, bounded by `concurrency`.
+    """
+    for i in range(6):
+        await crud.article.create(
+            db=db, obj_in=models.ArticleCreate(id=f"a{i}", title=f"A{i}", text=f"text {i}")
+        )
+    await crud.article.update(
+        db=db,
+        id="a0",
+        obj_in=models.ArticleUpdate(summary="done", brief="done", year_start=1, year_end=2),
+    )
+
+    running = 0
+    max_running = 0
+
+    async def mocked_generate_ai_text(text: str) -> models.ArticleAIText:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return models.ArticleAIText(
+            summary=f"summary {text}", brief=f"brief {text}", year_start=11000, year_end=11100
+        )
+
+    with patch(
+        "app.services.articles.generate_ai_text", side_effect=mocked_generate_ai_text
+    ) as mock_generate_ai_text:
+        await articles.generate_all_ai_text(db=db, concurrency=2)
+
+    assert max_running == 2
+    assert mock_generate_ai_text.call_count == 5
+    article = await crud.article.get(db=db, id="a3")
+    db.refresh(article)
+    assert article.summary == "summary text 3"
+    assert article.brief == "brief text 3"
+    assert (article.year_start, article.year_end) == (11000, 11100)
+    assert (await crud.article.get(db=db, id="a0")).summary == "done"
+
+
+async def test_generate_all_ai_text_keeps_existing_text(db: Session) -> None:
+    """
+    Test that only the missing AI text fields of an article are written back.
+    """
+    await crud.article.create(
+        db=db, obj_in=models.ArticleCreate(id="a1", title="A1", text="text", brief="old brief")
+    )
+    ai_text = models.ArticleAIText(summary="new summary", brief="new brief")
+
+    with patch("app.services.articles.generate_ai_text", return_value=ai_text):
+        await articles.generate_all_ai_text(db=db)
+
+    article = await crud.article.get(db=db, id="a1")
+    db.refresh(article)
+    assert article.brief == "old brief"
+    assert article.summary == "new summary"
+
+
+async def test_iter_articles_missing_ai_text(db: Session) -> None:
+    """
+    Test that the work-list pages through only the articles with text missing AI text.
+    """
+    for i in range(5):
+        await crud.article.create(
+            db=db, obj_in=models.ArticleCreate(id=f"a{i}", title=f"A{i}", text=f"text {i}")
+        )
+    await crud.article.create(db=db, obj_in=models.ArticleCreate(id="a5", title="A5", text=""))
+    await crud.article.update(
+        db=db,
+        id="a0",
+        obj_in=models.ArticleUpdate(summary="done", brief="done", year_start=1, year_end=2),
+    )
+    await crud.article.update(
+        db=db,
+        id="a1",
+        obj_in=models.ArticleUpdate(summary="done", brief="done", year_start=1, year_end=0),
+    )
+
+    pages = [page async for page in articles.iter_articles_missing_ai_text(db=db, page_size=2)]
+
+    assert [[article.id for article in page] for page in pages] == [["a1", "a2"], ["a3", "a4"]]
+    assert (pages[0][0].missing_brief, pages[0][0].missing_years) == (False, True)
+    assert pages[0][1].missing_brief
+
+
+async def test_generate_all_ai_text_batch(db: Session) -> None:
+    """
+    Test that batch results are applied to the articles missing AI text.
+    """
+    for i in range(3):
+        await crud.article.create(
+            db=db, obj_in=models.ArticleCreate(id=f"a{i}", title=f"A{i}", text=f"text {i}")
+        )
+    await crud.article.update(
+        db=db,
+        id="a0",
+        obj_in=models.ArticleUpdate(summary="done", brief="done", year_start=1, year_end=2),
+    )
+    ai_text = models.ArticleAIText(summary="summary", brief="brief", year_start=1, year_end=2)
+
+    with patch(
+        "app.services.articles.generate_ai_text_batch", return_value={"a1": ai_text}
+    ) as mock_generate_ai_text_batch:
+        await articles.generate_all_ai_text_batch(db=db)
+
+    assert mock_generate_ai_text_batch.call_args.args[0] == {"a1": "text 1", "a2": "text 2"}
+    article = await crud.article.get(db=db, id="a1")
+    db.refresh(article)
+    assert article.summary == "summary"
+    assert (await crud.article.get(db=db, id="a2")).summary is None
+    assert (await crud.article.get(db=db, id="a0")).summary == "done"
+
+
+async def test_stream_new_article_date_range(db: Session) -> None:
+    """
+    Test that the streamed date range is parsed and saved once the stream has ended.
+    """
+    await crud.article.create(db=db, obj_in=models.ArticleCreate(id="a1", title="A1", text="text"))
+
+    async def mocked_stream_date_range(text: str, use_cache: bool) -> AsyncIterator[str]:
+        for chunk in ["(11302", ", ", "11311)"]:
+            yield chunk
+
+    with patch("app.services.articles.stream_date_range", side_effect=mocked_stream_date_range):
+        chunks = [
+            chunk
+            async for chunk in articles.stream_new_article_ai_text(
+                db=db, article_id="a1", task="date_range"
+            )
+        ]
+
+    assert "".join(chunks) == "(11302, 11311)"
+    article = await crud.article.get(db=db, id="a1")
+    assert (article.year_start, article.year_end) == (11302, 11311)
+
+
+async def test_generate_new_article_summary_single_flight(db: Session) -> None:
+    """
+    Test that concurrent requests for the same summary share a single LLM call.
+    """
+    await crud.article.create(db=db, obj_in=models.ArticleCreate(id="a1", title="A1", text="text"))
+
+    async def mocked_generate_summary(text: str, use_cache: bool) -> str:
+        await asyncio.sleep(0.01)
+        return f"summary of {text}"
+
+    with patch(
+        "app.services.articles.generate_summary", side_effect=mocked_generate_summary
+    ) as mock_generate_summary:
+        updated = await asyncio.gather(
+            articles.generate_new_article_summary(db=db, article_id="a1"),
+            articles.generate_new_article_summary(db=db, article_id="a1"),
+        )
+        assert mock_generate_summary.call_count == 1
+
+        await articles.generate_new_article_summary(db=db, article_id="a1")
+        assert mock_generate_summary.call_count == 2
+
+    assert [article.summary for article in updated] == ["summary of text"] * 2
+
+
+async def test_regeneration_joins_ai_text_generation(db: Session) -> None:
+    """
+    Test that a manual regeneration during a bulk generation of the same article takes its
+    field from the bulk generation's LLM call.
+    """
+    await crud.article.create(db=db, obj_in=models.ArticleCreate(id="a1", title="A1", text="text"))
+    ai_text = models.ArticleAIText(summary="summary", brief="brief", year_start=1, year_end=2)
+
+    async def mocked_generate_ai_text(text: str) -> models.ArticleAIText:
+        await asyncio.sleep(0.01)
+        return ai_text
+
+    async def stream_date_range() -> str:
+        chunks = articles.stream_new_article_ai_text(db=db, article_id="a1", task="date_range")
+        return "".join([chunk async for chunk in chunks])
+
+    with patch(
+        "app.services.articles.generate_ai_text", side_effect=mocked_generate_ai_text
+    ) as mock_generate_ai_text, patch(
+        "app.services.articles.generate_summary"
+    ) as mock_generate_summary, patch(
+        "app.services.articles.stream_date_range"
+    ) as mock_stream_date_range:
+        bulk = asyncio.create_task(
+            articles.create_new_article(
+                db, {"id": "a1", "content": "text", "title": "A1", "tags": []}
+            )
+        )
+        await asyncio.sleep(0)
+        article, date_range = await asyncio.gather(
+            articles.generate_new_article_summary(db=db, article_id="a1"), stream_date_range()
+        )
+        await bulk
+
+    mock_generate_ai_text.assert_called_once()
+    mock_generate_summary.assert_not_called()
+    mock_stream_date_range.assert_not_called()
+    assert article.summary == "summary"
+    assert date_range == "(1, 2)"
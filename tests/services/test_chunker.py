@@ -0,0 +1,76 @@
+from app.services import chunker
+
+
+def paragraph(word: str, words: int) -> str:
+    return " ".join([word] * (words - 1) + [f"{word}."])
+
+
+def test_is_heading() -> None:
+    """
+    Test that markdown headings and short lines without closing punctuation are headings.
+    """
+    assert chunker.is_heading("## Geography")
+    assert chunker.is_heading("History of Atlas City")
+    assert not chunker.is_heading("Atlas City was founded in 11,125 PN.")
+    assert not chunker.is_heading(paragraph("long", 30).rstrip("."))
+
+
+def test_split_text_packs_sections() -> None:
+    """
+    Test that short sections are packed into the chunk of the section after them.
+    """
+    text = "\n".join(
+        ["Summary", "s.", "History", paragraph("a", 20), "Geography", paragraph("b", 20), "c."]
+    )
+    chunks = chunker.split_text(text, max_tokens=30)
+
+    assert chunks == [
+        f"Summary\ns.\nHistory\n{paragraph('a', 20)}",
+        f"Geography\n{paragraph('b', 20)}\nc.",
+    ]
+
+
+def test_split_text_splits_long_sections() -> None:
+    """
+    Test that long sections are split between paragraphs, then between sentences.
+    """
+    long_paragraph = " ".join([paragraph("x", 10)] * 4)
+    text = "\n".join(["History", paragraph("a", 20), paragraph("b", 20), long_paragraph])
+    chunks = chunker.split_text(text, max_tokens=25)
+
+    assert chunks[0] == f"History\n{paragraph('a', 20)}"
+    assert chunks[1] == paragraph("b", 20)
+    assert chunks[2:] == ["\n".join([paragraph("x", 10)] * 2)] * 2
+    assert all(len(chunk.split()) <= 25 for chunk in chunks)
+
+
+def test_split_text_edit_keeps_earlier_chunks() -> None:
+    """
+    Test that editing a section does not change the chunks before it.
+    """
+    sections = [f"Section {i}\n{paragraph(str(i), 20)}" for i in range(4)]
+    chunks = chunker.split_text("\n".join(sections), max_tokens=30)
+    sections[2] = f"Section 2\n{paragraph('edited', 22)}"
+    edited_chunks = chunker.split_text("\n".join(sections), max_tokens=30)
+
+    assert len(chunks) == len(edited_chunks) == 4
+    assert [c == e for c, e in zip(chunks, edited_chunks)] == [True, True, False, True]
+
+
+def test_split_text_edit_keeps_later_chunks() -> None:
+    """
+    Test that growing an early section does not move the chunk boundaries after it.
+    """
+    words = [10, 2, 10, 2, 2, 10, 2, 10]
+    sections = [f"Section {i}\n{paragraph(str(i), n)}" for i, n in enumerate(words)]
+    chunks = chunker.split_text("\n".join(sections), max_tokens=30)
+    sections[0] = f"Section 0\n{paragraph('edited', 24)}"
+    edited_chunks = chunker.split_text("\n".join(sections), max_tokens=30)
+
+    assert edited_chunks[0] != chunks[0]
+    assert edited_chunks[1:] == chunks[1:]
+
+
+def test_split_text_empty() -> None:
+    assert chunker.split_text("", max_tokens=10) == []
+    assert chunker.split_text(None, max_tokens=10) == []
@@ -0,0 +1,33 @@
+from unittest.mock import patch
+
+from sqlmodel import Session
+
+from app import crud, models
+from app.services import custom_codices
+from app.services.tokenizer import TokenEstimate
+
+
+async def test_estimate_context_length(db: Session) -> None:
+    """
+    Test that stored counts are used as-is and only uncounted texts are estimated.
+    """
+    codex = await crud.custom_codex.create(db=db, obj_in=models.CustomCodexCreate(name="Codex"))
+    with patch("app.crud.base.count_tokens_many", side_effect=lambda texts: [10] * len(texts)):
+        await crud.article.create(
+            db=db, obj_in=models.ArticleCreate(id="a1", title="A1", text="counted")
+        )
+        uncounted_article = await crud.article.create(
+            db=db, obj_in=models.ArticleCreate(id="a2", title="A2", brief="not counted")
+        )
+    uncounted_article.brief_tokens = None
+    db.commit()
+
+    with patch(
+        "app.services.custom_codices.estimate_tokens", return_value=TokenEstimate(3, 1)
+    ) as mock_estimate_tokens:
+        estimate = await custom_codices.estimate_context_length(
+            db, codex.id, {"a1": "Full", "a2": "Brief", "a3": "None"}
+        )
+
+    mock_estimate_tokens.assert_called_once_with("not counted")
+    assert estimate == TokenEstimate(tokens=13, error=1)
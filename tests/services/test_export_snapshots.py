@@ -0,0 +1,72 @@
+import gzip
+import hashlib
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from app.services import worldanvil
+from app.services.export_snapshots import ExportSnapshotStore
+from tests.mock_objects import MOCKED_EXPORT_HTML
+
+
+def write_export(tmp_path: Path, html: str) -> tuple[Path, str]:
+    export_path = tmp_path / "export.html"
+    export_path.write_text(html)
+    return export_path, hashlib.sha256(html.encode()).hexdigest()
+
+
+async def test_save_snapshot(tmp_path: Path) -> None:
+    """
+    Test that an export is stored compressed, named after its hash, and saved only once.
+    """
+    store = ExportSnapshotStore(path=tmp_path / "snapshots")
+    export_path, content_hash = write_export(tmp_path, MOCKED_EXPORT_HTML)
+
+    snapshot = await store.save(export_path, content_hash)
+    assert snapshot.content_hash == content_hash
+    assert snapshot.path.name == f"{content_hash}.html.gz"
+    assert gzip.decompress(snapshot.path.read_bytes()).decode() == MOCKED_EXPORT_HTML
+    chunks = worldanvil.iter_export_file_chunks(snapshot.path)
+    assert list(worldanvil.iter_articles(chunks)) == worldanvil.get_articles_from_html(
+        MOCKED_EXPORT_HTML
+    )
+
+    await store.save(export_path, content_hash)
+    assert store.get_all() == [store.get()]
+    assert store.get(content_hash[:8]) == store.get()
+    assert store.get("missing") is None
+
+
+async def test_prune_snapshots(tmp_path: Path) -> None:
+    """
+    Test that snapshots beyond the count or age limits are removed, except the newest one.
+    """
+    store = ExportSnapshotStore(path=tmp_path / "snapshots", max_count=2, max_age_days=1)
+    content_hashes = []
+    for i in range(3):
+        export_path, content_hash = write_export(tmp_path, f"{MOCKED_EXPORT_HTML}<!-- {i} -->")
+        await store.save(export_path, content_hash)
+        # Age the snapshot, so the next one saved is the newest
+        saved_at = time.time() - 10 + i
+        os.utime(store.get_file(content_hash), (saved_at, saved_at))
+        content_hashes.append(content_hash)
+
+    assert [snapshot.content_hash for snapshot in store.get_all()] == content_hashes[:0:-1]
+
+    old = time.time() - 2 * 24 * 60 * 60
+    for i, snapshot in enumerate(store.get_all()):
+        os.utime(snapshot.path, (old - i, old - i))
+    assert store.prune() == 1
+    assert [snapshot.content_hash for snapshot in store.get_all()] == [content_hashes[2]]
+
+
+async def test_get_ambiguous_snapshot(tmp_path: Path) -> None:
+    store = ExportSnapshotStore(path=tmp_path)
+    (tmp_path / "abc1.html.gz").touch()
+    (tmp_path / "abc2.html.gz").touch()
+
+    with pytest.raises(ValueError):
+        store.get("abc")
+    assert store.get("abc2").content_hash == "abc2"  # type: ignore
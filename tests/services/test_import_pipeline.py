@@ -0,0 +1,241 @@
+import asyncio
+import hashlib
+from contextlib import aclosing
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from sqlmodel import Session
+
+from app import crud, models
+from app.services import articles
+from app.services.export_snapshots import ExportSnapshotStore
+from app.services.import_pipeline import (
+    ArticleImport,
+    Pipeline,
+    Stage,
+    import_articles_from_snapshot,
+    iter_parsed_batches,
+)
+from tests.mock_objects import build_export_html
+
+AI_TEXT = models.ArticleAIText(summary="summary", brief="brief", year_start=1, year_end=2)
+
+
+async def test_pipeline_overlaps_stages() -> None:
+    """
+    Test that items flow through all stages, with a slow stage overlapping the others.
+    """
+    results = []
+    first = Stage("first", lambda item: second.put(item * 2), concurrency=2, maxsize=2)
+
+    async def slow(item: int) -> None:
+        await asyncio.sleep(0.01)
+        if item == 6:
+            raise ValueError()
+        results.append(item)
+
+    second = Stage("second", slow, concurrency=4, maxsize=2)
+
+    async def source() -> None:
+        for item in range(10):
+            await first.put(item)
+
+    pipeline = Pipeline([first, second], metrics_interval=60)
+    await pipeline.run(source)
+
+    assert sorted(results) == [i * 2 for i in range(10) if i != 3]
+    assert pipeline.failed == 1
+    assert pipeline.stats["second"]["max_depth"] <= 2
+    assert pipeline.queue_depths == {"first": 0, "second": 0}
+
+
+async def test_iter_parsed_batches(started_process_pool: None, tmp_path: Path) -> None:
+    """
+    Test that batches parsed across the process pool are streamed back in the export's order.
+    """
+    export_path = tmp_path / "export.html"
+    export_path.write_text(
+        build_export_html([{"id": f"a{i}", "title": f"A{i}", "content": "text"} for i in range(60)])
+    )
+
+    batches = [batch async for batch in iter_parsed_batches(export_path=export_path)]
+
+    assert [len(batch) for batch in batches] == [50, 10]
+    assert [article["id"] for batch in batches for article in batch] == [f"a{i}" for i in range(60)]
+
+
+@pytest.mark.parametrize("pool", [False, True], ids=["thread", "pool"])
+async def test_iter_parsed_batches_failed(
+    request: pytest.FixtureRequest, tmp_path: Path, pool: bool
+) -> None:
+    """
+    Test that an export that cannot be split raises its error instead of hanging.
+    """
+    if pool:
+        request.getfixturevalue("started_process_pool")
+
+    with pytest.raises(FileNotFoundError):
+        async for _ in iter_parsed_batches(export_path=tmp_path / "missing.html"):
+            pass
+
+
+@pytest.mark.parametrize("pool", [False, True], ids=["thread", "pool"])
+async def test_iter_parsed_batches_closed_early(request: pytest.FixtureRequest, pool: bool) -> None:
+    """
+    Test that closing the stream early stops the splitter waiting on the full queue.
+    """
+    if pool:
+        request.getfixturevalue("started_process_pool")
+    export_html = build_export_html(
+        [{"id": f"a{i}", "title": f"A{i}", "content": "text"} for i in range(500)]
+    )
+
+    async with aclosing(iter_parsed_batches(export_html=export_html)) as batches:
+        async for batch in batches:
+            assert len(batch) == 50
+            break
+
+
+async def test_import_articles(db: Session) -> None:
+    """
+    Test that new articles are generated and written, and unchanged articles are skipped.
+    """
+    exported = [
+        {"id": f"a{i}", "title": f"A{i}", "content": f"text {i}", "tags": ["b", "a"]}
+        for i in range(3)
+    ]
+    progress = []
+
+    async def on_progress(done: int, total: int) -> None:
+        progress.append((done, total))
+
+    with patch(
+        "app.services.articles.generate_ai_text", return_value=AI_TEXT
+    ) as mock_generate_ai_text:
+        await ArticleImport(db=db, on_progress=on_progress).run(build_export_html(exported))
+        assert mock_generate_ai_text.call_count == 3
+        assert progress[-1] == (3, 3)
+
+        exported[0] = {**exported[0], "content": "<p>text</p>\n<p>0</p>", "tags": ["a", "b"]}
+        exported[1] = {**exported[1], "category": "Person"}
+        exported[2] = {**exported[2], "content": "edited text"}
+        article_import = ArticleImport(db=db)
+        await article_import.run(build_export_html(exported))
+        assert article_import.unchanged == 1
+        assert mock_generate_ai_text.call_count == 4
+        assert article_import.pipeline.stats["write"]["processed"] == 2
+
+        # The article waiting for review is not generated and reviewed again
+        reimport = ArticleImport(db=db)
+        await reimport.run(build_export_html(exported))
+
+    assert reimport.unchanged == 3
+    assert mock_generate_ai_text.call_count == 4
+
+    article = await crud.article.get(db=db, id="a1")
+    db.refresh(article)
+    assert (article.summary, article.category) == ("summary", "Person")
+    assert article.content_hash == articles.get_article_content_hash(article)
+    reviews = await crud.review.get_multi_by_article_id(db=db, article_id="a2")
+    assert len(reviews) == 1
+
+
+async def test_import_articles_backfills_content_hash(db: Session) -> None:
+    """
+    Test that articles stored without a content hash get one instead of being re-reviewed.
+    """
+    await crud.article.create(
+        db=db,
+        obj_in=models.ArticleCreate(
+            id="a1", title="A1", text="text", tags=[], summary="summary", brief="brief"
+        ),
+    )
+    exported = [{"id": "a1", "title": "A1", "content": "text\n"}]
+
+    with patch("app.services.articles.generate_ai_text") as mock_generate_ai_text:
+        await ArticleImport(db=db).run(build_export_html(exported))
+
+    mock_generate_ai_text.assert_not_called()
+    article = await crud.article.get(db=db, id="a1")
+    db.refresh(article)
+    assert article.content_hash == articles.get_article_content_hash(article)
+
+
+async def test_import_articles_failed(db: Session) -> None:
+    """
+    Test that the other articles are written when generating one article fails.
+    """
+    exported = [{"id": f"a{i}", "title": f"A{i}", "content": f"text {i}"} for i in range(2)]
+
+    async def mocked_generate_ai_text(text: str) -> models.ArticleAIText:
+        if text == "text 1":
+            raise ValueError("Invalid response")
+        return AI_TEXT
+
+    with patch("app.services.articles.generate_ai_text", side_effect=mocked_generate_ai_text):
+        with pytest.raises(RuntimeError):
+            await ArticleImport(db=db).run(build_export_html(exported))
+
+    assert await crud.article.get_or_none(db=db, id="a0") is not None
+    assert await crud.article.get_or_none(db=db, id="a1") is None
+
+
+async def test_import_articles_resumes(db: Session) -> None:
+    """
+    Test that rerunning a failed import of the same export skips the articles it wrote.
+    """
+    await crud.article.create(
+        db=db,
+        obj_in=models.ArticleCreate(
+            id="a0", title="A0", text="text", tags=[], summary="summary", brief="brief"
+        ),
+    )
+    exported = [{"id": f"a{i}", "title": f"A{i}", "content": f"edited {i}"} for i in range(2)]
+
+    async def mocked_generate_ai_text(text: str) -> models.ArticleAIText:
+        if text == "edited 1":
+            raise ValueError("Invalid response")
+        return AI_TEXT
+
+    with patch("app.services.articles.generate_ai_text", side_effect=mocked_generate_ai_text):
+        with pytest.raises(RuntimeError):
+            await ArticleImport(db=db).run(build_export_html(exported))
+
+    with patch(
+        "app.services.articles.generate_ai_text", return_value=AI_TEXT
+    ) as mock_generate_ai_text:
+        article_import = ArticleImport(db=db)
+        await article_import.run(build_export_html(exported))
+
+    mock_generate_ai_text.assert_called_once_with("edited 1")
+    assert article_import.resumed == 1
+    assert len(await crud.review.get_multi_by_article_id(db=db, article_id="a0")) == 1
+
+    import_run = await crud.import_run.get(db=db, id=article_import.run_id)
+    assert (import_run.status, import_run.total, import_run.resumed) == (models.JOB_DONE, 2, 1)
+    assert not await crud.import_run.get_checkpoints(db=db, run_id=import_run.id)
+
+
+async def test_import_articles_from_snapshot(db: Session, tmp_path: Path) -> None:
+    """
+    Test that a stored snapshot is imported without downloading the export.
+    """
+    store = ExportSnapshotStore(path=tmp_path / "snapshots")
+    export_path = tmp_path / "export.html"
+    export_path.write_text(build_export_html([{"id": "a1", "title": "A1", "content": "text"}]))
+    content_hash = hashlib.sha256(export_path.read_bytes()).hexdigest()
+
+    with patch("app.services.import_pipeline.snapshots", store), patch(
+        "app.services.import_pipeline.download_export_from_worldanvil"
+    ) as mock_download, patch("app.services.articles.generate_ai_text", return_value=AI_TEXT):
+        with pytest.raises(ValueError):
+            await import_articles_from_snapshot(db=db)
+
+        await store.save(export_path, content_hash)
+        await import_articles_from_snapshot(db=db, content_hash=content_hash[:8])
+
+    mock_download.assert_not_called()
+    assert (await crud.article.get(db=db, id="a1")).summary == "summary"
+    import_run = await crud.import_run.get(db=db, export_hash=content_hash)
+    assert import_run.status == models.JOB_DONE
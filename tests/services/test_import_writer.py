@@ -0,0 +1,62 @@
+import pytest
+from sqlmodel import Session
+
+from app import crud, models
+from app.services.import_writer import ImportWriter
+
+
+async def test_import_writer(db: Session) -> None:
+    """
+    Test that creates, updates and reviews are upserted in chunks with their token counts.
+    """
+    await crud.article.create(
+        db=db,
+        obj_in=models.ArticleCreate(id="a0", title="A0", text="old", summary="summary"),
+    )
+
+    async with ImportWriter(db=db, chunk_size=2, flush_interval=60) as writer:
+        await writer.add_article({"id": "a0", "text": "new text", "content_hash": "h0"})
+        await writer.add_article(
+            models.ArticleCreate(id="a1", title="A1", text="text", tags=["tag"]).dict()
+        )
+        assert writer.written_articles == 2
+
+        await writer.add_review(models.ReviewCreate(article_id="a0", new_summary="new").dict())
+        assert writer.written_reviews == 0
+
+    assert (writer.written_articles, writer.written_reviews) == (2, 1)
+
+    article = await crud.article.get(db=db, id="a0")
+    db.refresh(article)
+    assert (article.text, article.text_tokens, article.content_hash) == ("new text", 2, "h0")
+    assert (article.title, article.summary) == ("A0", "summary")
+
+    article = await crud.article.get(db=db, id="a1")
+    assert (article.tags, article.text_tokens) == (["tag"], 1)
+    reviews = await crud.review.get_multi_by_article_id(db=db, article_id="a0")
+    assert [review.new_summary for review in reviews] == ["new"]
+
+
+async def test_import_writer_flushes_generated_writes(db: Session) -> None:
+    """
+    Test that generated writes are committed after a few of them, or after the flush interval.
+    """
+    async with ImportWriter(db=db, generated_chunk_size=2, flush_interval=60) as writer:
+        await writer.add_article({"id": "a0", "title": "A0"})
+        await writer.add_article({"id": "a1", "title": "A1"}, generated=True)
+        assert writer.written_articles == 0
+        await writer.add_review(models.ReviewCreate(article_id="a0", new_summary="new").dict())
+        assert (writer.written_articles, writer.written_reviews) == (2, 1)
+
+        writer.flush_interval = 0
+        await writer.add_article({"id": "a2", "title": "A2"})
+        assert writer.written_articles == 3
+
+
+async def test_import_writer_discards_on_error(db: Session) -> None:
+    with pytest.raises(ValueError):
+        async with ImportWriter(db=db) as writer:
+            await writer.add_article(models.ArticleCreate(id="a1", title="A1").dict())
+            raise ValueError()
+
+    assert await crud.article.get_or_none(db=db, id="a1") is None
@@ -0,0 +1,56 @@
+from unittest.mock import patch
+
+import pytest
+from sqlmodel import Session
+
+from app import crud, models
+from app.services import jobs
+
+
+async def test_enqueue_job(db: Session) -> None:
+    """
+    Test that a job is not queued twice while one of the same kind is active.
+    """
+    job = await jobs.enqueue_job(db=db, kind=jobs.JOB_IMPORT_ARTICLES)
+    assert job.status == models.JOB_QUEUED
+    assert (await jobs.enqueue_job(db=db, kind=jobs.JOB_IMPORT_ARTICLES)).id == job.id
+    assert (await jobs.enqueue_job(db=db, kind=jobs.JOB_GENERATE_AI_TEXT)).id != job.id
+
+    with pytest.raises(ValueError):
+        await jobs.enqueue_job(db=db, kind="unknown")
+
+
+async def test_run_next_job(db: Session) -> None:
+    """
+    Test that the worker runs the queued job and records its progress.
+    """
+    job = await jobs.enqueue_job(db=db, kind=jobs.JOB_GENERATE_AI_TEXT)
+
+    async def handler(db: Session, on_progress: jobs.ProgressCallback) -> None:
+        assert (await crud.job.get(db=db, id=job.id)).status == models.JOB_RUNNING
+        for i in range(1, 4):
+            await on_progress(i, 3)
+
+    with patch.dict(jobs.JOB_HANDLERS, {jobs.JOB_GENERATE_AI_TEXT: handler}):
+        ran = await jobs.run_next_job(db=db)
+
+    assert ran is not None
+    assert ran.id == job.id
+    assert ran.status == models.JOB_DONE
+    assert (ran.progress, ran.total) == (3, 3)
+    assert ran.started_at is not None and ran.finished_at is not None
+    assert await jobs.run_next_job(db=db) is None
+
+
+async def test_run_next_job_failed(db: Session) -> None:
+    job = await jobs.enqueue_job(db=db, kind=jobs.JOB_IMPORT_ARTICLES)
+
+    async def handler(db: Session, on_progress: jobs.ProgressCallback) -> None:
+        raise ValueError("World Anvil login failed")
+
+    with patch.dict(jobs.JOB_HANDLERS, {jobs.JOB_IMPORT_ARTICLES: handler}):
+        await jobs.run_next_job(db=db)
+
+    job = await crud.job.get(db=db, id=job.id)
+    assert job.status == models.JOB_FAILED
+    assert job.error == "World Anvil login failed"
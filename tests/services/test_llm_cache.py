@@ -0,0 +1,112 @@
+import os
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services import summarizer
+from app.services.llm_cache import LLMCache
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> LLMCache:
+    return LLMCache(path=tmp_path, max_size_mb=1, max_age_days=1)
+
+
+def test_cache_hit_and_miss(cache: LLMCache) -> None:
+    """
+    Test that stored responses are returned and lookups are counted.
+    """
+    key = cache.make_key("model", "1", 100, "prompt")
+    assert cache.get(key) is None
+
+    cache.set(key, "response")
+    assert cache.get(key) == "response"
+    assert cache.stats == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_cache_key_depends_on_all_parts(cache: LLMCache) -> None:
+    """
+    Test that changing the model, template version, max tokens or prompt changes the key.
+    """
+    key = cache.make_key("model", "1", 100, "prompt")
+    assert key == cache.make_key("model", "1", 100, "prompt")
+    assert key != cache.make_key("other model", "1", 100, "prompt")
+    assert key != cache.make_key("model", "2", 100, "prompt")
+    assert key != cache.make_key("model", "1", 200, "prompt")
+    assert key != cache.make_key("model", "1", 100, "other prompt")
+
+
+def test_cache_expired_entry_is_a_miss(cache: LLMCache) -> None:
+    """
+    Test that entries older than the max age are removed on lookup.
+    """
+    key = cache.make_key("prompt")
+    cache.set(key, "response")
+    old = time.time() - 2 * 24 * 60 * 60
+    os.utime(cache.get_file(key), (old, old))
+
+    assert cache.get(key) is None
+    assert not cache.get_file(key).exists()
+
+
+def test_cache_evict_least_recently_used(cache: LLMCache) -> None:
+    """
+    Test that the least recently used entries are evicted when over the size limit.
+    """
+    response = "x" * (400 * 1024)
+    keys = [cache.make_key(i) for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.set(key, response)
+        mtime = time.time() - 100 + i
+        os.utime(cache.get_file(key), (mtime, mtime))
+
+    assert cache.evict() == 1
+    assert not cache.get_file(keys[0]).exists()
+    assert cache.get_file(keys[1]).exists()
+    assert cache.get_file(keys[2]).exists()
+
+
+async def test_api_call_reads_through_cache(cache: LLMCache) -> None:
+    """
+    Test that api_call only calls the API on a cache miss or when the cache is bypassed.
+    """
+    message = MagicMock()
+    message.content[0].text = "A summary."
+    message.usage = SimpleNamespace(input_tokens=10, output_tokens=5)
+    create = AsyncMock(return_value=message)
+
+    with patch.object(summarizer, "cache", cache), patch.object(
+        summarizer.client.messages, "create", create
+    ):
+        assert await summarizer.api_call("prompt", 100, "summary") == "A summary."
+        assert await summarizer.api_call("prompt", 100, "summary") == "A summary."
+        assert create.await_count == 1
+
+        await summarizer.api_call("prompt", 100, "summary", use_cache=False)
+        assert create.await_count == 2
+
+        await summarizer.api_call("prompt", 100, "brief")
+        assert create.await_count == 3
+
+
+async def test_api_call_does_not_cache_invalid_responses(cache: LLMCache) -> None:
+    """
+    Test that responses failing validation are not stored.
+    """
+    message = MagicMock()
+    message.content[0].text = "not a date range"
+    message.usage = SimpleNamespace(input_tokens=10, output_tokens=5)
+    create = AsyncMock(return_value=message)
+
+    with patch.object(summarizer, "cache", cache), patch.object(
+        summarizer.client.messages, "create", create
+    ):
+        for _ in range(2):
+            with pytest.raises((ValueError, SyntaxError)):
+                await summarizer.generate_date_range("article text")
+
+    assert create.await_count == 2
+    assert cache.stats["hits"] == 0
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import anthropic
+import httpx
+import pytest
+from sqlmodel import Session
+
+from app import crud, models
+from app.services import summarizer
+from app.services.llm_journal import journal_llm_calls
+
+
+def mocked_message(text: str) -> MagicMock:
+    message = MagicMock()
+    message.content[0].text = text
+    message.usage = SimpleNamespace(input_tokens=100, output_tokens=10, cache_read_input_tokens=50)
+    return message
+
+
+async def test_api_call_is_journaled(db: Session) -> None:
+    """
+    Test that calls made inside `journal_llm_calls` are recorded with their usage and article.
+    """
+    create = AsyncMock(return_value=mocked_message("A brief."))
+    with patch.object(summarizer.client.messages, "create", create):
+        with journal_llm_calls(db=db, article_id="a1"):
+            await summarizer.api_call("prompt", 100, "brief", use_cache=False)
+        await summarizer.api_call("prompt", 100, "brief", use_cache=False)
+
+    (llm_call,) = await crud.llm_call.get_all(db=db)
+    assert llm_call.task == "brief"
+    assert llm_call.article_id == "a1"
+    assert llm_call.model == summarizer.MODEL
+    assert (llm_call.input_tokens, llm_call.output_tokens) == (100, 10)
+    assert llm_call.cache_read_input_tokens == 50
+    assert llm_call.latency is not None
+    assert not llm_call.cache_hit
+    assert llm_call.error is None
+
+
+async def test_api_call_error_is_journaled(db: Session) -> None:
+    """
+    Test that failed calls are recorded with their error.
+    """
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    create = AsyncMock(side_effect=anthropic.APIConnectionError(request=request))
+    with patch.object(summarizer.client.messages, "create", create):
+        with journal_llm_calls(db=db, article_id="a1"), pytest.raises(anthropic.APIError):
+            await summarizer.api_call("prompt", 100, "brief", use_cache=False)
+
+    (llm_call,) = await crud.llm_call.get_all(db=db)
+    assert llm_call.error == "Connection error."
+    assert llm_call.input_tokens == 0
+
+
+async def test_journal_keeps_pending_writes(db: Session) -> None:
+    """
+    Test that journaling a call neither commits nor rolls back the caller's pending writes.
+    """
+    article = models.Article(id="a1", title="A1")
+    db.add(article)
+    create = AsyncMock(return_value=mocked_message("A brief."))
+    with patch.object(summarizer.client.messages, "create", create):
+        with journal_llm_calls(db=db, article_id="a1"):
+            await summarizer.api_call("prompt", 100, "brief", use_cache=False)
+
+    assert article in db.new
+    assert len(await crud.llm_call.get_all(db=db)) == 1
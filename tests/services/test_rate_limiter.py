@@ -0,0 +1,160 @@
+from typing import Optional
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import anthropic
+import httpx
+import pytest
+from tenacity import wait_none
+
+from app.services.rate_limiter import AdaptiveLimiter, is_retryable
+
+REQUEST = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+
+
+def make_error(
+    status_code: int, headers: Optional[dict[str, str]] = None
+) -> anthropic.APIStatusError:
+    response = httpx.Response(status_code, headers=headers, request=REQUEST)
+    error_class = anthropic.RateLimitError if status_code == 429 else anthropic.APIStatusError
+    return error_class("error", response=response, body=None)
+
+
+@pytest.fixture(autouse=True)
+def no_retry_wait():
+    with patch("app.services.rate_limiter.wait_random_exponential", return_value=wait_none()):
+        yield
+
+
+def test_is_retryable() -> None:
+    assert is_retryable(make_error(429))
+    assert is_retryable(make_error(529))
+    assert is_retryable(make_error(500))
+    assert is_retryable(anthropic.APIConnectionError(request=REQUEST))
+    assert not is_retryable(make_error(400))
+    assert not is_retryable(ValueError())
+
+
+def test_aimd() -> None:
+    """
+    Test that concurrency grows by one slot per window of successes and halves on rate limits.
+    """
+    limiter = AdaptiveLimiter(initial_concurrency=4, max_concurrency=5)
+    for _ in range(4):
+        limiter.on_success()
+    assert limiter.concurrency == pytest.approx(4.93, abs=0.01)
+
+    limiter.on_failure(make_error(429))
+    assert int(limiter.concurrency) == 2
+    limiter.on_failure(make_error(529))
+    limiter.on_failure(make_error(529))
+    assert limiter.concurrency == 1
+
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.concurrency == 5
+
+
+def test_retry_after_pauses() -> None:
+    limiter = AdaptiveLimiter()
+    limiter.on_failure(make_error(429, headers={"retry-after": "30"}))
+    assert limiter.paused_until - time.monotonic() == pytest.approx(30, abs=1)
+
+
+async def test_run_retries() -> None:
+    """
+    Test that retryable errors are retried until the request succeeds.
+    """
+    limiter = AdaptiveLimiter(initial_concurrency=4)
+    errors = [make_error(529), make_error(500)]
+
+    async def request() -> str:
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert await limiter.run(request) == "ok"
+    assert not errors
+    assert int(limiter.concurrency) == 2
+
+
+async def test_run_does_not_retry_client_errors() -> None:
+    limiter = AdaptiveLimiter()
+    attempts = 0
+
+    async def request() -> str:
+        nonlocal attempts
+        attempts += 1
+        raise make_error(400)
+
+    with pytest.raises(anthropic.APIStatusError):
+        await limiter.run(request)
+    assert attempts == 1
+    assert limiter.consecutive_failures == 0
+
+
+async def test_run_gives_up() -> None:
+    limiter = AdaptiveLimiter(failure_threshold=10, max_retries=2)
+    attempts = 0
+
+    async def request() -> str:
+        nonlocal attempts
+        attempts += 1
+        raise make_error(500)
+
+    with pytest.raises(anthropic.APIStatusError):
+        await limiter.run(request)
+    assert attempts == 3
+
+
+def test_circuit_breaker() -> None:
+    """
+    Test that the circuit opens after consecutive failures and a success resets the count.
+    """
+    limiter = AdaptiveLimiter(failure_threshold=3, cooldown=60)
+    limiter.on_failure(make_error(500))
+    limiter.on_failure(make_error(500))
+    limiter.on_success()
+    limiter.on_failure(make_error(500))
+    limiter.on_failure(make_error(500))
+    assert limiter.circuit_opened == 0
+
+    limiter.on_failure(make_error(500))
+    assert limiter.circuit_opened == 1
+    assert limiter.paused_until - time.monotonic() == pytest.approx(60, abs=1)
+
+
+async def test_slots_bound_concurrency() -> None:
+    limiter = AdaptiveLimiter(initial_concurrency=2)
+    in_flight = 0
+    max_in_flight = 0
+
+    async def request() -> None:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    await asyncio.gather(*[limiter.run(request) for _ in range(6)])
+    assert max_in_flight == 2
+
+
+async def test_on_response_pauses_when_exhausted() -> None:
+    limiter = AdaptiveLimiter()
+    reset = (datetime.now(timezone.utc) + timedelta(seconds=20)).isoformat()
+    response = httpx.Response(
+        200,
+        headers={
+            "anthropic-ratelimit-requests-remaining": "10",
+            "anthropic-ratelimit-tokens-remaining": "0",
+            "anthropic-ratelimit-tokens-reset": reset,
+        },
+        request=REQUEST,
+    )
+    await limiter.on_response(response)
+
+    assert limiter.rate_limits["tokens-remaining"] == "0"
+    assert limiter.paused_until - time.monotonic() == pytest.approx(20, abs=1)
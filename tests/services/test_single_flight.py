@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight, get_flight_key
+
+
+def test_get_flight_key() -> None:
+    assert get_flight_key("a1", "summary", "text") == get_flight_key("a1", "summary", "text")
+    assert get_flight_key("a1", "summary", "text") != get_flight_key("a1", "summary", "edited")
+    assert get_flight_key("a1", "summary", "text") != get_flight_key("a1", "brief", "text")
+
+
+async def test_run_shares_in_flight_call() -> None:
+    """
+    Test that concurrent callers with the same key share one call, and other keys do not.
+    """
+    single_flight = SingleFlight()
+    calls = []
+
+    async def func(value: str) -> str:
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value
+
+    results = await asyncio.gather(
+        single_flight.run("a", lambda: func("first")),
+        single_flight.run("a", lambda: func("second")),
+        single_flight.run("b", lambda: func("third")),
+    )
+
+    assert results == ["first", "first", "third"]
+    assert calls == ["first", "third"]
+    assert single_flight.stats == {"in_flight": 0, "shared": 1}
+
+    assert await single_flight.run("a", lambda: func("fourth")) == "fourth"
+
+
+async def test_run_shares_errors() -> None:
+    single_flight = SingleFlight()
+
+    async def func() -> None:
+        await asyncio.sleep(0.01)
+        raise ValueError("failed")
+
+    results = await asyncio.gather(
+        single_flight.run("a", func), single_flight.run("a", func), return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert not single_flight.calls
+
+
+async def test_cancelled_caller_does_not_cancel_call() -> None:
+    single_flight = SingleFlight()
+
+    async def func() -> str:
+        await asyncio.sleep(0.02)
+        return "done"
+
+    first = asyncio.ensure_future(single_flight.run("a", func))
+    second = asyncio.ensure_future(single_flight.run("a", func))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+async def test_join_in_flight_call() -> None:
+    single_flight = SingleFlight()
+    assert single_flight.join("a") is None
+
+    async def func() -> str:
+        await asyncio.sleep(0.01)
+        return "done"
+
+    call = asyncio.create_task(single_flight.run("a", func))
+    await asyncio.sleep(0)
+    joined = single_flight.join("a")
+    assert joined is not None
+    assert await joined == await call == "done"
+    assert single_flight.stats == {"in_flight": 0, "shared": 1}
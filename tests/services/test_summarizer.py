@@ -0,0 +1,251 @@
+import json
+from collections.abc import AsyncIterator, Generator
+from pathlib import Path
+from typing import Any
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.services import summarizer
+from app.services.llm_cache import LLMCache
+from app.services.tokenizer import estimate_tokens
+from tests.fake_batch_server import DEFAULT_RESPONSE, create_fake_batch_server
+
+
+async def test_generate_ai_text() -> None:
+    """
+    Test that the summary, brief and date range are parsed from a single LLM call.
+    """
+    response = (
+        "```json\n"
+        '{"summary": "A summary.", "brief": "A brief.", "year_start": 11302, "year_end": null}'
+        "\n```"
+    )
+    with patch("app.services.summarizer.api_call", AsyncMock(return_value=response)) as mock:
+        ai_text = await summarizer.generate_ai_text("article text")
+
+    mock.assert_awaited_once()
+    assert "article text" in mock.call_args.args[0]
+    assert ai_text.summary == "A summary."
+    assert ai_text.brief == "A brief."
+    assert (ai_text.year_start, ai_text.year_end) == (11302, None)
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        "I could not summarize this article.",
+        '{"summary": "A summary.", "year_start": 1, "year_end": 2}',
+        '{"summary": "A summary.", "brief": "A brief.", "year_start": 2, "year_end": 1}',
+    ],
+)
+async def test_generate_ai_text_invalid_response(response: str) -> None:
+    """
+    Test that invalid responses raise a ValueError.
+    """
+    with patch("app.services.summarizer.api_call", AsyncMock(return_value=response)):
+        with pytest.raises(ValueError):
+            await summarizer.generate_ai_text("article text")
+
+
+@pytest.fixture
+def fake_batch_server(tmp_path: Path) -> Generator[FastAPI, None, None]:
+    def respond(params: dict[str, Any]) -> str:
+        prompt = params["messages"][0]["content"][0]["text"]
+        if "unparsable" in prompt:
+            return "I could not summarize this article."
+        if "error" in prompt:
+            raise RuntimeError("Overloaded")
+        return DEFAULT_RESPONSE
+
+    app = create_fake_batch_server(respond=respond, polls_until_ended=2)
+
+    def get_batch_client() -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://testserver",
+            headers={"x-api-key": "test"},
+        )
+
+    with patch.object(summarizer, "get_batch_client", get_batch_client), patch.object(
+        summarizer, "cache", LLMCache(path=tmp_path)
+    ):
+        yield app
+
+
+async def test_generate_ai_text_batch(fake_batch_server: FastAPI) -> None:
+    """
+    Test that texts are submitted as one batch and failed results are left out.
+    """
+    texts = {"a1": "text 1", "a2": "text 2", "a3": "unparsable", "a4": "error"}
+    ai_texts = await summarizer.generate_ai_text_batch(texts, poll_interval=0)
+
+    assert len(fake_batch_server.state.batches) == 1
+    batch = next(iter(fake_batch_server.state.batches.values()))
+    assert batch["polls"] == 3
+    assert [r["custom_id"] for r in batch["requests"]] == ["a1", "a2", "a3", "a4"]
+    assert set(ai_texts) == {"a1", "a2"}
+    assert ai_texts["a1"].summary == "A summary."
+    assert (ai_texts["a2"].year_start, ai_texts["a2"].year_end) == (11000, 11100)
+
+
+async def test_generate_ai_text_batch_skips_cached(fake_batch_server: FastAPI) -> None:
+    """
+    Test that texts with cached responses are not resubmitted.
+    """
+    await summarizer.generate_ai_text_batch({"a1": "text 1"}, poll_interval=0)
+    ai_texts = await summarizer.generate_ai_text_batch(
+        {"a1": "text 1", "a2": "text 2"}, poll_interval=0
+    )
+
+    batches = list(fake_batch_server.state.batches.values())
+    assert [r["custom_id"] for r in batches[1]["requests"]] == ["a2"]
+    assert set(ai_texts) == {"a1", "a2"}
+
+
+async def test_api_call_caches_system_prompt_prefix() -> None:
+    """
+    Test that the static instructions are sent as a cached system prompt before the article.
+    """
+    message = MagicMock()
+    message.content[0].text = "A brief."
+    message.usage = SimpleNamespace(
+        input_tokens=20, cache_creation_input_tokens=0, cache_read_input_tokens=1000
+    )
+    create = AsyncMock(return_value=message)
+    stats = summarizer.PromptCacheStats()
+
+    with patch.object(summarizer.client.messages, "create", create), patch.object(
+        summarizer, "prompt_cache_stats", stats
+    ):
+        assert await summarizer.generate_brief("article text", use_cache=False) == "A brief."
+
+    params = create.call_args.kwargs
+    assert params["system"] == [
+        {
+            "type": "text",
+            "text": summarizer.SHARED_SYSTEM_PROMPT,
+            "cache_control": {"type": "ephemeral"},
+        },
+        {"type": "text", "text": summarizer.get_task_system_prompt("brief")},
+    ]
+    assert summarizer.BRIEF_SYSTEM_PROMPT in params["system"][0]["text"]
+    assert "article text" not in params["system"][0]["text"]
+    assert params["messages"][0]["content"][0]["text"] == "<article>\narticle text\n</article>"
+    assert stats.stats == {
+        "calls": 1,
+        "hit_rate": 1.0,
+        "cache_read_input_tokens": 1000,
+        "cache_creation_input_tokens": 0,
+        "tokens_saved": 900,
+    }
+
+
+def test_shared_system_prompt_is_cacheable() -> None:
+    """
+    Test that every task shares a cached prefix long enough for the model to cache it.
+    """
+    estimate = estimate_tokens(summarizer.SHARED_SYSTEM_PROMPT)
+    assert estimate.tokens - estimate.error >= summarizer.PROMPT_CACHE_MIN_TOKENS
+
+    prefixes = {
+        json.dumps(summarizer.build_message_params("prompt", 100, task)["system"][0])
+        for task in summarizer.TASK_PROMPTS
+    }
+    assert len(prefixes) == 1
+    with pytest.raises(KeyError):
+        summarizer.get_task_system_prompt("unknown")
+
+
+def test_prompt_cache_stats_record_usage() -> None:
+    """
+    Test that usage is recorded from API models and from batch result dicts.
+    """
+    stats = summarizer.PromptCacheStats()
+    stats.record_usage(SimpleNamespace(input_tokens=10, cache_creation_input_tokens=500))
+    stats.record_usage({"input_tokens": 10, "cache_read_input_tokens": 500})
+
+    assert stats.calls == 2
+    assert stats.stats["hit_rate"] == 0.5
+    assert stats.cache_creation_input_tokens == 500
+    assert stats.stats["tokens_saved"] == 450
+
+
+async def test_stream_api_call_caches_complete_response(tmp_path: Path) -> None:
+    """
+    Test that streamed chunks are yielded as they arrive and the complete response is cached.
+    """
+
+    class MockedMessageStream:
+        async def __aenter__(self) -> "MockedMessageStream":
+            return self
+
+        async def __aexit__(self, *args: Any) -> None:
+            pass
+
+        @property
+        async def text_stream(self) -> AsyncIterator[str]:
+            for chunk in ["(11302", ", ", "11311)"]:
+                yield chunk
+
+        async def get_final_message(self) -> SimpleNamespace:
+            return SimpleNamespace(usage=SimpleNamespace(input_tokens=10, output_tokens=5))
+
+    stream = MagicMock(return_value=MockedMessageStream())
+    with patch.object(summarizer.client.messages, "stream", stream), patch.object(
+        summarizer, "cache", LLMCache(path=tmp_path)
+    ):
+        chunks = [chunk async for chunk in summarizer.stream_date_range("article text")]
+        cached_chunks = [chunk async for chunk in summarizer.stream_date_range("article text")]
+
+    assert chunks == ["(11302", ", ", "11311)"]
+    assert cached_chunks == ["(11302, 11311)"]
+    stream.assert_called_once()
+
+
+async def test_generate_summary_map_reduce(tmp_path: Path) -> None:
+    """
+    Test that long texts are summarized per chunk, then reduced, and that an edit to one
+    section only re-summarizes its chunk.
+    """
+
+    async def create(**params: Any) -> MagicMock:
+        message = MagicMock()
+        prompt = params["messages"][0]["content"][0]["text"]
+        if params["system"][1]["text"] == summarizer.get_task_system_prompt("reduce_summary"):
+            message.content[0].text = f"reduced {prompt.count('<section>')} sections"
+        else:
+            message.content[0].text = f"summary of {prompt.splitlines()[2][:10]}"
+        message.usage = SimpleNamespace(input_tokens=10, output_tokens=5)
+        return message
+
+    mocked_create = AsyncMock(side_effect=create)
+    sections = [f"Section {i}\n" + " ".join(["word"] * 20) + "." for i in range(3)]
+    with patch.object(summarizer.client.messages, "create", mocked_create), patch.object(
+        summarizer, "cache", LLMCache(path=tmp_path)
+    ), patch.object(summarizer.settings, "SUMMARY_CHUNK_TOKENS", 30), patch(
+        "app.services.chunker.count_tokens_many",
+        side_effect=lambda texts: [len(text.split()) for text in texts],
+    ):
+        assert await summarizer.generate_summary("\n".join(sections)) == "reduced 3 sections"
+        assert mocked_create.await_count == 4
+
+        sections[1] = "Section 1\n" + " ".join(["edited"] * 20) + "."
+        assert await summarizer.generate_summary("\n".join(sections)) == "reduced 3 sections"
+        assert mocked_create.await_count == 6
+
+
+async def test_generate_summary_short_text_single_call() -> None:
+    """
+    Test that texts within the chunk budget are summarized in a single call.
+    """
+    with patch(
+        "app.services.summarizer.api_call", AsyncMock(return_value="A summary.")
+    ) as mock, patch("app.services.summarizer.split_text") as mock_split_text:
+        assert await summarizer.generate_summary("article text", use_cache=False) == "A summary."
+
+    mock_split_text.assert_not_called()
+    assert mock.call_args.args[2] == "summary"
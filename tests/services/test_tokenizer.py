@@ -0,0 +1,80 @@
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from app.services import tokenizer
+
+
+def get_mocked_tokenizer() -> MagicMock:
+    """
+    Create a mocked tokenizer that splits texts on whitespace.
+    """
+    mock_tokenizer = MagicMock()
+    mock_tokenizer.side_effect = lambda texts, **kwargs: {
+        "input_ids": [text.split() for text in texts]
+    }
+    return mock_tokenizer
+
+
+def test_count_tokens_many() -> None:
+    """
+    Test that all texts are tokenized in a single batched call.
+    """
+    mock_tokenizer = get_mocked_tokenizer()
+    with patch("app.services.tokenizer.get_tokenizer", return_value=mock_tokenizer):
+        counts = tokenizer.count_tokens_many(["one two", None, "", "one two three"])
+
+    assert counts == [2, 0, 0, 3]
+    mock_tokenizer.assert_called_once()
+    assert mock_tokenizer.call_args.args[0] == ["one two", "one two three"]
+
+
+def test_count_tokens_many_without_text() -> None:
+    """
+    Test that the tokenizer is not loaded when there is nothing to tokenize.
+    """
+    with patch("app.services.tokenizer.get_tokenizer") as mock_get_tokenizer:
+        assert tokenizer.count_tokens_many([None, ""]) == [0, 0]
+    mock_get_tokenizer.assert_not_called()
+
+
+def test_count_tokens() -> None:
+    """
+    Test counting the tokens of a single text.
+    """
+    with patch("app.services.tokenizer.get_tokenizer", return_value=get_mocked_tokenizer()):
+        assert tokenizer.count_tokens("one two three four") == 4
+
+
+def test_token_estimator_fit() -> None:
+    """
+    Test that fitting recovers the per-character and per-word ratios of the samples.
+    """
+    texts = ["a " * n + "longer words " * m for n in range(1, 20) for m in range(1, 20)]
+    samples = [(text, round(0.2 * len(text) + 0.5 * len(text.split()))) for text in texts]
+
+    estimator = tokenizer.TokenEstimator.fit(samples)
+
+    assert abs(estimator.char_ratio - 0.2) < 0.01
+    assert abs(estimator.word_ratio - 0.5) < 0.05
+    for text, tokens in samples:
+        estimate = estimator.estimate(text)
+        assert abs(estimate.tokens - tokens) <= max(estimate.error, 1)
+
+
+def test_token_estimator_save_and_load(tmp_path: Path) -> None:
+    """
+    Test that a fitted estimator can be persisted and loaded again.
+    """
+    path = tmp_path / "token_estimator.json"
+    assert vars(tokenizer.TokenEstimator.load(path)) == vars(tokenizer.TokenEstimator())
+
+    estimator = tokenizer.TokenEstimator(char_ratio=0.3, word_ratio=0.1, relative_error=0.05)
+    estimator.save(path)
+    assert vars(tokenizer.TokenEstimator.load(path)) == vars(estimator)
+
+
+def test_token_estimator_estimate_empty_text() -> None:
+    """
+    Test that empty texts are estimated as 0 tokens without an error bound.
+    """
+    assert tokenizer.TokenEstimator().estimate(None) == tokenizer.TokenEstimate(0, 0)
@@ -0,0 +1,132 @@
+from typing import Any
+
+import gzip
+import queue
+from pathlib import Path
+
+import pytest
+
+from app.services import worldanvil
+from tests.mock_objects import MOCKED_EXPORT_HTML, build_export_html
+
+EXPORTS = [
+    MOCKED_EXPORT_HTML,
+    build_export_html(
+        [
+            {"id": "a1", "title": "A1", "content": "<p>text</p> 1", "tags": ["b", "a"]},
+            {"id": "a2", "title": "A2", "content": "text 2", "category": "Person"},
+        ]
+    ),
+]
+
+
+def parse_with_soup(html: str) -> list[dict[str, Any]]:
+    """Parse an export by splitting its BeautifulSoup tree and parsing each article again"""
+    return [
+        worldanvil.parse_single_article(str(article_div))
+        for article_div in worldanvil.split_articles(html)
+    ]
+
+
+@pytest.mark.parametrize("export_html", EXPORTS, ids=["mocked", "built"])
+@pytest.mark.parametrize("chunk_size", [7, 100, worldanvil.STREAM_CHUNK_SIZE])
+def test_iter_articles_matches_soup(export_html: str, chunk_size: int) -> None:
+    """
+    Test that the streaming parser returns the same articles as parsing the soup of each one.
+    """
+    chunks = worldanvil.iter_html_chunks(export_html, chunk_size=chunk_size)
+    assert list(worldanvil.iter_articles(chunks)) == parse_with_soup(export_html)
+
+
+def test_iter_articles_from_bytes() -> None:
+    """
+    Test that an export read in blocks of bytes is cut into chunks the parser can handle.
+    """
+    export_bytes = MOCKED_EXPORT_HTML.encode()
+    blocks = (export_bytes[i : i + 5] for i in range(0, len(export_bytes), 5))
+    chunks = list(worldanvil.iter_article_chunks(blocks))
+
+    assert all(chunk.startswith(b"<") for chunk in chunks[1:])
+    assert list(worldanvil.iter_articles(chunks)) == parse_with_soup(MOCKED_EXPORT_HTML)
+
+
+@pytest.mark.parametrize("export_html", EXPORTS, ids=["mocked", "built"])
+def test_split_article_html_matches_soup(export_html: str) -> None:
+    articles_html = worldanvil.split_article_html(export_html)
+    assert worldanvil.parse_articles(articles_html) == parse_with_soup(export_html)
+
+
+@pytest.mark.parametrize("file_name", ["export.html", "export.html.gz"])
+def test_iter_export_file_chunks(tmp_path: Path, file_name: str) -> None:
+    export_path = tmp_path / file_name
+    export_bytes = MOCKED_EXPORT_HTML.encode()
+    export_path.write_bytes(
+        gzip.compress(export_bytes) if file_name.endswith(".gz") else export_bytes
+    )
+
+    chunks = worldanvil.iter_export_file_chunks(export_path)
+    assert list(worldanvil.iter_articles(chunks)) == parse_with_soup(MOCKED_EXPORT_HTML)
+
+
+def test_put_article_html_batches() -> None:
+    """
+    Test that the export is put on the queue in batches of article HTML, then `None`.
+    """
+    export_html = build_export_html(
+        [{"id": f"a{i}", "title": f"A{i}", "content": f"text {i}"} for i in range(5)]
+    )
+    batches: queue.Queue[Any] = queue.Queue()
+
+    worldanvil.put_article_html_batches(batches, export_html=export_html, batch_size=2)
+
+    put = [batches.get_nowait() for _ in range(batches.qsize())]
+    assert [len(batch) for batch in put[:-1]] == [2, 2, 1]
+    assert put[-1] is None
+    articles = [article for batch in put[:-1] for article in worldanvil.parse_articles(batch)]
+    assert articles == parse_with_soup(export_html)
+
+
+def test_put_article_html_batches_failed(tmp_path: Path) -> None:
+    """
+    Test that the error that stopped the split is put on the queue.
+    """
+    batches: queue.Queue[Any] = queue.Queue()
+
+    worldanvil.put_article_html_batches(batches, export_path=tmp_path / "missing.html")
+
+    assert isinstance(batches.get_nowait(), FileNotFoundError)
+    assert batches.empty()
+
+
+def test_parse_mocked_export() -> None:
+    articles = worldanvil.get_articles_from_html(MOCKED_EXPORT_HTML)
+
+    assert [article["id"] for article in articles] == ["a1", "a2", "a3"]
+    assert articles[0]["title"] == "The  FirstCity"
+    assert articles[0]["content"].startswith("The city was founded in\n11302\n& grew")
+    assert "track" not in articles[0]["content"]
+    assert articles[0]["tags"] == ["city", "coast"]
+    assert (articles[0]["category"], articles[0]["template"]) == ("Settlements", "Settlement")
+    assert articles[2]["title"] == "Untitled"
+
+
+def test_iter_article_elements_frees_articles() -> None:
+    """
+    Test that each article is cleared once the parser moves on to the next one.
+    """
+    elements = []
+    for element in worldanvil.iter_article_elements([MOCKED_EXPORT_HTML]):
+        assert len(element)
+        elements.append(element)
+
+    assert [len(element) for element in elements[:-1]] == [0, 0]
+    assert elements[-1].getprevious() is None
+
+
+@pytest.mark.parametrize("export_html", EXPORTS, ids=["mocked", "built"])
+def test_parse_articles_matches_soup(export_html: str) -> None:
+    """
+    Test that the lxml engine parses the HTML of each article like BeautifulSoup does.
+    """
+    articles_html = [str(article_div) for article_div in worldanvil.split_articles(export_html)]
+    assert worldanvil.parse_articles(articles_html) == parse_with_soup(export_html)
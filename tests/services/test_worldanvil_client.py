@@ -0,0 +1,109 @@
+import hashlib
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.services.export_snapshots import ExportSnapshotStore
+from app.services.worldanvil_client import (
+    WorldAnvilClient,
+    WorldAnvilError,
+    download_export_from_worldanvil,
+)
+
+EXPORT_PATH = "/world/export"
+EXPORT_BODY = b"<html>" + b"article " * 50_000 + b"</html>"
+LOGIN_FORM = b'<form><input type="hidden" name="_csrf_token" value="token"></form>'
+
+
+def build_transport(requests: list[str], password: str = "secret") -> httpx.MockTransport:
+    """A World Anvil that redirects to its login page until the session cookie is sent"""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        if request.url.path == "/login":
+            return httpx.Response(200, content=LOGIN_FORM)
+        if request.url.path == "/login_check":
+            if f"_password={password}" not in request.content.decode():
+                return httpx.Response(302, headers={"Location": "/login"})
+            return httpx.Response(
+                302,
+                headers={
+                    "Location": "/",
+                    "Set-Cookie": "session=abc; Path=/; Expires=Fri, 01 Jan 2100 00:00:00 GMT",
+                },
+            )
+        if request.url.path == "/":
+            return httpx.Response(200)
+        if "session=abc" not in request.headers.get("Cookie", ""):
+            return httpx.Response(302, headers={"Location": "/login"})
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=EXPORT_BODY, headers={"ETag": '"v1"'})
+
+    return httpx.MockTransport(handler)
+
+
+async def test_download_export(tmp_path: Path) -> None:
+    """
+    Test that the client logs in when redirected to the login page and persists its session.
+    """
+    requests: list[str] = []
+    cookies_file = tmp_path / "cookies.txt"
+    export_file = tmp_path / "export.html"
+
+    client = WorldAnvilClient("user", "secret", cookies_file, build_transport(requests))
+    download = await client.download_export(EXPORT_PATH, export_file)
+    await client.aclose()
+
+    assert download.path == export_file
+    assert download.etag == '"v1"'
+    assert download.content_hash == hashlib.sha256(EXPORT_BODY).hexdigest()
+    assert export_file.read_bytes() == EXPORT_BODY
+    assert not (tmp_path / "export.html.part").exists()
+    assert requests.count("/login_check") == 1
+    assert cookies_file.exists()
+
+    # A new client reuses the persisted session
+    requests.clear()
+    client = WorldAnvilClient("user", "secret", cookies_file, build_transport(requests))
+    download = await client.download_export(EXPORT_PATH, export_file, etag='"v1"')
+    await client.aclose()
+
+    assert download.path is None
+    assert download.etag == '"v1"'
+    assert requests == [EXPORT_PATH]
+
+
+async def test_download_export_login_failed(tmp_path: Path) -> None:
+    """
+    Test that rejected credentials raise an error without writing the export.
+    """
+    client = WorldAnvilClient(
+        "user", "wrong", tmp_path / "cookies.txt", build_transport(requests=[])
+    )
+    with pytest.raises(WorldAnvilError):
+        await client.download_export(EXPORT_PATH, tmp_path / "export.html")
+    await client.aclose()
+
+    assert not (tmp_path / "export.html").exists()
+
+
+async def test_download_export_saves_snapshot(tmp_path: Path) -> None:
+    """
+    Test that each downloaded export is kept as a snapshot, and a 304 saves nothing.
+    """
+    store = ExportSnapshotStore(path=tmp_path / "snapshots")
+    client = WorldAnvilClient("user", "secret", tmp_path / "cookies.txt", build_transport([]))
+
+    with patch("app.services.worldanvil_client.get_client", return_value=client), patch(
+        "app.services.worldanvil_client.snapshots", store
+    ), patch("app.services.worldanvil_client.EXPORT_URL", EXPORT_PATH):
+        download = await download_export_from_worldanvil(path=tmp_path / "export.html")
+        await download_export_from_worldanvil(etag=download.etag, path=tmp_path / "export.html")
+    await client.aclose()
+
+    snapshot = store.get()
+    assert [snapshot] == store.get_all()
+    assert snapshot is not None and snapshot.content_hash == download.content_hash
@@ -0,0 +1,70 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from sqlmodel import Session
+
+from app import crud, models
+from app.services.worldanvil import EXPORT_URL
+from app.services.worldanvil_client import ExportDownload
+from app.services.worldanvil_sync import sync_worldanvil
+from tests.mock_objects import build_export_html
+
+AI_TEXT = models.ArticleAIText(summary="summary", brief="brief", year_start=1, year_end=2)
+
+
+def write_export(tmp_path: Path) -> Path:
+    export_path = tmp_path / "export.html"
+    export_path.write_text(build_export_html([{"id": "a1", "title": "A1", "content": "text"}]))
+    return export_path
+
+
+async def test_sync_worldanvil(db: Session, tmp_path: Path) -> None:
+    """
+    Test that the export is only imported when it is modified and its content changed.
+    """
+    export_path = write_export(tmp_path)
+    responses = [
+        ExportDownload(export_path, "hash", '"v1"', "Mon, 01 Jan 2024 00:00:00 GMT"),
+        ExportDownload(None, None, '"v1"', "Mon, 01 Jan 2024 00:00:00 GMT"),
+        ExportDownload(export_path, "hash", '"v2"', None),
+    ]
+
+    with patch(
+        "app.services.worldanvil_sync.download_export_from_worldanvil",
+        side_effect=responses,
+    ) as mock_get_export, patch(
+        "app.services.articles.generate_ai_text", return_value=AI_TEXT
+    ) as mock_generate_ai_text:
+        for _ in responses:
+            await sync_worldanvil(db=db)
+
+    assert mock_get_export.call_args_list[0].kwargs == {"etag": None, "last_modified": None}
+    assert mock_get_export.call_args_list[1].kwargs == {
+        "etag": '"v1"',
+        "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+    mock_generate_ai_text.assert_called_once()
+    assert (await crud.article.get(db=db, id="a1")).summary == "summary"
+
+    sync_state = await crud.worldanvil_sync.get(db=db, export_url=EXPORT_URL)
+    assert (sync_state.checks, sync_state.not_modified) == (3, 1)
+    assert (sync_state.unchanged, sync_state.imports) == (1, 1)
+    assert (sync_state.etag, sync_state.last_modified) == ('"v2"', "")
+
+
+async def test_sync_worldanvil_failed(db: Session, tmp_path: Path) -> None:
+    """
+    Test that a failed import is retried by the next sync.
+    """
+    export_path = write_export(tmp_path)
+
+    with patch(
+        "app.services.worldanvil_sync.download_export_from_worldanvil",
+        return_value=ExportDownload(export_path, "hash", '"v1"', None),
+    ), patch("app.services.articles.generate_ai_text", side_effect=ValueError()):
+        with pytest.raises(RuntimeError):
+            await sync_worldanvil(db=db)
+
+    sync_state = await crud.worldanvil_sync.get_or_create(db=db, export_url=EXPORT_URL)
+    assert (sync_state.etag, sync_state.content_hash) == (None, None)
@@ -1,3 +1,5 @@
+import json
+from collections.abc import AsyncIterator
 from unittest.mock import patch
 
 import pytest
@@ -320,3 +322,43 @@ def test_list_all_articles(
 
     # Assert all 3 articles are returned
     assert len(response.context["articles"]) == 3  # type: ignore
+
+
+async def test_stream_article_summary(
+    db_with_user: Session, client: TestClient, normal_user_cookies: Cookies
+) -> None:
+    """
+    Test that the summary is streamed as Server-Sent Events and saved when complete.
+    """
+
+    async def mocked_stream_summary(text: str, use_cache: bool) -> AsyncIterator[str]:
+        for chunk in ["A ", "streamed\n", "summary."]:
+            yield chunk
+
+    await crud.article.create(
+        db=db_with_user, obj_in=models.ArticleCreate(id="a1", title="A1", text="text")
+    )
+    client.cookies = normal_user_cookies
+    with patch("app.services.articles.stream_summary", side_effect=mocked_stream_summary):
+        response = client.get("/article/a1/generate-summary/stream")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [event.split("\n") for event in response.text.strip().split("\n\n")]
+    assert [event[0] for event in events] == ["event: token"] * 3 + ["event: done"]
+    assert events[1][1] == 'data: "streamed\\n"'
+    assert json.loads(events[-1][1][len("data: ") :])["summary"] == "A streamed\nsummary."
+    assert (await crud.article.get(db=db_with_user, id="a1")).summary == "A streamed\nsummary."
+
+
+def test_stream_article_summary_not_found(
+    db_with_user: Session,  # pylint: disable=unused-argument
+    client: TestClient,
+    normal_user_cookies: Cookies,
+) -> None:
+    """
+    Test that streaming the summary of a missing article returns a 404.
+    """
+    client.cookies = normal_user_cookies
+    response = client.get("/article/missing/generate-summary/stream")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,69 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from httpx import Cookies
+from sqlmodel import Session
+
+from app import crud, models
+from app.services.export_snapshots import ExportSnapshotStore
+
+
+async def test_list_jobs(
+    db_with_user: Session, client: TestClient, normal_user_cookies: Cookies
+) -> None:
+    """
+    Test that a user can view the job counts and recent jobs.
+    """
+    await crud.job.create(
+        db=db_with_user, obj_in=models.JobCreate(id="j1", kind="import_articles", total=10)
+    )
+    client.cookies = normal_user_cookies
+    response = client.get("/jobs")
+    assert response.status_code == 200
+    assert response.template.name == "job/list.html"  # type: ignore
+    assert response.context["status_counts"].queued == 1  # type: ignore
+    assert response.context["jobs"][0].id == "j1"  # type: ignore
+
+
+async def test_import_articles_enqueues_job(
+    db_with_user: Session, client: TestClient, normal_user_cookies: Cookies
+) -> None:
+    """
+    Test that importing articles queues a job and returns immediately.
+    """
+    client.cookies = normal_user_cookies
+    response = client.post("/import-articles", follow_redirects=False)
+    assert response.status_code == 303
+
+    job = await crud.job.get_active(db=db_with_user, kind="import_articles")
+    assert job is not None
+    assert job.status == models.JOB_QUEUED
+
+
+async def test_import_snapshot_enqueues_job(
+    db_with_user: Session, client: TestClient, normal_user_cookies: Cookies, tmp_path: Path
+) -> None:
+    """
+    Test that re-importing a snapshot only queues a job once a snapshot is stored.
+    """
+    store = ExportSnapshotStore(path=tmp_path)
+    client.cookies = normal_user_cookies
+    with patch("app.views.pages.articles.snapshots", store):
+        response = client.post("/import-snapshot", follow_redirects=False)
+        assert response.status_code == 303
+        assert await crud.job.get_active(db=db_with_user, kind="import_snapshot") is None
+
+        (tmp_path / "abc.html.gz").touch()
+        response = client.post("/import-snapshot", follow_redirects=False)
+        assert response.status_code == 303
+        assert await crud.job.get_active(db=db_with_user, kind="import_snapshot") is not None
+
+
+async def test_generate_ai_text_enqueues_job(
+    db_with_user: Session, client: TestClient, superuser_cookies: Cookies
+) -> None:
+    client.cookies = superuser_cookies
+    response = client.post("/articles/generate-ai-text", follow_redirects=False)
+    assert response.status_code == 303
+    assert await crud.job.get_active(db=db_with_user, kind="generate_ai_text") is not None
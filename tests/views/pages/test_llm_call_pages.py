@@ -0,0 +1,23 @@
+from fastapi.testclient import TestClient
+from httpx import Cookies
+from sqlmodel import Session
+
+from app import crud, models
+
+
+async def test_list_llm_calls(
+    db_with_user: Session, client: TestClient, superuser_cookies: Cookies
+) -> None:
+    """
+    Test that a superuser can view the LLM call journal.
+    """
+    await crud.llm_call.create(
+        db=db_with_user,
+        obj_in=models.LLMCallCreate(task="summary", model="model", article_id="a1", latency=2.0),
+    )
+    client.cookies = superuser_cookies
+    response = client.get("/llm-calls")
+    assert response.status_code == 200
+    assert response.template.name == "llm_call/list.html"  # type: ignore
+    assert [stats.task for stats in response.context["task_stats"]] == ["summary"]  # type: ignore
+    assert response.context["llm_calls"][0].article_id == "a1"  # type: ignore